@@ -0,0 +1,244 @@
+"""
+Agent registry for FinSpeak
+Bounded per-user agent cache with LRU, idle-TTL and memory-budget eviction
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from app_logging import get_logger
+
+logger = get_logger("agents")
+
+# Resident agents kept at most (least recently used evicted first)
+MAX_AGENTS = int(os.getenv("MAX_AGENTS", "1000"))
+
+# Agents idle longer than this are evicted
+AGENT_IDLE_TTL_SECONDS = float(os.getenv("AGENT_IDLE_TTL_SECONDS", "1800"))
+
+# Estimated memory for all resident agents (object overhead + conversation history)
+AGENT_MEMORY_BUDGET_MB = float(os.getenv("AGENT_MEMORY_BUDGET_MB", "256"))
+
+# Rough size of an agent with an empty history (measured ~13 KB with the banking tools)
+AGENT_BASE_BYTES = 16 * 1024
+
+
+def estimate_agent_bytes(agent):
+    """Approximate resident size: fixed overhead plus the serialized conversation history"""
+    try:
+        history = len(json.dumps(agent.messages, default=str))
+    except (TypeError, ValueError):
+        history = 0
+    return AGENT_BASE_BYTES + history
+
+
+class _Entry:
+    __slots__ = ("agent", "last_used", "size", "in_use")
+
+    def __init__(self, agent, now, size=AGENT_BASE_BYTES):
+        self.agent = agent
+        self.last_used = now
+        self.size = size
+        self.in_use = 0
+
+
+class AgentRegistry:
+    """Per-user agents in LRU order; evicts on count, idle time and estimated memory"""
+
+    def __init__(self, factory, max_agents=MAX_AGENTS, idle_ttl=AGENT_IDLE_TTL_SECONDS,
+                 memory_budget_bytes=int(AGENT_MEMORY_BUDGET_MB * 1024 * 1024), is_current=None):
+        """
+        Args:
+            factory: factory(user_id) -> new (or rehydrated) agent
+            is_current: Optional is_current(user_id, agent) -> False when a resident
+                agent is stale (e.g. another worker advanced the stored session)
+        """
+        self.factory = factory
+        self.is_current = is_current
+        self.max_agents = max_agents
+        self.idle_ttl = idle_ttl
+        self.memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> _Entry, least recently used first
+        self._loading = {}  # user_id -> Event set once its staleness check / factory call finishes
+        self._resident_bytes = 0
+        self._evict_hooks = []
+        self._stats = {"hits": 0, "misses": 0, "stale_reloads": 0, "evictions_lru": 0,
+                       "evictions_ttl": 0, "evictions_memory": 0, "removed": 0, "discarded": 0}
+
+    def add_evict_hook(self, hook):
+        """hook(user_id, agent, reason) runs after an agent leaves the registry (e.g. to persist it)"""
+        self._evict_hooks.append(hook)
+
+    def get(self, user_id):
+        """Agent for user_id, created on first use"""
+        return self._get(user_id, pin=False)
+
+    def acquire(self, user_id):
+        """Agent for one turn; it can't be evicted until release() (which also re-estimates its size)"""
+        return self._get(user_id, pin=True)
+
+    def _get(self, user_id, pin):
+        while True:
+            with self._lock:
+                loading = self._loading.get(user_id)
+                if loading is None:
+                    entry = self._entries.get(user_id)
+                    if entry is not None and (entry.in_use or not self.is_current):
+                        self._stats["hits"] += 1
+                        evicted = self._touch_locked(user_id, entry, pin)
+                        break
+                    # is_current (a DB read) and factory run outside the lock; other
+                    # callers for this user wait for the result, other users don't
+                    self._loading[user_id] = threading.Event()
+                    if entry is not None:
+                        entry.in_use += 1  # Not evictable while it is being checked
+            if loading is not None:
+                loading.wait()
+                continue
+            entry, evicted = self._load(user_id, entry, pin)
+            if entry is not None:
+                break
+        self._run_hooks(evicted)
+        return entry.agent
+
+    def _load(self, user_id, entry, pin):
+        """Reload a stale resident agent or build a missing one; (None, []) if it was removed meanwhile"""
+        agent = None
+        try:
+            if entry is None or not self.is_current(user_id, entry.agent):
+                agent = self.factory(user_id)
+                size = estimate_agent_bytes(agent)
+        except BaseException:
+            with self._lock:
+                self._end_load_locked(user_id, entry)
+            raise
+        with self._lock:
+            self._end_load_locked(user_id, entry)
+            if self._entries.get(user_id) is not entry:
+                return None, []  # remove() ran meanwhile (e.g. /api/reset); start over
+            if agent is None:
+                self._stats["hits"] += 1
+            elif entry is None:
+                self._stats["misses"] += 1
+                entry = self._entries[user_id] = _Entry(agent, time.monotonic(), size)
+                self._resident_bytes += size
+            else:
+                self._stats["stale_reloads"] += 1
+                entry.agent = agent
+                self._resident_bytes += size - entry.size
+                entry.size = size
+            return entry, self._touch_locked(user_id, entry, pin)
+
+    def _end_load_locked(self, user_id, entry):
+        self._loading.pop(user_id).set()
+        if entry is not None:
+            entry.in_use -= 1
+
+    def _touch_locked(self, user_id, entry, pin):
+        """Mark entry most recently used (and pin it); returns the agents evicted to make room"""
+        now = time.monotonic()
+        entry.last_used = now
+        self._entries.move_to_end(user_id)
+        if pin:
+            entry.in_use += 1
+        return self._evict_locked(now, keep=user_id)
+
+    def release(self, user_id, agent):
+        """End a turn started with acquire()"""
+        size = estimate_agent_bytes(agent)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.agent is not agent:
+                return  # Reset while in use
+            entry.in_use = max(0, entry.in_use - 1)
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(user_id)
+            self._resident_bytes += size - entry.size
+            entry.size = size
+            evicted = self._evict_locked(entry.last_used, keep=user_id)
+        self._run_hooks(evicted)
+
+    def discard(self, user_id, agent):
+        """End a turn started with acquire() that was cut short (error, client gone)
+        
+        The agent's history may end mid-turn, so it is dropped rather than released;
+        the next turn rehydrates the last saved session. Hooks run with reason "discarded".
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.agent is not agent:
+                return  # Reset or reloaded meanwhile
+            del self._entries[user_id]
+            self._resident_bytes -= entry.size
+            self._stats["discarded"] += 1
+        self._run_hooks([(user_id, agent, "discarded")])
+
+    def remove(self, user_id):
+        """Drop a user's agent (e.g. /api/reset); eviction hooks run with reason "removed" """
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is None:
+                return False
+            self._resident_bytes -= entry.size
+            self._stats["removed"] += 1
+        self._run_hooks([(user_id, entry.agent, "removed")])
+        return True
+
+    def sweep(self):
+        """Evict idle agents; call periodically so memory is released without traffic"""
+        with self._lock:
+            evicted = self._evict_locked(time.monotonic())
+        self._run_hooks(evicted)
+        return len(evicted)
+
+    def _evict_locked(self, now, keep=None):
+        """Pop entries over the TTL, count or memory limits, oldest first (skipping agents in use and keep)"""
+        victims = []
+        count, resident = len(self._entries), self._resident_bytes
+        for user_id, entry in self._entries.items():
+            over_count = count > self.max_agents
+            over_memory = resident > self.memory_budget_bytes
+            idle = now - entry.last_used > self.idle_ttl
+            if not (over_count or over_memory or idle):
+                break  # Everything after this is more recent and within limits
+            if entry.in_use or user_id == keep:
+                continue  # Never evict an agent while a request is using it
+            victims.append((user_id, "ttl" if idle else "lru" if over_count else "memory"))
+            count -= 1
+            resident -= entry.size
+
+        evicted = []
+        for user_id, reason in victims:
+            entry = self._entries.pop(user_id)
+            self._resident_bytes -= entry.size
+            self._stats[f"evictions_{reason}"] += 1
+            evicted.append((user_id, entry.agent, reason))
+        return evicted
+
+    def _run_hooks(self, evicted):
+        for user_id, agent, reason in evicted:
+            for hook in self._evict_hooks:
+                try:
+                    hook(user_id, agent, reason)
+                except Exception:
+                    logger.exception("Agent eviction hook failed", extra={"user_id": user_id, "reason": reason})
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "resident_agents": len(self._entries),
+                "in_use": sum(1 for entry in self._entries.values() if entry.in_use),
+                "resident_bytes": self._resident_bytes,
+                "max_agents": self.max_agents,
+                "idle_ttl_seconds": self.idle_ttl,
+                "memory_budget_bytes": self.memory_budget_bytes
+            }
@@ -0,0 +1,150 @@
+"""
+Structured logging for FinSpeak
+JSON log lines with request correlation ids, written off the request path by a queue listener
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Verbose lines logged with log_sampled() are capped at this many per key per second
+LOG_SAMPLE_PER_SECOND = float(os.getenv("LOG_SAMPLE_PER_SECOND", "1"))
+
+# Records waiting for the writer thread; when full, new records are dropped instead of blocking
+LOG_QUEUE_SIZE = 10000
+
+# Correlation id of the request being handled ("-" outside a request)
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, request_id, msg plus any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage()
+        }
+        for key in record.__dict__.keys() - _STANDARD_ATTRS:
+            entry.setdefault(key, record.__dict__[key])
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that stamps the request id and never blocks the caller"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.request_id = request_id_var.get()
+        # Format the message now; args may be mutated after we return
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Sampler:
+    """Per-key token bucket for rate-limited debug lines"""
+
+    def __init__(self, per_second):
+        self.per_second = per_second
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> (tokens, last refill)
+        self.suppressed = 0
+
+    def allow(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.per_second, now))
+            tokens = min(self.per_second, tokens + (now - last) * self.per_second)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self.suppressed += 1
+                return False
+            self._buckets[key] = (tokens - 1, now)
+            return True
+
+
+_sampler = _Sampler(LOG_SAMPLE_PER_SECOND)
+_listener = None
+_queue_handler = None
+
+
+def setup_logging():
+    """Route the "finspeak" loggers through a queue to a JSON stdout writer thread (idempotent)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+    _queue_handler = _DroppingQueueHandler(log_queue)
+
+    root = logging.getLogger("finspeak")
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out queued log records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    """Logger under the "finspeak" namespace"""
+    return logging.getLogger(f"finspeak.{name}")
+
+
+def log_sampled(logger, key, msg, *args, level=logging.DEBUG, **fields):
+    """Log a verbose line at most LOG_SAMPLE_PER_SECOND times per second per key"""
+    if logger.isEnabledFor(level) and _sampler.allow(key):
+        logger.log(level, msg, *args, extra=fields)
+
+
+def new_request_id(incoming=None):
+    """Set (and return) the correlation id for the current request"""
+    request_id = incoming or uuid.uuid4().hex[:12]
+    request_id_var.set(request_id)
+    return request_id
+
+
+def get_logging_stats():
+    """Records lost to a full queue and verbose lines skipped by sampling"""
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "sampled_out": _sampler.suppressed
+    }
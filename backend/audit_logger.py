@@ -2,15 +2,64 @@
 Audit logging system for FinSpeak
 Tracks all banking operations for compliance and security
 """
+import atexit
+import fcntl
+import gzip
+import json
+import os
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from contextlib import contextmanager
+from pathlib import Path
+from app_logging import get_logger
+
+logger = get_logger("audit")
 
 AUDIT_DB = "finspeak_audit.db"
 
+# Open AUDIT_DB with mode=ro (e.g. backtests against a live or copied database): no schema
+# changes, archival or writes, and a missing file is an error instead of a new empty DB
+AUDIT_DB_READ_ONLY = False
+
+# Group commit: the writer thread commits once per batch instead of once per row
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "256"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "20"))
+
+# "async": return once queued (fire-and-forget); "sync": every call waits for its commit
+AUDIT_DURABILITY = os.getenv("AUDIT_DURABILITY", "async")
+
+# Compliance-critical actions always wait for their commit, whatever the mode
+WAIT_FOR_FLUSH_ACTIONS = {"transfer_completed", "transfer_failed"}
+
+# Max seconds a waiting caller blocks before giving up on its commit
+AUDIT_WAIT_TIMEOUT = 5.0
+
+# While the queue is full, producers re-check every this many seconds that the writer is alive
+AUDIT_PUT_TIMEOUT = 0.5
+
+# Day partitions: rows live in audit_logs_YYYYMMDD tables; partitions older than
+# AUDIT_HOT_DAYS are rolled into append-only gzip JSONL files in AUDIT_ARCHIVE_DIR
+AUDIT_HOT_DAYS = int(os.getenv("AUDIT_HOT_DAYS", "7"))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "audit_archive")
+
+# Row ids are day * AUDIT_ID_DAY_FACTOR + per-day sequence, so they are unique across
+# partitions and archives and sort by day (20251130000000001, ...)
+AUDIT_ID_DAY_FACTOR = 10 ** 9
+
+_PARTITION_PREFIX = "audit_logs_"
+_COLUMNS = ("timestamp", "user_id", "action", "details", "status", "amount",
+            "from_account", "to_account", "ip_address", "session_id")
+
 @contextmanager
 def get_audit_db():
-    conn = sqlite3.connect(AUDIT_DB)
+    if AUDIT_DB_READ_ONLY:
+        conn = sqlite3.connect(Path(AUDIT_DB).resolve().as_uri() + "?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(AUDIT_DB)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -21,44 +70,496 @@ def get_audit_db():
     finally:
         conn.close()
 
+def partition_table(day):
+    """Partition table name for a 'YYYY-MM-DD' day"""
+    return _PARTITION_PREFIX + day.replace("-", "")
+
+def _id_base(day):
+    """Smallest-but-one global row id of a day"""
+    return int(day.replace("-", "")) * AUDIT_ID_DAY_FACTOR
+
+@contextmanager
+def _maintenance_lock(blocking=True):
+    """Cross-process lock around migration and archival (every uvicorn worker runs them)
+    
+    Yields False instead of waiting when blocking=False and another process holds it.
+    """
+    with open(AUDIT_DB + ".lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _ensure_partition(conn, day):
+    table = partition_table(day)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            details TEXT,
+            status TEXT NOT NULL,
+            amount INTEGER,
+            from_account TEXT,
+            to_account TEXT,
+            ip_address TEXT,
+            session_id TEXT
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_timestamp ON {table} (user_id, timestamp)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_action_status ON {table} (action, status)")
+    # Start the day's AUTOINCREMENT at its global id base
+    conn.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)",
+        (table, _id_base(day), table)
+    )
+    return table
+
+def _globalize_partition_ids(conn):
+    """Move partitions created before global ids onto their day's id base (one-time, idempotent)"""
+    for day in list_partitions(conn):
+        table = partition_table(day)
+        base = _id_base(day)
+        if conn.execute(f"SELECT 1 FROM {table} WHERE id < ? LIMIT 1", (AUDIT_ID_DAY_FACTOR,)).fetchone():
+            conn.execute(f"UPDATE {table} SET id = id + ? WHERE id < ?", (base, AUDIT_ID_DAY_FACTOR))
+            conn.execute("UPDATE sqlite_sequence SET seq = seq + ? WHERE name = ? AND seq < ?", (base, table, AUDIT_ID_DAY_FACTOR))
+        _ensure_partition(conn, day)
+
+def list_partitions(conn):
+    """Days ('YYYY-MM-DD') that have a hot partition table, oldest first"""
+    days = []
+    for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'audit_logs_[0-9]*'"
+    ):
+        digits = row[0][len(_PARTITION_PREFIX):]
+        days.append(f"{digits[:4]}-{digits[4:6]}-{digits[6:]}")
+    return sorted(days)
+
+def _archive_path(day):
+    return os.path.join(AUDIT_ARCHIVE_DIR, f"audit_{day}.jsonl.gz")
+
+def list_archived_days():
+    """Days that have an archive file, oldest first"""
+    if not os.path.isdir(AUDIT_ARCHIVE_DIR):
+        return []
+    return sorted(
+        name[len("audit_"):-len(".jsonl.gz")]
+        for name in os.listdir(AUDIT_ARCHIVE_DIR)
+        if name.startswith("audit_") and name.endswith(".jsonl.gz")
+    )
+
 def init_audit_db():
-    """Initialize audit log database"""
+    """Create summary tables, migrate legacy rows and archive old partitions; call once at startup"""
     with get_audit_db() as conn:
+        # WAL lets dashboard/risk reads run while the writer thread commits
+        conn.execute("PRAGMA journal_mode = WAL")
+        
+        # Summaries maintained at write time so get_metrics never scans the logs
         conn.execute("""
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                user_id TEXT NOT NULL,
+            CREATE TABLE IF NOT EXISTS audit_action_totals (
                 action TEXT NOT NULL,
-                details TEXT,
                 status TEXT NOT NULL,
-                amount INTEGER,
-                from_account TEXT,
-                to_account TEXT,
-                ip_address TEXT,
-                session_id TEXT
-            )
+                count INTEGER NOT NULL DEFAULT 0,
+                amount_sum INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (action, status)
+            ) WITHOUT ROWID
         """)
-
-def log_action(user_id, action, status, details=None, amount=None, from_account=None, to_account=None, ip_address=None, session_id=None):
-    """Log a banking action"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS audit_hourly_activity (
+                hour TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+    
+    # One worker migrates while the others wait, so the legacy table is moved exactly once
+    with _maintenance_lock(), get_audit_db() as conn:
+        legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'audit_logs'"
+        ).fetchone()
+        if legacy:
+            _migrate_legacy_audit_logs(conn)
+        _globalize_partition_ids(conn)
+    
     with get_audit_db() as conn:
+        archive_cold_partitions(conn)
+
+def _migrate_legacy_audit_logs(conn):
+    """Move the single pre-partitioning audit_logs table into day partitions"""
+    # One-time summary backfill for audit databases that predate the summaries
+    if not conn.execute("SELECT 1 FROM audit_action_totals LIMIT 1").fetchone():
         conn.execute("""
-            INSERT INTO audit_logs 
-            (timestamp, user_id, action, details, status, amount, from_account, to_account, ip_address, session_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            datetime.now().isoformat(),
-            user_id,
-            action,
-            details,
-            status,
-            amount,
-            mask_account(from_account) if from_account else None,
-            mask_account(to_account) if to_account else None,
-            ip_address,
-            session_id
-        ))
+            INSERT INTO audit_action_totals (action, status, count, amount_sum)
+            SELECT action, status, COUNT(*), COALESCE(SUM(amount), 0)
+            FROM audit_logs GROUP BY action, status
+        """)
+        conn.execute("DELETE FROM audit_hourly_activity")
+        conn.execute("""
+            INSERT INTO audit_hourly_activity (hour, count)
+            SELECT substr(timestamp, 1, 13), COUNT(*)
+            FROM audit_logs GROUP BY substr(timestamp, 1, 13)
+        """)
+    
+    columns = ", ".join(_COLUMNS)
+    placeholders = ", ".join("?" * len(_COLUMNS))
+    moved = 0
+    cursor = conn.execute(f"SELECT {columns} FROM audit_logs ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(5000)
+        if not rows:
+            break
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[0][:10], []).append(tuple(row))
+        for day, day_rows in by_day.items():
+            table = _ensure_partition(conn, day)
+            conn.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", day_rows)
+        moved += len(rows)
+    conn.execute("DROP TABLE audit_logs")
+    logger.info("Moved legacy audit rows into day partitions", extra={"rows": moved})
+
+def archive_cold_partitions(conn, today=None):
+    """Roll partitions older than AUDIT_HOT_DAYS into gzip JSONL archives
+    
+    A new day's archive is written to a temp file and renamed into place; rows
+    for a day that is already archived are appended as a new gzip member, so
+    archive files are never rewritten. The partition is dropped afterwards.
+    
+    Runs in one process at a time (others skip), and rows whose id is already
+    in the archive are not written again, so a crash between writing the
+    archive and dropping the partition can't duplicate rows.
+    """
+    today = today or datetime.now()
+    cutoff = (today - timedelta(days=AUDIT_HOT_DAYS)).strftime("%Y-%m-%d")
+    with _maintenance_lock(blocking=False) as acquired:
+        if not acquired:
+            return 0  # Another worker is archiving
+        cold_days = [day for day in list_partitions(conn) if day < cutoff]
+        if not cold_days:
+            return 0
+        
+        os.makedirs(AUDIT_ARCHIVE_DIR, exist_ok=True)
+        columns = ("id",) + _COLUMNS
+        for day in cold_days:
+            table = partition_table(day)
+            path = _archive_path(day)
+            exists = os.path.exists(path)
+            archived_ids = {row["id"] for row in _read_archive(day)} if exists else set()
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY timestamp, id")
+            rows = [row for row in cursor if row[0] not in archived_ids]
+            if rows:
+                target = path if exists else f"{path}.{os.getpid()}.tmp"
+                with open(target, "ab" if exists else "wb") as raw:
+                    with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+                        for row in rows:
+                            archive.write((json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n").encode("utf-8"))
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                if not exists:
+                    os.replace(target, path)
+            with conn:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+    logger.info("Archived audit partitions", extra={"partitions": len(cold_days), "archive_dir": AUDIT_ARCHIVE_DIR})
+    return len(cold_days)
+
+def _read_archive(day):
+    """Rows from one archived day, in timestamp order"""
+    base = _id_base(day)
+    with gzip.open(_archive_path(day), "rt", encoding="utf-8") as archive:
+        for line in archive:
+            row = json.loads(line)
+            if row["id"] < AUDIT_ID_DAY_FACTOR:
+                row["id"] += base  # Archived before ids were global
+            yield row
+
+_INSERT_SQL = """
+    INSERT INTO {table} 
+    (timestamp, user_id, action, details, status, amount, from_account, to_account, ip_address, session_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_TOTALS_UPSERT_SQL = """
+    INSERT INTO audit_action_totals (action, status, count, amount_sum) VALUES (?, ?, ?, ?)
+    ON CONFLICT (action, status) DO UPDATE SET
+        count = count + excluded.count,
+        amount_sum = amount_sum + excluded.amount_sum
+"""
+
+_HOURLY_UPSERT_SQL = """
+    INSERT INTO audit_hourly_activity (hour, count) VALUES (?, ?)
+    ON CONFLICT (hour) DO UPDATE SET count = count + excluded.count
+"""
+
+
+def _summarize_rows(rows):
+    """Per-(action, status) totals and per-hour counts for a batch of audit rows"""
+    totals = {}
+    hourly = {}
+    for timestamp, _, action, _, status, amount, *_ in rows:
+        entry = totals.setdefault((action, status), [0, 0])
+        entry[0] += 1
+        entry[1] += amount or 0
+        hour = timestamp[:13]  # "YYYY-MM-DDTHH" in local time
+        hourly[hour] = hourly.get(hour, 0) + 1
+    return (
+        [(action, status, count, amount_sum) for (action, status), (count, amount_sum) in totals.items()],
+        list(hourly.items())
+    )
+
+
+# Called from the writer thread with each committed batch (list of row dicts)
+_write_listeners = []
+
+def add_write_listener(listener):
+    """Register listener(rows) to be called after every committed audit batch
+    
+    Runs on the writer thread: listeners must be quick and must not log or flush.
+    """
+    _write_listeners.append(listener)
+
+def remove_write_listener(listener):
+    if listener in _write_listeners:
+        _write_listeners.remove(listener)
+
+def _notify_listeners(rows):
+    if not _write_listeners:
+        return
+    committed = [dict(zip(_COLUMNS, row)) for row in rows]
+    for listener in list(_write_listeners):
+        try:
+            listener(committed)
+        except Exception:
+            logger.exception("Audit write listener failed")
+
+
+class _Flushed:
+    """Completion handle for a row (or flush barrier) that a caller waits on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.error = None
+
+    def wait(self, timeout):
+        if not self.event.wait(timeout):
+            raise TimeoutError(f"Audit log commit not confirmed within {timeout}s")
+        if self.error:
+            raise self.error
+
+
+class AuditWriter:
+    """Bounded queue + background thread that batches audit rows into one transaction"""
+
+    def __init__(self, db_path=AUDIT_DB, batch_size=AUDIT_BATCH_SIZE, flush_interval_ms=AUDIT_FLUSH_INTERVAL_MS,
+                 queue_size=AUDIT_QUEUE_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_dropped = 0
+        self.writer_restarts = 0
+        self._current_day = None
+
+    def _start_locked(self):
+        if self._thread is not None:
+            self.writer_restarts += 1
+            logger.error("Audit writer thread died; restarting it", extra={"queued": self._queue.qsize()})
+        self._thread = threading.Thread(target=self._run, name="finspeak-audit-writer", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, item):
+        """Hand item to the writer thread, restarting it if it died; False once stopped
+        
+        Holding the lock across the check and the put means nothing can be queued
+        behind stop()'s sentinel.
+        """
+        with self._lock:
+            if self._stopped:
+                return False
+            while True:
+                if self._thread is None or not self._thread.is_alive():
+                    self._start_locked()
+                try:
+                    # Blocks while full: backpressure instead of unbounded memory
+                    self._queue.put(item, timeout=AUDIT_PUT_TIMEOUT)
+                    return True
+                except queue.Full:
+                    continue  # Re-check the writer is still draining
+
+    def submit(self, row, wait=False):
+        """Queue a row; with wait=True block until it is committed"""
+        handle = _Flushed() if wait else None
+        if not self._enqueue((row, handle)):
+            # Late writes after shutdown (e.g. atexit ordering) go straight to disk
+            self._write_batch([(row, handle)])
+        if handle:
+            handle.wait(AUDIT_WAIT_TIMEOUT)
+
+    def flush(self, timeout=AUDIT_WAIT_TIMEOUT):
+        """Block until everything queued before this call is committed"""
+        if self._thread is None:
+            return
+        handle = _Flushed()
+        if self._enqueue((None, handle)):
+            handle.wait(timeout)
+
+    def stop(self):
+        """Commit everything still queued and stop the writer thread"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True  # New rows bypass the queue from here on
+            thread = self._thread
+            while thread is not None and thread.is_alive():
+                try:
+                    self._queue.put(None, timeout=AUDIT_PUT_TIMEOUT)
+                    break
+                except queue.Full:
+                    continue
+        if thread is not None:
+            thread.join()
+        # A writer that died leaves its queue behind; commit what is left here
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftovers.append(item)
+        if leftovers:
+            self._write_batch(leftovers)
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                has_waiter = item[1] is not None
+                deadline = time.monotonic() + self.flush_interval
+                stopping = False
+                # Collect until the batch is full or the flush interval elapses; once
+                # someone is waiting, commit as soon as the queue is momentarily empty
+                while len(batch) < self.batch_size:
+                    remaining = 0 if has_waiter else deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    has_waiter = has_waiter or item[1] is not None
+                self._write_batch(batch, conn)
+                if stopping:
+                    return
+        finally:
+            conn.close()
+
+    def _write_batch(self, batch, conn=None):
+        rows = [row for row, _ in batch if row is not None]
+        error = None
+        if rows:
+            own_conn = conn is None
+            if own_conn:
+                conn = sqlite3.connect(self.db_path)
+            try:
+                totals, hourly = _summarize_rows(rows)
+                by_day = {}
+                for row in rows:
+                    by_day.setdefault(row[0][:10], []).append(row)
+                with conn:
+                    for day, day_rows in by_day.items():
+                        conn.executemany(_INSERT_SQL.format(table=_ensure_partition(conn, day)), day_rows)
+                    conn.executemany(_TOTALS_UPSERT_SQL, totals)
+                    conn.executemany(_HOURLY_UPSERT_SQL, hourly)
+                
+                # First write of a new day: roll partitions that just went cold
+                newest_day = max(by_day)
+                if self._current_day != newest_day:
+                    if self._current_day is not None:
+                        self._archive(conn)
+                    self._current_day = newest_day
+                self.rows_written += len(rows)
+                self.batches_written += 1
+            except Exception as e:
+                error = e
+                logger.exception("Audit log write failed", extra={"rows": len(rows)})
+            finally:
+                if own_conn:
+                    conn.close()
+            if not error:
+                _notify_listeners(rows)
+        for row, handle in batch:
+            if handle:
+                handle.error = error
+                handle.event.set()
+            elif row is not None and error:
+                self.rows_dropped += 1
+
+    def _archive(self, conn):
+        try:
+            archive_cold_partitions(conn)
+        except Exception:
+            logger.exception("Audit partition archival failed (will retry at next rollover)")
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "rows_dropped": self.rows_dropped,
+            "writer_restarts": self.writer_restarts
+        }
+
+
+audit_writer = AuditWriter()
+
+
+def log_action(user_id, action, status, details=None, amount=None, from_account=None, to_account=None, ip_address=None, session_id=None, wait=None):
+    """Log a banking action
+    
+    Rows are committed in batches by the background writer. wait=None uses the
+    default durability: wait for the commit in "sync" mode or for actions in
+    WAIT_FOR_FLUSH_ACTIONS, otherwise return as soon as the row is queued.
+    """
+    if wait is None:
+        wait = AUDIT_DURABILITY == "sync" or action in WAIT_FOR_FLUSH_ACTIONS
+    audit_writer.submit((
+        datetime.now().isoformat(),
+        user_id,
+        action,
+        details,
+        status,
+        amount,
+        mask_account(from_account) if from_account else None,
+        mask_account(to_account) if to_account else None,
+        ip_address,
+        session_id
+    ), wait=wait)
+
+def flush_audit_logs():
+    """Wait until every queued audit row is committed"""
+    audit_writer.flush()
+
+def shutdown_audit_writer():
+    """Commit queued audit rows and stop the writer thread"""
+    audit_writer.stop()
 
 def mask_account(account_id):
     """Mask account ID for PII protection"""
@@ -66,51 +567,173 @@ def mask_account(account_id):
         return account_id
     return f"***{account_id[-4:]}"
 
-def get_audit_logs(user_id=None, limit=100):
-    """Retrieve audit logs"""
+def query_audit_logs(user_id=None, start=None, end=None, action=None, limit=100, include_archive=False):
+    """Newest-first audit rows, reading only the partitions that overlap [start, end]
+    
+    Args:
+        user_id: Only this user's rows
+        start: Inclusive lower bound (ISO timestamp or datetime)
+        end: Inclusive upper bound (ISO timestamp or datetime)
+        action: Only this action
+        limit: Max rows returned
+        include_archive: Also read archived (cold) days once hot partitions run out
+    """
+    start = start.isoformat() if isinstance(start, datetime) else start
+    end = end.isoformat() if isinstance(end, datetime) else end
+    
+    def in_range(day):
+        return (not start or day >= start[:10]) and (not end or day <= end[:10])
+    
+    conditions, params = [], []
+    for column, value, operator in (("user_id", user_id, "="), ("action", action, "="),
+                                    ("timestamp", start, ">="), ("timestamp", end, "<=")):
+        if value:
+            conditions.append(f"{column} {operator} ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    results = []
     with get_audit_db() as conn:
-        if user_id:
+        for day in reversed(list_partitions(conn)):
+            if len(results) >= limit:
+                return results
+            if not in_range(day):
+                continue
             cursor = conn.execute(
-                "SELECT * FROM audit_logs WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?",
-                (user_id, limit)
+                f"SELECT * FROM {partition_table(day)} {where} ORDER BY timestamp DESC LIMIT ?",
+                params + [limit - len(results)]
             )
-        else:
-            cursor = conn.execute(
-                "SELECT * FROM audit_logs ORDER BY timestamp DESC LIMIT ?",
-                (limit,)
-            )
-        return [dict(row) for row in cursor.fetchall()]
+            results.extend(dict(row) for row in cursor.fetchall())
+    
+    if include_archive:
+        for day in reversed(list_archived_days()):
+            if len(results) >= limit:
+                break
+            if not in_range(day):
+                continue
+            rows = [
+                row for row in _read_archive(day)
+                if (not user_id or row["user_id"] == user_id)
+                and (not action or row["action"] == action)
+                and (not start or row["timestamp"] >= start)
+                and (not end or row["timestamp"] <= end)
+            ]
+            rows.sort(key=lambda row: row["timestamp"], reverse=True)
+            results.extend(rows[:limit - len(results)])
+    return results
+
+def iter_audit_logs(start=None, end=None, include_archive=True):
+    """Stream audit rows oldest first across archives and hot partitions
+    
+    Reads one day at a time, so memory stays bounded for full-history replays.
+    """
+    start = start.isoformat() if isinstance(start, datetime) else start
+    end = end.isoformat() if isinstance(end, datetime) else end
+    flush_audit_logs()
+    
+    with get_audit_db() as conn:
+        hot_days = list_partitions(conn)
+    archived_days = list_archived_days() if include_archive else []
+    
+    for day in sorted(set(hot_days) | set(archived_days)):
+        if (start and day < start[:10]) or (end and day > end[:10]):
+            continue
+        if day in archived_days:
+            for row in _read_archive(day):
+                if (not start or row["timestamp"] >= start) and (not end or row["timestamp"] <= end):
+                    yield row
+        if day in hot_days:
+            with get_audit_db() as conn:
+                try:
+                    cursor = conn.execute(f"SELECT * FROM {partition_table(day)} ORDER BY timestamp, id")
+                except sqlite3.OperationalError:
+                    continue  # Archived while we were streaming earlier days
+                for row in cursor:
+                    row = dict(row)
+                    if (not start or row["timestamp"] >= start) and (not end or row["timestamp"] <= end):
+                        yield row
+
+def get_audit_logs_after(after_id, limit=500):
+    """Rows committed with id > after_id by any process, oldest first (live tails)
+    
+    Ids are global and assigned in commit order, so polling with the last id seen
+    never skips or repeats a row.
+    """
+    rows = []
+    with get_audit_db() as conn:
+        for day in list_partitions(conn):
+            if _id_base(day) + AUDIT_ID_DAY_FACTOR <= after_id:
+                continue  # Whole day already seen
+            rows.extend(dict(row) for row in conn.execute(
+                f"SELECT * FROM {partition_table(day)} WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit - len(rows))
+            ))
+            if len(rows) >= limit:
+                break
+    return rows
+
+def _latest_audit_id(conn):
+    for day in reversed(list_partitions(conn)):
+        row_id = conn.execute(f"SELECT MAX(id) FROM {partition_table(day)}").fetchone()[0]
+        if row_id is not None:
+            return row_id
+    return 0
+
+def latest_audit_id():
+    """Highest committed audit row id (0 if there are none)"""
+    with get_audit_db() as conn:
+        return _latest_audit_id(conn)
+
+def get_audit_logs(user_id=None, limit=100, since=None):
+    """Retrieve recent audit logs (hot partitions only), newest first"""
+    flush_audit_logs()  # Read our own queued writes (risk checks depend on them)
+    return query_audit_logs(user_id=user_id, start=since, limit=limit)
+
+def _read_metrics(conn):
+    # Completed transfers by status
+    completed = {
+        row["status"]: row
+        for row in conn.execute(
+            "SELECT status, count, amount_sum FROM audit_action_totals WHERE action = 'transfer_completed'"
+        )
+    }
+    total = sum(row["count"] for row in completed.values())
+    success = completed["success"]["count"] if "success" in completed else 0
+    success_rate = (success / total * 100) if total > 0 else 0
+    
+    # Total amount transferred (only successful completed transfers)
+    total_amount = completed["success"]["amount_sum"] if "success" in completed else 0
+    
+    # Recent activity (last 24h, hour granularity) - all actions
+    since_hour = (datetime.now() - timedelta(days=1)).isoformat()[:13]
+    recent = conn.execute(
+        "SELECT COALESCE(SUM(count), 0) as count FROM audit_hourly_activity WHERE hour >= ?",
+        (since_hour,)
+    ).fetchone()['count']
+    
+    return {
+        "total_transactions": total,
+        "successful_transactions": success,
+        "success_rate": round(success_rate, 2),
+        "total_amount_transferred": total_amount,
+        "recent_activity_24h": recent
+    }
 
 def get_metrics():
-    """Get system metrics"""
+    """Get system metrics from the write-time summaries (O(1) in audit history size)"""
+    flush_audit_logs()
     with get_audit_db() as conn:
-        # Total completed transactions only
-        total = conn.execute(
-            "SELECT COUNT(*) as count FROM audit_logs WHERE action = 'transfer_completed'"
-        ).fetchone()['count']
-        
-        # Success rate (completed transfers with success status)
-        success = conn.execute(
-            "SELECT COUNT(*) as count FROM audit_logs WHERE action = 'transfer_completed' AND status = 'success'"
-        ).fetchone()['count']
-        success_rate = (success / total * 100) if total > 0 else 0
-        
-        # Total amount transferred (only successful completed transfers)
-        total_amount = conn.execute(
-            "SELECT SUM(amount) as total FROM audit_logs WHERE action = 'transfer_completed' AND status = 'success'"
-        ).fetchone()['total'] or 0
-        
-        # Recent activity (last 24h) - all actions
-        recent = conn.execute(
-            "SELECT COUNT(*) as count FROM audit_logs WHERE timestamp > datetime('now', '-1 day')"
-        ).fetchone()['count']
-        
-        return {
-            "total_transactions": total,
-            "success_rate": round(success_rate, 2),
-            "total_amount_transferred": total_amount,
-            "recent_activity_24h": recent
-        }
+        return _read_metrics(conn)
+
+def get_metrics_snapshot():
+    """(get_metrics(), latest_audit_id()) from one read transaction, for live tails
+    
+    Rows and summaries are committed together, so the metrics count exactly the
+    rows up to the returned id.
+    """
+    flush_audit_logs()
+    with get_audit_db() as conn:
+        conn.execute("BEGIN")
+        return _read_metrics(conn), _latest_audit_id(conn)
 
-# Initialize on import
-init_audit_db()
+atexit.register(shutdown_audit_writer)
@@ -0,0 +1,169 @@
+"""
+Risk threshold backtesting for FinSpeak
+Replays audit history (archives + hot partitions) through the risk rules under several parameter sets in one pass
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+import audit_logger
+import risk_monitor
+from risk_monitor import VelocityTracker
+
+# Parameters each configuration may override (defaults come from risk_monitor)
+DEFAULT_PARAMS = {
+    "high_amount": risk_monitor.HIGH_AMOUNT_THRESHOLD,
+    "new_beneficiary_limit": risk_monitor.NEW_BENEFICIARY_AMOUNT_LIMIT,
+    "velocity": {label: list(limit) for label, limit in risk_monitor.VELOCITY_LIMITS.items()}
+}
+
+# Compared against the current settings when no --config is given
+DEFAULT_CONFIGS = {
+    "current": {},
+    "strict": {"high_amount": 25000, "new_beneficiary_limit": 10000, "velocity": {"5m": [300, 2]}},
+    "lenient": {"high_amount": 100000, "new_beneficiary_limit": 50000, "velocity": {"5m": [300, 5]}}
+}
+
+
+class _ConfigReplay:
+    """Risk rule state and alert tallies for one parameter set"""
+
+    def __init__(self, name, overrides):
+        self.name = name
+        self.params = {**DEFAULT_PARAMS, **overrides}
+        self.params["velocity"] = {**DEFAULT_PARAMS["velocity"], **overrides.get("velocity", {})}
+        self.velocity = VelocityTracker({label: window for label, (window, _) in self.params["velocity"].items()})
+        self.alerts = {"high_amount": 0, "rapid_transfers": 0, "new_beneficiary": 0}
+        self.flagged_transfers = 0
+        self.flagged_amount = 0
+        self.daily_flagged_amount = {}  # day -> flagged amount
+
+    def replay(self, event, at, known_payees):
+        """Apply the rules to one transfer_initiated event"""
+        self.velocity.record(event["user_id"], at)
+        if event["own_account"]:
+            return  # Own-account transfers count toward velocity but are never flagged
+
+        amount = event["amount"]
+        flagged = False
+        if amount >= self.params["high_amount"]:
+            self.alerts["high_amount"] += 1
+            flagged = True
+        counts = self.velocity.counts(event["user_id"], at)
+        if any(counts[label] >= max_count for label, (_, max_count) in self.params["velocity"].items()):
+            self.alerts["rapid_transfers"] += 1
+            flagged = True
+        if event["payee"] and event["payee"] not in known_payees and amount > self.params["new_beneficiary_limit"]:
+            self.alerts["new_beneficiary"] += 1
+            flagged = True
+
+        if flagged:
+            self.flagged_transfers += 1
+            self.flagged_amount += amount
+            day = event["timestamp"][:10]
+            self.daily_flagged_amount[day] = self.daily_flagged_amount.get(day, 0) + amount
+
+    def report(self):
+        curve, running = [], 0
+        for day in sorted(self.daily_flagged_amount):
+            running += self.daily_flagged_amount[day]
+            curve.append({"day": day, "flagged_amount": self.daily_flagged_amount[day], "cumulative": running})
+        return {
+            "params": self.params,
+            "alerts": self.alerts,
+            "flagged_transfers": self.flagged_transfers,
+            "flagged_amount": self.flagged_amount,
+            "flagged_amount_curve": curve
+        }
+
+
+def run_backtest(configs, start=None, end=None, include_archive=True, progress_every=1_000_000):
+    """Stream audit history once and replay it through every configuration
+
+    Args:
+        configs: {name: parameter overrides} (see DEFAULT_PARAMS)
+        start: Optional ISO start timestamp
+        end: Optional ISO end timestamp
+        include_archive: Also replay archived (cold) days
+
+    Returns: {"events": n, "transfers": n, "seconds": s, "configs": {name: report}}
+    """
+    replays = [_ConfigReplay(name, overrides) for name, overrides in configs.items()]
+    known_payees = {}  # user_id -> payees with a completed transfer (shared by every config)
+    events = transfers = 0
+    started = time.perf_counter()
+
+    for log in audit_logger.iter_audit_logs(start=start, end=end, include_archive=include_archive):
+        events += 1
+        if progress_every and events % progress_every == 0:
+            print(f"   ... {events:,} events ({time.perf_counter() - started:.0f}s)")
+
+        if log["action"] == "transfer_completed" and log["status"] == "success":
+            if log["to_account"]:
+                known_payees.setdefault(log["user_id"], set()).add(log["to_account"])
+            continue
+        if log["action"] != "transfer_initiated":
+            continue
+
+        transfers += 1
+        event = {
+            "user_id": log["user_id"],
+            "timestamp": log["timestamp"],
+            "amount": log["amount"] or 0,
+            "payee": log["to_account"],  # Masked payee id; missing on rows logged before it was recorded
+            "own_account": "(own account)" in (log["details"] or "")
+        }
+        at = datetime.fromisoformat(log["timestamp"]).timestamp()
+        user_payees = known_payees.get(log["user_id"], ())
+        for replay in replays:
+            replay.replay(event, at, user_payees)
+
+    return {
+        "events": events,
+        "transfers": transfers,
+        "seconds": round(time.perf_counter() - started, 2),
+        "configs": {replay.name: replay.report() for replay in replays}
+    }
+
+
+def _print_report(result):
+    print(f"\n📊 Replayed {result['events']:,} audit events ({result['transfers']:,} transfers) in {result['seconds']}s\n")
+    print(f"{'config':<16}{'flagged':>10}{'high amt':>10}{'rapid':>10}{'new ben':>10}{'flagged ₹':>16}")
+    for name, report in result["configs"].items():
+        alerts = report["alerts"]
+        print(f"{name:<16}{report['flagged_transfers']:>10,}{alerts['high_amount']:>10,}"
+              f"{alerts['rapid_transfers']:>10,}{alerts['new_beneficiary']:>10,}{report['flagged_amount']:>16,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest risk thresholds against audit history")
+    parser.add_argument("--config", action="append", default=[], metavar="NAME=JSON",
+                        help='Parameter set, e.g. tight=\'{"high_amount": 30000, "velocity": {"5m": [300, 2]}}\' (repeatable)')
+    parser.add_argument("--start", help="Start timestamp (ISO, e.g. 2025-01-01)")
+    parser.add_argument("--end", help="End timestamp (ISO)")
+    parser.add_argument("--hot-only", action="store_true", help="Skip archived days")
+    parser.add_argument("--db", help="Audit database to read (default: finspeak_audit.db)")
+    parser.add_argument("--archive-dir", help="Archive directory to read (default: audit_archive)")
+    parser.add_argument("--json", help="Write the full report (including flagged-amount curves) to this file")
+    args = parser.parse_args()
+
+    if args.db:
+        audit_logger.AUDIT_DB = args.db
+    audit_logger.AUDIT_DB_READ_ONLY = True  # Replay only; never migrate or archive the target
+    if args.archive_dir:
+        audit_logger.AUDIT_ARCHIVE_DIR = args.archive_dir
+
+    configs = {"current": {}}
+    for spec in args.config:
+        name, _, overrides = spec.partition("=")
+        configs[name] = json.loads(overrides) if overrides else {}
+    if not args.config:
+        configs = DEFAULT_CONFIGS
+
+    result = run_backtest(configs, start=args.start, end=args.end, include_archive=not args.hot_only)
+    _print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✅ Full report written to {args.json}")
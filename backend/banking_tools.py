@@ -2,6 +2,9 @@
 Banking tools for Nidhi - Fund Transfer and Balance Checking
 """
 from strands.tools import tool
+from instrumentation import timed
+from state_store import state_store, StateNamespace
+from config import OTP_TTL_SECONDS, CURSOR_SIGNING_KEY
 from db import (
     get_all_accounts,
     get_account_by_id,
@@ -9,19 +12,54 @@ from db import (
     get_beneficiary_by_id,
     find_beneficiaries_by_name,
     is_same_bank_transfer,
-    get_transactions,
+    get_transactions_page,
+    search_transactions as db_search_transactions,
+    get_account_activity_summary,
     execute_own_account_transfer
 )
+import base64
+import contextvars
+import hashlib
+import hmac
+import json
 import random
+import uuid
+from contextlib import contextmanager
 
-# Storage for pending transfers (used by initiate_transfer)
-pending_transfers = {}
+# Pending transfers (written by initiate_transfer), shared across workers
+pending_transfers = StateNamespace(state_store, "pending_transfers", ttl=OTP_TTL_SECONDS)
 
-# Storage for paginated transaction sessions
-transaction_sessions = {}
+# Transfers initiated during the current request, as (session_id, transfer) pairs.
+# Set per request by collect_initiated_transfers(); tool threads inherit the context
+_initiated_transfers = contextvars.ContextVar("initiated_transfers", default=None)
+
+
+@contextmanager
+def collect_initiated_transfers():
+    """Collect the transfers the agent initiates inside this block (this request only)"""
+    initiated = []
+    token = _initiated_transfers.set(initiated)
+    try:
+        yield initiated
+    finally:
+        _initiated_transfers.reset(token)
+
+
+def _publish_pending_transfer(session_id, transfer):
+    pending_transfers.set(session_id, transfer)
+    initiated = _initiated_transfers.get()
+    if initiated is not None:
+        initiated.append((session_id, transfer))
+
+# Transaction history page size
+HISTORY_PAGE_SIZE = 5
+
+# Max matches returned by search_transactions (totals still cover every match)
+SEARCH_RESULT_LIMIT = 10
 
 
 @tool
+@timed("tool")
 def get_accounts() -> list:
     """Get all user bank accounts with current balances in rupees"""
     accounts = get_all_accounts()  # From database
@@ -38,6 +76,7 @@ def get_accounts() -> list:
 
 
 @tool
+@timed("tool")
 def get_destination_accounts(exclude_account_id: str) -> list:
     """Get user's accounts excluding the source account (for own-account transfers)
     
@@ -58,6 +97,7 @@ def get_destination_accounts(exclude_account_id: str) -> list:
 
 
 @tool
+@timed("tool")
 def check_balance(account_type: str = None) -> dict:
     """Check account balance(s). If account_type is provided (e.g., 'savings', 'current'), return that specific account. Otherwise return all accounts with total.
     
@@ -101,6 +141,7 @@ def check_balance(account_type: str = None) -> dict:
 
 
 @tool
+@timed("tool")
 def get_beneficiaries() -> list:
     """Get all saved beneficiaries"""
     beneficiaries = get_all_beneficiaries()  # From database
@@ -115,6 +156,27 @@ def get_beneficiaries() -> list:
 
 
 @tool
+@timed("tool")
+def find_beneficiary(name: str) -> list:
+    """Find saved beneficiaries by name, best match first. Tolerates partial, misspelled or misheard names (e.g., 'Prathap' finds 'Pratap Kumar').
+    
+    Args:
+        name: Beneficiary name as spoken or typed by the user
+    """
+    matches = find_beneficiaries_by_name(name)  # From in-memory name index
+    return [
+        {
+            "id": ben["id"],
+            "name": ben["name"],
+            "bank": ben["bank"],
+            "match_score": ben["match_score"]
+        }
+        for ben in matches
+    ]
+
+
+@tool
+@timed("tool")
 def get_transfer_modes() -> list:
     """Get available transfer modes for inter-bank transfers"""
     return [
@@ -125,6 +187,7 @@ def get_transfer_modes() -> list:
 
 
 @tool
+@timed("tool")
 def initiate_transfer(from_account_id: str, to_beneficiary_id: str, amount: float, mode: str = "imps") -> dict:
     """Initiate fund transfer after collecting all required information
     
@@ -162,17 +225,17 @@ def initiate_transfer(from_account_id: str, to_beneficiary_id: str, amount: floa
     
     # Generate OTP and session
     otp = str(random.randint(100000, 999999))
-    session_id = f"txn_{random.randint(10000, 99999)}"
+    session_id = f"txn_{uuid.uuid4().hex[:12]}"
     
     # Store pending transfer with IDs for database execution
-    pending_transfers[session_id] = {
+    _publish_pending_transfer(session_id, {
         "otp": otp,
         "from_account_id": from_account_id,
         "to_beneficiary_id": to_beneficiary_id,
         "from_account": account["name"],
         "to_beneficiary": beneficiary["name"],
         "amount": amount
-    }
+    })
     
     return {
         "status": "otp_required",
@@ -183,6 +246,7 @@ def initiate_transfer(from_account_id: str, to_beneficiary_id: str, amount: floa
 
 
 @tool
+@timed("tool")
 def initiate_own_account_transfer(from_account_id: str, to_account_id: str, amount: float) -> dict:
     """Initiate transfer between user's own accounts (instant, no mode selection needed)
     
@@ -210,10 +274,10 @@ def initiate_own_account_transfer(from_account_id: str, to_account_id: str, amou
     
     # Generate OTP and session
     otp = str(random.randint(100000, 999999))
-    session_id = f"txn_{random.randint(10000, 99999)}"
+    session_id = f"txn_{uuid.uuid4().hex[:12]}"
     
     # Store pending transfer with IDs for database execution
-    pending_transfers[session_id] = {
+    _publish_pending_transfer(session_id, {
         "otp": otp,
         "transfer_type": "own_account",
         "from_account_id": from_account_id,
@@ -221,7 +285,7 @@ def initiate_own_account_transfer(from_account_id: str, to_account_id: str, amou
         "from_account": from_account["name"],
         "to_account": to_account["name"],
         "amount": amount
-    }
+    })
     
     return {
         "status": "otp_required",
@@ -236,44 +300,136 @@ FUND_TRANSFER_TOOLS = [
     get_accounts,
     get_destination_accounts,
     get_beneficiaries,
+    find_beneficiary,
     get_transfer_modes,
     initiate_transfer,
     initiate_own_account_transfer
 ]
 
-@tool
-def get_transaction_history(account_id: str = None, account_type: str = None, date_range: str = None, start_date: str = None, end_date: str = None, page: int = 1) -> dict:
-    """Get transaction history for an account with optional date filtering and pagination.
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _cursor_signature(payload: str) -> str:
+    digest = hmac.new(CURSOR_SIGNING_KEY.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()
+    return _b64encode(digest[:16])
+
+
+def _encode_cursor(state: dict) -> str:
+    """Encode pagination state as an opaque, HMAC-signed cursor token"""
+    payload = _b64encode(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_cursor_signature(payload)}"
+
+
+def _is_keyset(key) -> bool:
+    """A (created_at, id) keyset position as produced by _transaction_history_page"""
+    return (isinstance(key, list) and len(key) == 2 and isinstance(key[0], str)
+            and isinstance(key[1], int) and not isinstance(key[1], bool))
+
+
+def _decode_cursor(cursor: str) -> dict:
+    """Decode a cursor token, returns None if it is malformed, tampered with or of the wrong shape"""
+    if not isinstance(cursor, str) or cursor.count(".") != 1:
+        return None
+    payload, signature = cursor.split(".")
+    if not hmac.compare_digest(signature, _cursor_signature(payload)):
+        return None
+    try:
+        state = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(state, dict) or not {"a", "p", "k", "d"} <= state.keys():
+        return None
+    page = state["p"]
+    if (not isinstance(state["a"], str) or state["d"] not in ("next", "prev")
+            or not isinstance(page, int) or isinstance(page, bool) or page < 1
+            or not _is_keyset(state["k"])
+            or not all(state.get(field) is None or isinstance(state[field], str) for field in ("s", "e"))):
+        return None
+    return state
+
+
+def _transaction_history_page(account: dict, start_date: str = None, end_date: str = None,
+                              page: int = 1, after: tuple = None, before: tuple = None) -> dict:
+    """Fetch and format one keyset page of transaction history"""
+    result = get_transactions_page(
+        account["id"],
+        page_size=HISTORY_PAGE_SIZE,
+        start_date=start_date,
+        end_date=end_date,
+        after=after,
+        before=before
+    )
+    page_transactions = result["transactions"]
+    account_info = {
+        "display_name": f"{account['name']} ({account['account_number']})",
+        "speech_name": f"{account['type'].title()} Account ending with {account['account_number'][-4:]}"
+    }
     
-    Args:
-        account_id: Specific account ID (e.g., 'acc_savings_primary')
-        account_type: Account type or account number to filter (e.g., 'savings', '7890')
-        date_range: Relative date range (e.g., 'last 2 weeks', 'last month', 'last 3 months')
-        start_date: Start date in YYYY-MM-DD format
-        end_date: End date in YYYY-MM-DD format
-        page: Page number (default: 1, shows 5 transactions per page)
+    if not page_transactions:
+        date_info = f" for the specified period" if start_date or end_date else ""
+        return {
+            "account": account_info,
+            "transactions": [],
+            "message": f"No transactions found{date_info}."
+        }
     
-    Note: Maximum date range is 3 months. Results are paginated with 5 transactions per page.
-    """
-    from datetime import datetime, timedelta
+    # Moving backwards always leaves a newer page behind us, and vice versa
+    has_next = result["has_more"] if not before else True
+    has_previous = page > 1 if not before else result["has_more"]
     
-    accounts = get_all_accounts()
+    first, last = page_transactions[0], page_transactions[-1]
+    cursor_base = {"a": account["id"], "s": start_date, "e": end_date}
+    start_idx = (page - 1) * HISTORY_PAGE_SIZE
     
-    # Find the target account
-    target_account = None
+    return {
+        "account": account_info,
+        "transactions": [
+            {
+                "date": txn["date"],
+                "type": txn["type"],
+                "description": txn["description"],
+                "amount": txn["amount"],
+                "balance": txn["balance"]
+            }
+            for txn in page_transactions
+        ],
+        "pagination": {
+            "current_page": page,
+            "has_next_page": has_next,
+            "has_previous_page": has_previous,
+            "next_cursor": _encode_cursor({**cursor_base, "p": page + 1, "k": [last["created_at"], last["id"]], "d": "next"}) if has_next else None,
+            "previous_cursor": _encode_cursor({**cursor_base, "p": page - 1, "k": [first["created_at"], first["id"]], "d": "prev"}) if has_previous else None,
+            "showing": f"{start_idx + 1}-{start_idx + len(page_transactions)}"
+        },
+        "date_range": {"start": start_date, "end": end_date} if start_date or end_date else None
+    }
+
+
+def _find_account(account_id: str = None, account_type: str = None) -> dict:
+    """Find an account by ID, or by type / name / account number fragment"""
     if account_id:
-        target_account = get_account_by_id(account_id)
-    elif account_type:
+        return get_account_by_id(account_id)
+    if account_type:
         account_type_lower = account_type.lower()
-        for acc in accounts:
+        for acc in get_all_accounts():
             if (account_type_lower in acc["type"].lower() or 
                 account_type_lower in acc["name"].lower() or 
                 account_type_lower in acc["account_number"]):
-                target_account = acc
-                break
+                return acc
+    return None
+
+
+def _resolve_date_range(date_range: str = None, start_date: str = None, end_date: str = None) -> tuple:
+    """Turn a relative date range or explicit dates into (start_date, end_date, error)
     
-    if not target_account:
-        return {"error": "Account not found. Please specify which account."}
+    Enforces the 3-month history window.
+    """
+    from datetime import datetime, timedelta
     
     # Parse date range
     if date_range:
@@ -292,14 +448,14 @@ def get_transaction_history(account_id: str = None, account_type: str = None, da
             match = re.search(r'(\d+)\s*months?', date_range_lower)
             months = int(match.group(1)) if match else 1
             if months > 3:
-                return {"error": "Maximum date range is 3 months."}
+                return None, None, "Maximum date range is 3 months."
             start_date = (today - relativedelta(months=months)).strftime('%Y-%m-%d')
         elif 'day' in date_range_lower:
             match = re.search(r'(\d+)\s*days?', date_range_lower)
             days = int(match.group(1)) if match else 7
             start_date = (today - timedelta(days=days)).strftime('%Y-%m-%d')
         else:
-            return {"error": "Please specify a valid date range (e.g., 'last 2 weeks', 'last month', 'last 5 days')."}
+            return None, None, "Please specify a valid date range (e.g., 'last 2 weeks', 'last month', 'last 5 days')."
         
         end_date = today.strftime('%Y-%m-%d')
     
@@ -308,74 +464,38 @@ def get_transaction_history(account_id: str = None, account_type: str = None, da
         start = datetime.strptime(start_date, '%Y-%m-%d')
         end = datetime.strptime(end_date, '%Y-%m-%d')
         if (end - start).days > 90:
-            return {"error": "Maximum date range is 3 months (90 days)."}
+            return None, None, "Maximum date range is 3 months (90 days)."
     
-    # Get transactions from database
-    all_transactions = get_transactions(target_account["id"], limit=100, start_date=start_date, end_date=end_date)
+    return start_date, end_date, None
+
+
+@tool
+@timed("tool")
+def get_transaction_history(account_id: str = None, account_type: str = None, date_range: str = None, start_date: str = None, end_date: str = None) -> dict:
+    """Get transaction history for an account with optional date filtering. Returns the first page; use next_page/previous_page with the pagination cursors to navigate.
     
-    if not all_transactions:
-        date_info = f" for the specified period" if start_date or end_date else ""
-        return {
-            "account": {
-                "display_name": f"{target_account['name']} ({target_account['account_number']})",
-                "speech_name": f"{target_account['type'].title()} Account ending with {target_account['account_number'][-4:]}"
-            },
-            "transactions": [],
-            "message": f"No transactions found{date_info}."
-        }
+    Args:
+        account_id: Specific account ID (e.g., 'acc_savings_primary')
+        account_type: Account type or account number to filter (e.g., 'savings', '7890')
+        date_range: Relative date range (e.g., 'last 2 weeks', 'last month', 'last 3 months')
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
     
-    # Pagination: 5 transactions per page
-    page_size = 5
-    total_transactions = len(all_transactions)
-    total_pages = (total_transactions + page_size - 1) // page_size
-    page = max(1, min(page, total_pages))  # Clamp page number
-    
-    start_idx = (page - 1) * page_size
-    end_idx = min(start_idx + page_size, total_transactions)
-    paginated_transactions = all_transactions[start_idx:end_idx]
-    
-    # Store session for pagination
-    import uuid
-    session_id = str(uuid.uuid4())
-    transaction_sessions[session_id] = {
-        "account_id": target_account["id"],
-        "account_type": account_type,
-        "date_range": date_range,
-        "start_date": start_date,
-        "end_date": end_date,
-        "total_transactions": total_transactions,
-        "total_pages": total_pages,
-        "current_page": page
-    }
+    Note: Maximum date range is 3 months. Results are paginated with 5 transactions per page.
+    """
+    target_account = _find_account(account_id, account_type)
+    if not target_account:
+        return {"error": "Account not found. Please specify which account."}
     
-    # Format transactions for display
-    return {
-        "account": {
-            "display_name": f"{target_account['name']} ({target_account['account_number']})",
-            "speech_name": f"{target_account['type'].title()} Account ending with {target_account['account_number'][-4:]}"
-        },
-        "transactions": [
-            {
-                "date": txn["date"],
-                "type": txn["type"],
-                "description": txn["description"],
-                "amount": txn["amount"],
-                "balance": txn["balance"]
-            }
-            for txn in paginated_transactions
-        ],
-        "pagination": {
-            "session_id": session_id,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_transactions": total_transactions,
-            "showing": f"{start_idx + 1}-{end_idx} of {total_transactions}"
-        },
-        "date_range": {"start": start_date, "end": end_date} if start_date or end_date else None
-    }
+    start_date, end_date, error = _resolve_date_range(date_range, start_date, end_date)
+    if error:
+        return {"error": error}
+    
+    return _transaction_history_page(target_account, start_date, end_date)
 
 
 @tool
+@timed("tool")
 def get_loan_details() -> dict:
     """Get user's active loans with EMI, outstanding amount, and interest rates"""
     return {
@@ -400,6 +520,7 @@ def get_loan_details() -> dict:
     }
 
 @tool
+@timed("tool")
 def get_credit_card_details() -> dict:
     """Get credit card details including limit, balance, and payment due"""
     return {
@@ -422,6 +543,7 @@ BALANCE_TOOLS = [
 ]
 
 @tool
+@timed("tool")
 def get_upcoming_payments() -> dict:
     """Get upcoming bill payments, EMIs, and due dates"""
     from datetime import datetime, timedelta
@@ -464,55 +586,166 @@ LOAN_CREDIT_TOOLS = [
 ]
 
 @tool
-def next_page(session_id: str = None) -> dict:
-    """Navigate to the next page of transaction history.
+@timed("tool")
+def search_transactions(query: str, account_type: str = None, date_range: str = None, start_date: str = None, end_date: str = None) -> dict:
+    """Search transactions by description (merchant, payee or keyword) across the user's accounts. Returns the best matches plus totals for ALL matches in one call - use this for questions like "show my Swiggy orders" or "how much did I pay Uber last month".
     
     Args:
-        session_id: Transaction session ID from previous get_transaction_history call
-    """
-    if not session_id or session_id not in transaction_sessions:
-        return {"error": "No active transaction history session. Please request transaction history first."}
+        query: Words to search for in transaction descriptions (e.g., 'swiggy', 'uber ride', 'salary')
+        account_type: Optional account type or account number to restrict the search (e.g., 'savings', '7890')
+        date_range: Optional relative date range (e.g., 'last 2 weeks', 'last month', 'last 3 months')
+        start_date: Optional start date in YYYY-MM-DD format
+        end_date: Optional end date in YYYY-MM-DD format
     
-    session = transaction_sessions[session_id]
-    if session["current_page"] >= session["total_pages"]:
-        return {"error": f"Already on the last page ({session['total_pages']})."}
-    
-    # Call get_transaction_history with next page
-    return get_transaction_history(
-        account_id=session["account_id"],
-        date_range=session["date_range"],
-        start_date=session["start_date"],
-        end_date=session["end_date"],
-        page=session["current_page"] + 1
+    Note: Maximum date range is 3 months.
+    """
+    account = None
+    if account_type:
+        account = _find_account(account_type=account_type)
+        if not account:
+            return {"error": "Account not found. Please specify which account."}
+    
+    start_date, end_date, error = _resolve_date_range(date_range, start_date, end_date)
+    if error:
+        return {"error": error}
+    
+    result = db_search_transactions(
+        query,
+        account_id=account["id"] if account else None,
+        start_date=start_date,
+        end_date=end_date,
+        limit=SEARCH_RESULT_LIMIT
     )
+    if "error" in result:
+        return {"error": result["error"]}
+    
+    response = {
+        "query": query,
+        "matches": [
+            {
+                "date": txn["date"],
+                "type": txn["type"],
+                "description": txn["description"],
+                "amount": txn["amount"],
+                "account_speech_name": f"{txn['account_type'].title()} Account ending with {txn['account_number'][-4:]}"
+            }
+            for txn in result["matches"]
+        ],
+        "total_matches": result["total_matches"],
+        "total_spent": result["total_debits"],
+        "total_received": result["total_credits"],
+        "date_range": {"start": start_date, "end": end_date} if start_date or end_date else None
+    }
+    if result["total_matches"] > len(result["matches"]):
+        response["note"] = f"Showing top {len(result['matches'])} of {result['total_matches']} matches; totals cover all matches."
+    if not result["matches"]:
+        response["message"] = f"No transactions found matching '{query}'."
+    return response
 
 @tool
-def previous_page(session_id: str = None) -> dict:
-    """Navigate to the previous page of transaction history.
+@timed("tool")
+def get_spending_summary(account_type: str = None, date_range: str = None, start_date: str = None, end_date: str = None) -> dict:
+    """Get total money spent and received, with a month-by-month breakdown, for one account or all accounts. Use this for questions like "how much did I spend last month" or "what came into my savings account this quarter".
     
     Args:
-        session_id: Transaction session ID from previous get_transaction_history call
+        account_type: Optional account type or account number (e.g., 'savings', '7890'). Omit to cover all accounts.
+        date_range: Optional relative date range (e.g., 'last 2 weeks', 'last month', 'last 3 months')
+        start_date: Optional start date in YYYY-MM-DD format
+        end_date: Optional end date in YYYY-MM-DD format
+    
+    Note: Maximum date range is 3 months.
     """
-    if not session_id or session_id not in transaction_sessions:
+    if account_type:
+        account = _find_account(account_type=account_type)
+        if not account:
+            return {"error": "Account not found. Please specify which account."}
+        accounts = [account]
+    else:
+        accounts = get_all_accounts()
+    
+    start_date, end_date, error = _resolve_date_range(date_range, start_date, end_date)
+    if error:
+        return {"error": error}
+    
+    summary = get_account_activity_summary([acc["id"] for acc in accounts], start_date, end_date)  # From daily rollups
+    
+    return {
+        "total_spent": summary["total_debits"],
+        "total_received": summary["total_credits"],
+        "net": summary["total_credits"] - summary["total_debits"],
+        "transaction_count": summary["txn_count"],
+        "by_month": [
+            {
+                "month": month["month"],
+                "spent": month["debits"],
+                "received": month["credits"],
+                "transaction_count": month["txn_count"]
+            }
+            for month in summary["by_month"]
+        ],
+        "accounts": [
+            {
+                "account_speech_name": f"{acc['type'].title()} Account ending with {acc['account_number'][-4:]}",
+                "spent": summary["by_account"][acc["id"]]["debits"],
+                "received": summary["by_account"][acc["id"]]["credits"],
+                "current_balance": acc["balance"]
+            }
+            for acc in accounts
+        ],
+        "date_range": {"start": start_date, "end": end_date} if start_date or end_date else None
+    }
+
+def _navigate_history(cursor: str, direction: str) -> dict:
+    """Load the page a pagination cursor points at"""
+    state = _decode_cursor(cursor) if cursor else None
+    if not state or state["d"] != direction:
         return {"error": "No active transaction history session. Please request transaction history first."}
     
-    session = transaction_sessions[session_id]
-    if session["current_page"] <= 1:
-        return {"error": "Already on the first page."}
+    # Only the caller's own accounts resolve, so a cursor can't open someone else's history
+    account = get_account_by_id(state["a"])
+    if not account:
+        return {"error": "Account not found. Please specify which account."}
     
-    # Call get_transaction_history with previous page
-    return get_transaction_history(
-        account_id=session["account_id"],
-        date_range=session["date_range"],
-        start_date=session["start_date"],
-        end_date=session["end_date"],
-        page=session["current_page"] - 1
+    key = tuple(state["k"])
+    return _transaction_history_page(
+        account,
+        start_date=state.get("s"),
+        end_date=state.get("e"),
+        page=state["p"],
+        after=key if direction == "next" else None,
+        before=key if direction == "prev" else None
     )
 
+@tool
+@timed("tool")
+def next_page(cursor: str = None) -> dict:
+    """Navigate to the next (older) page of transaction history.
+    
+    Args:
+        cursor: The pagination.next_cursor value from the previous transaction history result
+    """
+    if not cursor:
+        return {"error": "Already on the last page."}
+    return _navigate_history(cursor, "next")
+
+@tool
+@timed("tool")
+def previous_page(cursor: str = None) -> dict:
+    """Navigate to the previous (newer) page of transaction history.
+    
+    Args:
+        cursor: The pagination.previous_cursor value from the previous transaction history result
+    """
+    if not cursor:
+        return {"error": "Already on the first page."}
+    return _navigate_history(cursor, "prev")
+
 TRANSACTION_TOOLS = [
     get_transaction_history,
     next_page,
-    previous_page
+    previous_page,
+    search_transactions,
+    get_spending_summary
 ]
 
 ALL_BANKING_TOOLS = FUND_TRANSFER_TOOLS + BALANCE_TOOLS + TRANSACTION_TOOLS + LOAN_CREDIT_TOOLS
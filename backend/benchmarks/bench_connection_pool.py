@@ -0,0 +1,89 @@
+"""
+Connection pool benchmark for FinSpeak
+Compares a connect-per-call account lookup with the pooled db.get_account_by_id path
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+def connect_per_call(account_id, user_id="demo_user"):
+    """The pre-pool lookup: open, query, close"""
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute("SELECT * FROM accounts WHERE id = ? AND user_id = ?", (account_id, user_id)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def pooled_uncached(account_id, user_id="demo_user"):
+    """Pooled connection, record cache bypassed"""
+    with db.get_db() as conn:
+        row = conn.execute("SELECT * FROM accounts WHERE id = ? AND user_id = ?", (account_id, user_id)).fetchone()
+        return dict(row) if row else None
+
+
+def calls_per_second(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func("acc_current")
+    return calls / (time.perf_counter() - start)
+
+
+def readers_next_to_writer(readers, reads, writes):
+    """Run reader threads beside one writer; returns (seconds, errors)"""
+    errors = []
+
+    def read():
+        try:
+            for _ in range(reads):
+                pooled_uncached("acc_current")
+        except Exception as e:
+            errors.append(e)
+
+    def write():
+        try:
+            for _ in range(writes):
+                db.add_transaction("acc_current", "debit", "Benchmark", 1, 0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(readers)] + [threading.Thread(target=write)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call SQLite connections")
+    parser.add_argument("--db", default=db.DB_PATH, help="Seeded database (python init_db.py); the writer test adds rows")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+    db.DB_PATH = args.db
+
+    per_call = calls_per_second(connect_per_call, args.calls)
+    pooled = calls_per_second(pooled_uncached, args.calls)
+    cached = calls_per_second(db.get_account_by_id, args.calls)
+    print(f"connect per call:   {per_call:>10,.0f} calls/s")
+    print(f"pooled (uncached):  {pooled:>10,.0f} calls/s  ({pooled / per_call:.1f}x)")
+    print(f"pooled + cache:     {cached:>10,.0f} calls/s  ({cached / per_call:.1f}x)")
+
+    seconds, errors = readers_next_to_writer(args.readers, 2000, 300)
+    print(f"{args.readers} readers + 1 writer: {seconds:.2f}s, {len(errors)} errors")
+
+
+if __name__ == "__main__":
+    main()
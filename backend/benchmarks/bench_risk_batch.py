@@ -0,0 +1,80 @@
+"""
+Batch risk scoring benchmark for FinSpeak
+Times risk_batch.score_batch on synthetic transfers against the per-transfer VelocityTracker loop
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import risk_batch
+from risk_monitor import HIGH_AMOUNT_THRESHOLD, NEW_BENEFICIARY_AMOUNT_LIMIT, VELOCITY_LIMITS, VelocityTracker
+
+
+def synthetic_transfers(count, users, beneficiaries, seed=0):
+    """Random transfers over one day; one in six is an own-account transfer"""
+    rng = np.random.default_rng(seed)
+    user_ids = [f"user_{n}" for n in rng.integers(0, users, count)]
+    beneficiary_ids = [None if n == 0 else f"ben_{n}" for n in rng.integers(0, beneficiaries + 1, count)]
+    amounts = rng.integers(100, 100000, count)
+    timestamps = 1_700_000_000 + rng.random(count) * 86400
+    return user_ids, amounts, beneficiary_ids, timestamps
+
+
+def score_in_loop(user_ids, amounts, beneficiary_ids, timestamps):
+    """The same rules one transfer at a time, with the live VelocityTracker (no DB lookups)"""
+    tracker = VelocityTracker({label: window for label, (window, _) in VELOCITY_LIMITS.items()})
+    paid = set()
+    levels = []
+    for i in np.argsort(timestamps, kind="stable"):
+        tracker.record(user_ids[i], timestamps[i])
+        counts = tracker.counts(user_ids[i], timestamps[i])
+        if not beneficiary_ids[i]:
+            levels.append("LOW")
+            continue
+        level = "HIGH" if amounts[i] >= HIGH_AMOUNT_THRESHOLD else "LOW"
+        pair = (user_ids[i], beneficiary_ids[i])
+        if level == "LOW" and (any(counts[label] >= limit for label, (_, limit) in VELOCITY_LIMITS.items())
+                               or (pair not in paid and amounts[i] > NEW_BENEFICIARY_AMOUNT_LIMIT)):
+            level = "MEDIUM"
+        paid.add(pair)
+        levels.append(level)
+    return levels
+
+
+def rate(func, *args, repeat=3):
+    """Best-of transfers per second"""
+    best = min(timed(func, *args) for _ in range(repeat))
+    return len(args[1]) / best
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized vs per-transfer risk scoring")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated batch sizes")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--beneficiaries", type=int, default=50)
+    parser.add_argument("--skip-loop", action="store_true", help="Only time score_batch")
+    args = parser.parse_args()
+
+    for size in [int(size) for size in args.sizes.split(",")]:
+        transfers = synthetic_transfers(size, args.users, args.beneficiaries)
+        batch = rate(lambda *columns: risk_batch.score_batch(*columns, known_pairs=[]), *transfers)
+        line = f"{size:>9,} transfers: score_batch {batch:>12,.0f} tx/s"
+        if not args.skip_loop and size <= 100000:
+            loop = rate(score_in_loop, *transfers, repeat=1)
+            line += f"   per-transfer loop {loop:>10,.0f} tx/s  ({batch / loop:.0f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Event loop responsiveness load test for FinSpeak
+Keeps clients busy on a DB-heavy endpoint while probing /health, and reports probe latency
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.request
+
+
+def fetch(url, timeout=30):
+    with urllib.request.urlopen(urllib.request.Request(url, method="GET"), timeout=timeout) as response:
+        response.read()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def probe(base_url, seconds):
+    """Latency of /health every 20 ms for the given time, in ms"""
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        fetch(f"{base_url}/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.02)
+    return latencies
+
+
+def report(label, latencies):
+    print(f"{label:>6}: p50 {statistics.median(latencies):6.1f} ms  p99 {percentile(latencies, 99):6.1f} ms  ({len(latencies)} probes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe /health latency while clients load a DB-heavy endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Running FinSpeak server")
+    parser.add_argument("--path", default="/api/audit-logs?limit=2000", help="Endpoint the load clients loop on")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    report("idle", probe(args.url, min(args.seconds, 3)))
+
+    stop = threading.Event()
+    completed = [0]
+
+    def client():
+        while not stop.is_set():
+            fetch(f"{args.url}{args.path}")
+            completed[0] += 1
+
+    clients = [threading.Thread(target=client, daemon=True) for _ in range(args.clients)]
+    for thread in clients:
+        thread.start()
+    try:
+        report("loaded", probe(args.url, args.seconds))
+    finally:
+        stop.set()
+        for thread in clients:
+            thread.join()
+    print(f"{completed[0]} {args.path} requests completed by {args.clients} clients")
+
+
+if __name__ == "__main__":
+    main()
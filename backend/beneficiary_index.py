@@ -0,0 +1,201 @@
+"""
+In-memory fuzzy name index for beneficiaries
+Trigram + phonetic matching so voice input like "Prathap" still finds "Pratap"
+"""
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Minimum score for a beneficiary to be returned as a candidate
+MIN_MATCH_SCORE = 0.35
+
+# Only score candidates whose trigram or phonetic overlap is at least this fraction of the best one
+CANDIDATE_CUTOFF = 0.6
+
+# Spelling variants common in transliterated Indian names (applied in order)
+_PHONETIC_REPLACEMENTS = [
+    ("ph", "f"), ("bh", "b"), ("dh", "d"), ("th", "t"), ("kh", "k"), ("gh", "g"),
+    ("sh", "s"), ("ch", "c"), ("ck", "k"), ("q", "k"), ("w", "v"), ("z", "j"),
+    ("x", "ks"), ("y", "i")
+]
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase and keep only letters and single spaces"""
+    return " ".join(re.findall(r"[a-z]+", name.lower()))
+
+
+def phonetic_key(word: str) -> str:
+    """Consonant skeleton of a word after folding common spelling variants
+
+    "Pratap", "Prathap" and "Prataap" all map to "prtp".
+    """
+    for source, target in _PHONETIC_REPLACEMENTS:
+        word = word.replace(source, target)
+    if not word:
+        return ""
+    first = "a" if word[0] in "aeiou" else word[0]
+    skeleton = first + re.sub(r"[aeiouh]", "", word[1:])
+    return re.sub(r"(.)\1+", r"\1", skeleton)
+
+
+def trigrams(normalized: str) -> set:
+    """Trigrams of each word, padded so word starts and ends carry weight"""
+    grams = set()
+    for word in normalized.split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _UserNameIndex:
+    """Postings for one user's beneficiaries"""
+
+    def __init__(self):
+        self.names = {}  # beneficiary_id -> raw name
+        self.normalized = {}  # beneficiary_id -> normalized name
+        self.trigram_counts = {}  # beneficiary_id -> number of trigrams
+        self.phonetic_keys = {}  # beneficiary_id -> set of phonetic keys
+        self.trigram_postings = {}  # trigram -> set of beneficiary_ids
+        self.phonetic_postings = {}  # phonetic key -> set of beneficiary_ids
+        self.source = None  # Row snapshot this index was last synced with
+        self.high_rowid = 0  # Highest beneficiaries rowid indexed so far
+
+    def add(self, beneficiary_id: str, name: str):
+        if beneficiary_id in self.names:
+            self.remove(beneficiary_id)
+        normalized = normalize_name(name)
+        grams = trigrams(normalized)
+        keys = {phonetic_key(word) for word in normalized.split()}
+        self.names[beneficiary_id] = name
+        self.normalized[beneficiary_id] = normalized
+        self.trigram_counts[beneficiary_id] = len(grams)
+        self.phonetic_keys[beneficiary_id] = keys
+        for gram in grams:
+            self.trigram_postings.setdefault(gram, set()).add(beneficiary_id)
+        for key in keys:
+            self.phonetic_postings.setdefault(key, set()).add(beneficiary_id)
+
+    def remove(self, beneficiary_id: str):
+        normalized = self.normalized.pop(beneficiary_id, None)
+        if normalized is None:
+            return
+        for gram in trigrams(normalized):
+            postings = self.trigram_postings.get(gram)
+            if postings:
+                postings.discard(beneficiary_id)
+                if not postings:
+                    del self.trigram_postings[gram]
+        for key in self.phonetic_keys.pop(beneficiary_id):
+            postings = self.phonetic_postings.get(key)
+            if postings:
+                postings.discard(beneficiary_id)
+                if not postings:
+                    del self.phonetic_postings[key]
+        del self.names[beneficiary_id]
+        del self.trigram_counts[beneficiary_id]
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        normalized_query = normalize_name(query)
+        if not normalized_query:
+            return []
+        query_grams = trigrams(normalized_query)
+        query_keys = [phonetic_key(word) for word in normalized_query.split()]
+
+        # Candidate generation: shared trigrams (counted in C by Counter) + phonetic hits
+        shared = Counter()
+        for gram in query_grams:
+            postings = self.trigram_postings.get(gram)
+            if postings:
+                shared.update(postings)
+        phonetic_hits = Counter()
+        for key in query_keys:
+            postings = self.phonetic_postings.get(key)
+            if postings:
+                phonetic_hits.update(postings)
+
+        if not shared and not phonetic_hits:
+            return []
+        
+        # Prune to candidates close to the best trigram or phonetic overlap before scoring in Python
+        candidates = set()
+        if shared:
+            min_shared = max(shared.values()) * CANDIDATE_CUTOFF
+            candidates.update(beneficiary_id for beneficiary_id, count in shared.items() if count >= min_shared)
+        if phonetic_hits:
+            min_hits = max(phonetic_hits.values()) * CANDIDATE_CUTOFF
+            candidates.update(beneficiary_id for beneficiary_id, hits in phonetic_hits.items() if hits >= min_hits)
+        
+        query_gram_count = len(query_grams)
+        query_key_count = len(query_keys)
+        scored = []
+        for beneficiary_id in candidates:
+            # Dice coefficient over trigrams, phonetic word overlap, exact substring bonus
+            score = 1.2 * shared[beneficiary_id] / (query_gram_count + self.trigram_counts[beneficiary_id])
+            score += 0.4 * phonetic_hits[beneficiary_id] / query_key_count
+            if normalized_query in self.normalized[beneficiary_id]:
+                score += 0.5
+            if score >= MIN_MATCH_SCORE:
+                scored.append((beneficiary_id, score))
+
+        scored.sort(key=lambda item: (-item[1], self.names[item[0]]))
+        return [(beneficiary_id, round(score, 4)) for beneficiary_id, score in scored[:limit]]
+
+
+class BeneficiaryNameIndex:
+    """Per-user trigram and phonetic index over beneficiary names"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}  # user_id -> _UserNameIndex
+
+    def build(self, rows: List[Dict]):
+        """(Re)build the index from beneficiary rows with row_id, id, user_id and name"""
+        users = {}
+        for row in rows:
+            user_index = users.setdefault(row["user_id"], _UserNameIndex())
+            user_index.add(row["id"], row["name"])
+            user_index.high_rowid = max(user_index.high_rowid, row["row_id"])
+        with self._lock:
+            self._users = users
+
+    def sync_state(self, user_id: str, rows_by_id: Dict[str, Dict]):
+        """None if the user's index already matches this row snapshot, else the rowid to fetch new rows after"""
+        with self._lock:
+            user_index = self._users.get(user_id)
+            if user_index is None:
+                return 0
+            return None if user_index.source is rows_by_id else user_index.high_rowid
+
+    def apply(self, user_id: str, new_rows: List[Dict], rows_by_id: Dict[str, Dict]):
+        """Index rows inserted since the last sync (row_id, id, name) and mark rows_by_id as synced
+
+        Inserts are found by rowid, so a sync costs O(new rows). Deleted rows
+        show up as a size mismatch with the snapshot and fall back to a full diff.
+        """
+        with self._lock:
+            user_index = self._users.setdefault(user_id, _UserNameIndex())
+            for row in new_rows:
+                user_index.add(row["id"], row["name"])
+                user_index.high_rowid = max(user_index.high_rowid, row["row_id"])
+            if len(user_index.names) != len(rows_by_id):
+                # new_rows were read after the snapshot, so keep them even if it lacks them
+                fresh = {row["id"] for row in new_rows}
+                for beneficiary_id in [bid for bid in user_index.names if bid not in rows_by_id and bid not in fresh]:
+                    user_index.remove(beneficiary_id)
+                for beneficiary_id, row in rows_by_id.items():
+                    if user_index.names.get(beneficiary_id) != row["name"]:
+                        user_index.add(beneficiary_id, row["name"])
+            user_index.source = rows_by_id
+
+    def search(self, user_id: str, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Ranked (beneficiary_id, score) candidates for a spoken or typed name"""
+        with self._lock:
+            user_index = self._users.get(user_id)
+            if not user_index:
+                return []
+            return user_index.search(query, limit)
+
+
+beneficiary_index = BeneficiaryNameIndex()
@@ -1,4 +1,5 @@
 import os
+import secrets
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,6 +10,15 @@ S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
 
 # Security Configuration
 MASTER_OTP = "123456"  # Hackathon hack - always works
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", "300"))  # Pending transfers and OTPs expire after this
+# Transfer velocity limits: max transfers a user may initiate per window before a risk alert
+VELOCITY_MAX_5M = int(os.getenv("VELOCITY_MAX_5M", "3"))
+VELOCITY_MAX_1H = int(os.getenv("VELOCITY_MAX_1H", "10"))
+VELOCITY_MAX_24H = int(os.getenv("VELOCITY_MAX_24H", "25"))
+# Seconds between exchanges of velocity events with other workers (how stale their counts can be)
+VELOCITY_SYNC_SECONDS = float(os.getenv("VELOCITY_SYNC_SECONDS", "1"))
+# Signs transaction history cursors; set the same value on every worker (random per process otherwise)
+CURSOR_SIGNING_KEY = os.getenv("CURSOR_SIGNING_KEY") or secrets.token_hex(32)
 OTP_REQUIRED_FUNCTIONS = [
     "transfer_money",
     "update_beneficiary",
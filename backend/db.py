@@ -2,26 +2,341 @@
 Database layer for FinSpeak
 Handles all data persistence using SQLite
 """
+import functools
+import inspect
+import math
+import random
+import re
 import sqlite3
+import threading
+import time
 from datetime import datetime
+from collections import OrderedDict
 from contextlib import contextmanager
 from typing import List, Dict, Optional
+from beneficiary_index import beneficiary_index
+from instrumentation import observe_stage, time_block
 
 DB_PATH = "finspeak.db"
 
-@contextmanager
-def get_db():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DB_PATH)
+# Connection pool tuning (applied once per pooled connection)
+DB_BUSY_TIMEOUT_MS = 5000
+DB_SYNCHRONOUS = "NORMAL"  # Safe with WAL: only the last commits can be lost on power failure
+DB_MMAP_SIZE = 64 * 1024 * 1024  # 64 MB
+DB_CACHED_STATEMENTS = 256
+
+# Retries for write transactions that still hit SQLITE_BUSY after busy_timeout
+# (e.g. another worker process holding the write lock)
+DB_BUSY_RETRIES = 5
+DB_BUSY_BACKOFF_BASE = 0.05  # seconds, doubled per attempt
+
+# Read-through cache for account and beneficiary rows. The TTL bounds staleness
+# from writes made by other worker processes; local writes invalidate explicitly.
+RECORD_CACHE_TTL_SECONDS = 30
+RECORD_CACHE_MAX_USERS = 1024
+
+# One connection per (thread, database file); WAL lets readers run next to the single writer
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pool = []
+_pool_generation = 0
+
+# Serializes writers inside this process so they queue here instead of spinning on busy_timeout
+_write_lock = threading.Lock()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """Open a tuned connection for the pool"""
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=DB_CACHED_STATEMENTS,
+        check_same_thread=False
+    )
     conn.row_factory = sqlite3.Row  # Return rows as dicts
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Return this thread's pooled connection, opening it on first use"""
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.generation != _pool_generation:
+        connections = _local.connections = {}
+        _local.generation = _pool_generation
+    conn = connections.get(DB_PATH)
+    if conn is None:
+        conn = _connect(DB_PATH)
+        connections[DB_PATH] = conn
+        with _pool_lock:
+            _pool.append(conn)
+    return conn
+
+
+def close_all_connections():
+    """Close every pooled connection (call on shutdown or after swapping DB_PATH)"""
+    global _pool_generation
+    with _pool_lock:
+        connections = list(_pool)
+        _pool.clear()
+        _pool_generation += 1  # Other threads reconnect on their next call
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+
+@contextmanager
+def get_db(write: bool = False):
+    """Context manager for pooled database connections
+    
+    Args:
+        write: Take the process-wide writer lock and open the transaction with
+            BEGIN IMMEDIATE, so concurrent writers queue instead of failing mid-transaction
+    
+    Raises: RuntimeError for a write=True block nested inside a read-only one
+    """
+    conn = _get_connection()
+    depth = getattr(_local, "depth", 0)
+    if depth:
+        # Nested use on the same thread joins the outer transaction. A write can't
+        # join a read: it would run without BEGIN IMMEDIATE or the writer lock.
+        if write and not _local.writing:
+            raise RuntimeError("get_db(write=True) nested inside a read-only get_db(); open the outer one with write=True")
+        _local.depth = depth + 1
+        try:
+            yield conn
+        finally:
+            _local.depth = depth
+        return
+    
+    if write:
+        waited = time.perf_counter()
+        _write_lock.acquire()
+        observe_stage("db", "write_lock_wait", waited)
+    _local.depth = 1
+    _local.writing = write
     try:
-        yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
+        # Time spent holding the connection (queries through commit), whoever the caller is
+        with time_block("db", "write_transaction" if write else "read"):
+            if write:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
     finally:
-        conn.close()
+        _local.depth = 0
+        if write:
+            _write_lock.release()
+
+
+def _is_busy_error(error: sqlite3.OperationalError) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED errors"""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry_on_busy(func):
+    """Retry a write operation with jittered exponential backoff on SQLITE_BUSY
+    
+    Only wrap top-level operations that own their transaction; a retry inside an
+    outer transaction would replay half of it.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(DB_BUSY_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_busy_error(e) or attempt == DB_BUSY_RETRIES:
+                    raise
+                delay = DB_BUSY_BACKOFF_BASE * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+    return wrapper
+
+
+def _debit_account(conn, account_id: str, amount: int, user_id: str) -> Dict:
+    """Atomically debit an account if it can cover the amount
+    
+    Returns: the updated account row, or {"error": str} if the account is missing
+        or the balance is insufficient
+    """
+    row = conn.execute(
+        """UPDATE accounts SET balance = balance - ?
+           WHERE id = ? AND user_id = ? AND balance >= ?
+           RETURNING balance, name, type, account_number""",
+        (amount, account_id, user_id, amount)
+    ).fetchone()
+    if row:
+        return dict(row)
+    
+    # No row updated: tell missing account apart from insufficient funds
+    row = conn.execute(
+        "SELECT balance FROM accounts WHERE id = ? AND user_id = ?",
+        (account_id, user_id)
+    ).fetchone()
+    if not row:
+        return {"error": "Account not found"}
+    return {"error": f"Insufficient balance. Available: ₹{row['balance']:,}"}
+
+
+# ============================================================================
+# RECORD CACHE
+# ============================================================================
+
+class RecordCache:
+    """Per-user cache of account and beneficiary rows with TTL and LRU eviction
+    
+    Each user holds one entry per record kind ("accounts", "beneficiaries") with the
+    full row list, so lookups by ID are served from the same entry. A miss starts a
+    fill; invalidations bump a per-user generation (or the global epoch for
+    everyone), which stops a fill that began before the write committed from
+    re-populating the cache with stale rows. Generations are only kept for users
+    with a fill in flight, so invalidating uncached users costs no memory.
+    """
+    
+    def __init__(self, ttl: float, max_users: int):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries = OrderedDict()  # user_id -> {kind: (expires_at, rows_by_id)}
+        self._filling = {}  # user_id -> fills in flight
+        self._generations = {}  # user_id -> invalidations seen by in-flight fills
+        self._epoch = 0  # Bumped by invalidate(None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, user_id: str, kind: str):
+        """Return (rows_by_id or None, token); on a miss the caller must put() or abandon() the token"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            cached = entry.get(kind) if entry else None
+            if cached and cached[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return cached[1], None
+            self.misses += 1
+            self._filling[user_id] = self._filling.get(user_id, 0) + 1
+            return None, (self._epoch, self._generations.get(user_id, 0))
+    
+    def put(self, user_id: str, kind: str, rows_by_id: Dict, token: tuple):
+        """Store rows unless the user (or everyone) was invalidated since the read started"""
+        with self._lock:
+            current = (self._epoch, self._generations.get(user_id, 0))
+            self._end_fill_locked(user_id)
+            if current != token:
+                return
+            entry = self._entries.setdefault(user_id, {})
+            entry[kind] = (time.monotonic() + self.ttl, rows_by_id)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def abandon(self, user_id: str):
+        """End a fill that failed before put()"""
+        with self._lock:
+            self._end_fill_locked(user_id)
+    
+    def _end_fill_locked(self, user_id: str):
+        remaining = self._filling.pop(user_id, 0) - 1
+        if remaining > 0:
+            self._filling[user_id] = remaining
+        else:
+            self._generations.pop(user_id, None)
+    
+    def invalidate(self, user_id: str = None, *kinds: str):
+        """Drop cached records for one user (or everyone if user_id is None)"""
+        with self._lock:
+            self.invalidations += 1
+            if user_id is None:
+                self._epoch += 1
+                user_ids = list(self._entries)
+            else:
+                if user_id in self._filling:
+                    self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                user_ids = [user_id]
+            for uid in user_ids:
+                entry = self._entries.get(uid)
+                if entry is None:
+                    continue
+                for kind in kinds or list(entry):
+                    entry.pop(kind, None)
+                if not entry:
+                    del self._entries[uid]
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters for tuning TTL and size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "cached_users": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "max_users": self.max_users
+            }
+
+
+record_cache = RecordCache(RECORD_CACHE_TTL_SECONDS, RECORD_CACHE_MAX_USERS)
+
+
+def get_cache_stats() -> Dict:
+    """Get record cache hit/miss counters"""
+    return record_cache.stats()
+
+
+def _cached_records(kind: str, user_id: str) -> Dict[str, Dict]:
+    """Read-through lookup of all account or beneficiary rows for a user, keyed by ID"""
+    rows_by_id, token = record_cache.get(user_id, kind)
+    if rows_by_id is None:
+        try:
+            with get_db() as conn:
+                cursor = conn.execute(
+                    f"SELECT * FROM {kind} WHERE user_id = ?",
+                    (user_id,)
+                )
+                rows_by_id = {row["id"]: dict(row) for row in cursor.fetchall()}
+        except BaseException:
+            record_cache.abandon(user_id)
+            raise
+        record_cache.put(user_id, kind, rows_by_id, token)
+    return rows_by_id
+
+
+def invalidates_user_records(*kinds: str):
+    """Invalidate a user's cached records after the wrapped write returns
+    
+    The wrapped function must take a user_id argument. Invalidation runs after
+    the write transaction has committed (or rolled back).
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_cache.invalidate(bound.arguments["user_id"], *kinds)
+        return wrapper
+    return decorator
 
 
 # ============================================================================
@@ -29,24 +344,14 @@ def get_db():
 # ============================================================================
 
 def get_all_accounts(user_id: str = "demo_user") -> List[Dict]:
-    """Get all accounts for a user"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM accounts WHERE user_id = ?",
-            (user_id,)
-        )
-        return [dict(row) for row in cursor.fetchall()]
+    """Get all accounts for a user (cached)"""
+    return [dict(row) for row in _cached_records("accounts", user_id).values()]
 
 
 def get_account_by_id(account_id: str, user_id: str = "demo_user") -> Optional[Dict]:
-    """Get account by ID"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM accounts WHERE id = ? AND user_id = ?",
-            (account_id, user_id)
-        )
-        row = cursor.fetchone()
-        return dict(row) if row else None
+    """Get account by ID (cached)"""
+    row = _cached_records("accounts", user_id).get(account_id)
+    return dict(row) if row else None
 
 
 def get_account_balance(account_id: str) -> int:
@@ -62,11 +367,13 @@ def get_account_balance(account_id: str) -> int:
 
 def update_account_balance(account_id: str, new_balance: int):
     """Update account balance"""
-    with get_db() as conn:
+    with get_db(write=True) as conn:
         conn.execute(
             "UPDATE accounts SET balance = ? WHERE id = ?",
             (new_balance, account_id)
         )
+    # No user_id here, so drop cached accounts for everyone
+    record_cache.invalidate(None, "accounts")
 
 
 # ============================================================================
@@ -74,56 +381,153 @@ def update_account_balance(account_id: str, new_balance: int):
 # ============================================================================
 
 def get_all_beneficiaries(user_id: str = "demo_user") -> List[Dict]:
-    """Get all beneficiaries for a user"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM beneficiaries WHERE user_id = ?",
-            (user_id,)
-        )
-        return [dict(row) for row in cursor.fetchall()]
+    """Get all beneficiaries for a user (cached)"""
+    return [dict(row) for row in _cached_records("beneficiaries", user_id).values()]
 
 
 def get_beneficiary_by_id(beneficiary_id: str, user_id: str = "demo_user") -> Optional[Dict]:
-    """Get beneficiary by ID"""
+    """Get beneficiary by ID (cached)"""
+    row = _cached_records("beneficiaries", user_id).get(beneficiary_id)
+    return dict(row) if row else None
+
+
+def find_beneficiaries_by_name(name: str, user_id: str = "demo_user", limit: int = 5) -> List[Dict]:
+    """Find beneficiaries matching a name, best match first
+    
+    Uses the in-memory trigram/phonetic index, so partial, misspelled and
+    transliterated names ("Prathap" for "Pratap") still match. Each row carries
+    a match_score.
+    """
+    rows_by_id = _cached_records("beneficiaries", user_id)
+    _sync_beneficiary_index(user_id, rows_by_id)
+    return [
+        {**rows_by_id[beneficiary_id], "match_score": score}
+        for beneficiary_id, score in beneficiary_index.search(user_id, name, limit)
+        if beneficiary_id in rows_by_id
+    ]
+
+
+def _sync_beneficiary_index(user_id: str, rows_by_id: Dict[str, Dict]):
+    """Index beneficiaries this user gained since the last sync (from any worker)
+    
+    Runs only when the cached snapshot changed (invalidation or TTL refill) and
+    reads just the rows past the indexed rowid, via idx_beneficiaries_user.
+    """
+    since = beneficiary_index.sync_state(user_id, rows_by_id)
+    if since is None:
+        return
     with get_db() as conn:
         cursor = conn.execute(
-            "SELECT * FROM beneficiaries WHERE id = ? AND user_id = ?",
-            (beneficiary_id, user_id)
+            "SELECT rowid AS row_id, id, name FROM beneficiaries WHERE user_id = ? AND rowid > ? ORDER BY rowid",
+            (user_id, since)
         )
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        new_rows = [dict(row) for row in cursor.fetchall()]
+    beneficiary_index.apply(user_id, new_rows, rows_by_id)
 
 
-def find_beneficiaries_by_name(name: str, user_id: str = "demo_user") -> List[Dict]:
-    """Find beneficiaries matching a name (case-insensitive)"""
+def warm_beneficiary_index():
+    """Build the beneficiary name index for every user in one pass (run at startup)"""
     with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM beneficiaries WHERE user_id = ? AND LOWER(name) LIKE ?",
-            (user_id, f"%{name.lower()}%")
-        )
-        return [dict(row) for row in cursor.fetchall()]
+        # Fresh database - nothing to index until init_db.py has run
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'beneficiaries'"
+        ).fetchone():
+            return
+        cursor = conn.execute("SELECT rowid AS row_id, id, user_id, name FROM beneficiaries")
+        beneficiary_index.build([dict(row) for row in cursor.fetchall()])
 
 
 # ============================================================================
 # TRANSACTIONS
 # ============================================================================
 
+def _record_daily_rollups(conn, rows: List[tuple]):
+    """Fold new transactions into daily_account_rollups
+    
+    Must run in the same write transaction as the INSERT INTO transactions.
+    
+    Args:
+        rows: (account_id, day, type, amount, balance_after) per new transaction,
+            in insertion order so the last row of a day sets its closing balance
+    """
+    conn.executemany(
+        """INSERT INTO daily_account_rollups
+           (account_id, day, credits, debits, txn_count, closing_balance)
+           VALUES (?, ?, ?, ?, 1, ?)
+           ON CONFLICT (account_id, day) DO UPDATE SET
+               credits = credits + excluded.credits,
+               debits = debits + excluded.debits,
+               txn_count = txn_count + 1,
+               closing_balance = excluded.closing_balance""",
+        [
+            (account_id, day,
+             amount if txn_type == "credit" else 0,
+             amount if txn_type == "debit" else 0,
+             balance_after)
+            for account_id, day, txn_type, amount, balance_after in rows
+        ]
+    )
+
+
+def _record_beneficiary_transfers(conn, rows: List[tuple]):
+    """Fold completed beneficiary transfers into beneficiary_history
+    
+    Must run in the same write transaction as the debit, so the new-beneficiary
+    risk check can never miss a transfer that committed.
+    
+    Args:
+        rows: (user_id, beneficiary_id, amount) per completed transfer
+    """
+    now = datetime.now().isoformat()
+    conn.executemany(
+        """INSERT INTO beneficiary_history
+           (user_id, beneficiary_id, first_seen, last_seen, transfer_count, total_amount)
+           VALUES (?, ?, ?, ?, 1, ?)
+           ON CONFLICT (user_id, beneficiary_id) DO UPDATE SET
+               last_seen = excluded.last_seen,
+               transfer_count = transfer_count + 1,
+               total_amount = total_amount + excluded.total_amount""",
+        [(user_id, beneficiary_id, now, now, amount) for user_id, beneficiary_id, amount in rows]
+    )
+
+
+def get_beneficiary_history(user_id: str, beneficiary_id: str) -> Optional[Dict]:
+    """first_seen / last_seen / transfer_count / total_amount, or None if never paid"""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT * FROM beneficiary_history WHERE user_id = ? AND beneficiary_id = ?",
+            (user_id, beneficiary_id)
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def get_known_beneficiary_pairs() -> List[tuple]:
+    """All (user_id, beneficiary_id) pairs with at least one completed transfer"""
+    with get_db() as conn:
+        return [
+            (row["user_id"], row["beneficiary_id"])
+            for row in conn.execute("SELECT user_id, beneficiary_id FROM beneficiary_history")
+        ]
+
+
 def add_transaction(account_id: str, txn_type: str, description: str, amount: int, balance_after: int):
     """Add a new transaction record"""
-    with get_db() as conn:
+    today = datetime.now().strftime("%Y-%m-%d")
+    with get_db(write=True) as conn:
         conn.execute(
             """INSERT INTO transactions 
                (account_id, date, type, description, amount, balance_after)
                VALUES (?, ?, ?, ?, ?, ?)""",
             (
                 account_id,
-                datetime.now().strftime("%Y-%m-%d"),
+                today,
                 txn_type,
                 description,
                 amount,
                 balance_after
             )
         )
+        _record_daily_rollups(conn, [(account_id, today, txn_type, amount, balance_after)])
 
 
 def get_transactions(account_id: str, limit: int = 10, start_date: str = None, end_date: str = None) -> List[Dict]:
@@ -149,17 +553,203 @@ def get_transactions(account_id: str, limit: int = 10, start_date: str = None, e
             query += " AND date <= ?"
             params.append(end_date)
         
-        query += " ORDER BY created_at DESC LIMIT ?"
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
         params.append(limit)
         
         cursor = conn.execute(query, params)
         return [dict(row) for row in cursor.fetchall()]
 
 
+def get_transactions_page(account_id: str, page_size: int = 5, start_date: str = None, end_date: str = None,
+                          after: tuple = None, before: tuple = None) -> Dict:
+    """Get one page of transactions using keyset pagination on (created_at, id)
+    
+    Reads at most page_size + 1 rows from idx_transactions_account_created, no matter
+    how deep the page is. Rows are returned newest first.
+    
+    Args:
+        account_id: Account ID
+        page_size: Rows per page
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        after: (created_at, id) of the last row of the previous page - fetch older rows
+        before: (created_at, id) of the first row of the current page - fetch newer rows
+    
+    Returns: {"transactions": [...], "has_more": bool} where has_more means another
+        page exists in the direction of travel
+    """
+    with get_db() as conn:
+        query = """SELECT id, created_at, date, type, description, amount, balance_after as balance
+                   FROM transactions 
+                   WHERE account_id = ?"""
+        params = [account_id]
+        
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        
+        if before:
+            query += " AND (created_at, id) > (?, ?) ORDER BY created_at ASC, id ASC LIMIT ?"
+            params.extend(before)
+        else:
+            if after:
+                query += " AND (created_at, id) < (?, ?)"
+                params.extend(after)
+            query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(page_size + 1)
+        
+        rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if before:
+            rows.reverse()
+        return {"transactions": rows, "has_more": has_more}
+
+
+def _fts_match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_transactions(query: str, user_id: str = "demo_user", account_id: str = None,
+                        start_date: str = None, end_date: str = None, limit: int = 10) -> Dict:
+    """Full-text search over transaction descriptions across a user's accounts
+    
+    Matches are ranked by BM25 relevance, then recency. Totals cover every match,
+    not just the returned rows, and come from the same indexed query.
+    
+    Args:
+        query: Free text such as "swiggy" or "uber ride"
+        user_id: Owner of the accounts to search
+        account_id: Optional account ID to restrict the search to
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        limit: Max number of matches to return
+    
+    Returns: {"matches": [...], "total_matches": int, "total_debits": int, "total_credits": int},
+             plus "error" (and no matches) if FTS5 rejects the match expression
+    """
+    match_expression = _fts_match_expression(query)
+    if not match_expression:
+        return {"matches": [], "total_matches": 0, "total_debits": 0, "total_credits": 0}
+    
+    with get_db() as conn:
+        sql = """SELECT t.date, t.type, t.description, t.amount, t.balance_after as balance,
+                        a.id AS account_id, a.type AS account_type, a.account_number,
+                        COUNT(*) OVER () AS total_matches,
+                        SUM(CASE WHEN t.type = 'debit' THEN t.amount ELSE 0 END) OVER () AS total_debits,
+                        SUM(CASE WHEN t.type = 'credit' THEN t.amount ELSE 0 END) OVER () AS total_credits
+                 FROM transactions_fts f
+                 JOIN transactions t ON t.id = f.rowid
+                 JOIN accounts a ON a.id = t.account_id
+                 WHERE transactions_fts MATCH ? AND a.user_id = ?"""
+        params = [match_expression, user_id]
+        
+        if account_id:
+            sql += " AND t.account_id = ?"
+            params.append(account_id)
+        
+        if start_date:
+            sql += " AND t.date >= ?"
+            params.append(start_date)
+        
+        if end_date:
+            sql += " AND t.date <= ?"
+            params.append(end_date)
+        
+        sql += " ORDER BY f.rank, t.created_at DESC, t.id DESC LIMIT ?"
+        params.append(limit)
+        
+        try:
+            rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+        except sqlite3.OperationalError as e:
+            # FTS5 syntax errors surface at execution time
+            return {"matches": [], "total_matches": 0, "total_debits": 0, "total_credits": 0,
+                    "error": f"Could not search for '{query}': {e}"}
+    
+    totals = rows[0] if rows else {"total_matches": 0, "total_debits": 0, "total_credits": 0}
+    return {
+        "matches": [
+            {key: row[key] for key in ("date", "type", "description", "amount", "balance", "account_id", "account_type", "account_number")}
+            for row in rows
+        ],
+        "total_matches": totals["total_matches"],
+        "total_debits": totals["total_debits"],
+        "total_credits": totals["total_credits"]
+    }
+
+
+def get_account_activity_summary(account_ids: List[str], start_date: str = None, end_date: str = None) -> Dict:
+    """Summarize credits, debits and balances from daily rollups
+    
+    Reads one rollup row per account per active day in the range instead of
+    scanning raw transactions.
+    
+    Args:
+        account_ids: Accounts to include (already checked to belong to the user)
+        start_date: Optional start date in YYYY-MM-DD format
+        end_date: Optional end date in YYYY-MM-DD format
+    
+    Returns: {"by_account": {account_id: {...}}, "by_month": [...], totals...}
+    """
+    if not account_ids:
+        return {"total_credits": 0, "total_debits": 0, "txn_count": 0, "by_account": {}, "by_month": []}
+    
+    query = f"""SELECT account_id, day, credits, debits, txn_count, closing_balance
+                FROM daily_account_rollups
+                WHERE account_id IN ({", ".join("?" * len(account_ids))})"""
+    params = list(account_ids)
+    if start_date:
+        query += " AND day >= ?"
+        params.append(start_date)
+    if end_date:
+        query += " AND day <= ?"
+        params.append(end_date)
+    query += " ORDER BY account_id, day"
+    
+    with get_db() as conn:
+        cursor = conn.execute(query, params)
+        rows = cursor.fetchall()
+    
+    by_account = {
+        account_id: {"credits": 0, "debits": 0, "txn_count": 0, "closing_balance": None}
+        for account_id in account_ids
+    }
+    by_month = {}
+    for row in rows:
+        account = by_account[row["account_id"]]
+        account["credits"] += row["credits"]
+        account["debits"] += row["debits"]
+        account["txn_count"] += row["txn_count"]
+        account["closing_balance"] = row["closing_balance"]  # Rows are in day order
+        
+        month = by_month.setdefault(row["day"][:7], {"month": row["day"][:7], "credits": 0, "debits": 0, "txn_count": 0})
+        month["credits"] += row["credits"]
+        month["debits"] += row["debits"]
+        month["txn_count"] += row["txn_count"]
+    
+    return {
+        "total_credits": sum(acc["credits"] for acc in by_account.values()),
+        "total_debits": sum(acc["debits"] for acc in by_account.values()),
+        "txn_count": sum(acc["txn_count"] for acc in by_account.values()),
+        "by_account": by_account,
+        "by_month": [by_month[month] for month in sorted(by_month)]
+    }
+
+
 # ============================================================================
 # TRANSFER OPERATIONS
 # ============================================================================
 
+@retry_on_busy
+@invalidates_user_records("accounts")
 def execute_transfer(from_account_id: str, to_beneficiary_id: str, amount: int, user_id: str = "demo_user") -> Dict:
     """
     Execute transfer: deduct from source, add transaction
@@ -170,24 +760,8 @@ def execute_transfer(from_account_id: str, to_beneficiary_id: str, amount: int,
     
     # Generate unique transaction ID: TXN + timestamp + random
     txn_id = f"TXN{datetime.now().strftime('%Y%m%d%H%M%S')}{random.randint(1000, 9999)}"
-    with get_db() as conn:
-        # 1. Get source account
-        cursor = conn.execute(
-            "SELECT balance, name FROM accounts WHERE id = ? AND user_id = ?",
-            (from_account_id, user_id)
-        )
-        account_row = cursor.fetchone()
-        if not account_row:
-            return {"success": False, "error": "Account not found"}
-        
-        current_balance = account_row["balance"]
-        account_name = account_row["name"]
-        
-        # 2. Check sufficient balance
-        if current_balance < amount:
-            return {"success": False, "error": f"Insufficient balance. Available: ₹{current_balance:,}"}
-        
-        # 3. Get beneficiary
+    with get_db(write=True) as conn:
+        # 1. Get beneficiary
         cursor = conn.execute(
             "SELECT name FROM beneficiaries WHERE id = ? AND user_id = ?",
             (to_beneficiary_id, user_id)
@@ -198,33 +772,36 @@ def execute_transfer(from_account_id: str, to_beneficiary_id: str, amount: int,
         
         ben_name = ben_row["name"]
         
-        # 4. Deduct from source account
-        new_balance = current_balance - amount
-        conn.execute(
-            "UPDATE accounts SET balance = ? WHERE id = ?",
-            (new_balance, from_account_id)
-        )
+        # 2. Deduct from source account (balance check and update in one statement)
+        debited = _debit_account(conn, from_account_id, amount, user_id)
+        if "error" in debited:
+            return {"success": False, "error": debited["error"]}
         
-        # 5. Add transaction record
+        new_balance = debited["balance"]
+        
+        # 3. Add transaction record and fold it into the daily rollup
+        today = datetime.now().strftime("%Y-%m-%d")
         conn.execute(
             """INSERT INTO transactions 
                (account_id, date, type, description, amount, balance_after)
                VALUES (?, ?, ?, ?, ?, ?)""",
             (
                 from_account_id,
-                datetime.now().strftime("%Y-%m-%d"),
+                today,
                 "debit",
                 f"Transfer to {ben_name}",
                 amount,
                 new_balance
             )
         )
+        _record_daily_rollups(conn, [(from_account_id, today, "debit", amount, new_balance)])
+        _record_beneficiary_transfers(conn, [(user_id, to_beneficiary_id, amount)])
         
         return {
             "success": True,
             "new_balance": new_balance,
             "beneficiary_name": ben_name,
-            "account_name": account_name,
+            "account_name": debited["name"],
             "transaction_id": txn_id
         }
 
@@ -246,6 +823,8 @@ def is_same_bank_transfer(beneficiary_id: str, user_id: str = "demo_user") -> bo
     return beneficiary["bank"] == get_home_bank()
 
 
+@retry_on_busy
+@invalidates_user_records("accounts")
 def execute_own_account_transfer(from_account_id: str, to_account_id: str, amount: int, user_id: str = "demo_user") -> Dict:
     """
     Execute transfer between user's own accounts: debit from source, credit to destination
@@ -254,80 +833,53 @@ def execute_own_account_transfer(from_account_id: str, to_account_id: str, amoun
     from datetime import datetime
     import random
     
+    # 1. Prevent transfer to same account
+    if from_account_id == to_account_id:
+        return {"success": False, "error": "Cannot transfer to the same account"}
+    
     # Generate unique transaction ID: TXN + timestamp + random
     txn_id = f"TXN{datetime.now().strftime('%Y%m%d%H%M%S')}{random.randint(1000, 9999)}"
-    with get_db() as conn:
-        # 1. Get source account
+    with get_db(write=True) as conn:
+        # 2. Check destination account exists before touching any balance
         cursor = conn.execute(
-            "SELECT balance, name FROM accounts WHERE id = ? AND user_id = ?",
-            (from_account_id, user_id)
-        )
-        from_row = cursor.fetchone()
-        if not from_row:
-            return {"success": False, "error": "Source account not found"}
-        
-        from_balance = from_row["balance"]
-        from_name = from_row["name"]
-        
-        # 2. Check sufficient balance
-        if from_balance < amount:
-            return {"success": False, "error": f"Insufficient balance. Available: ₹{from_balance:,}"}
-        
-        # 3. Get destination account
-        cursor = conn.execute(
-            "SELECT balance, name FROM accounts WHERE id = ? AND user_id = ?",
+            "SELECT 1 FROM accounts WHERE id = ? AND user_id = ?",
             (to_account_id, user_id)
         )
-        to_row = cursor.fetchone()
-        if not to_row:
+        if not cursor.fetchone():
             return {"success": False, "error": "Destination account not found"}
         
-        to_balance = to_row["balance"]
-        to_name = to_row["name"]
-        
-        # 4. Prevent transfer to same account
-        if from_account_id == to_account_id:
-            return {"success": False, "error": "Cannot transfer to the same account"}
-        
-        # 5. Debit from source account
-        new_from_balance = from_balance - amount
-        conn.execute(
-            "UPDATE accounts SET balance = ? WHERE id = ?",
-            (new_from_balance, from_account_id)
-        )
-        
-        # 6. Credit to destination account
-        new_to_balance = to_balance + amount
-        conn.execute(
-            "UPDATE accounts SET balance = ? WHERE id = ?",
-            (new_to_balance, to_account_id)
-        )
+        # 3. Debit from source account (balance check and update in one statement)
+        from_row = _debit_account(conn, from_account_id, amount, user_id)
+        if "error" in from_row:
+            error = from_row["error"]
+            if error == "Account not found":
+                error = "Source account not found"
+            return {"success": False, "error": error}
         
-        # 7. Get account numbers for descriptions
-        cursor = conn.execute(
-            "SELECT account_number, type FROM accounts WHERE id = ?",
-            (to_account_id,)
-        )
-        to_acc_row = cursor.fetchone()
-        to_account_number = to_acc_row["account_number"]
-        to_account_type = to_acc_row["type"].title()
+        # 4. Credit to destination account
+        to_row = conn.execute(
+            """UPDATE accounts SET balance = balance + ?
+               WHERE id = ? AND user_id = ?
+               RETURNING balance, name, type, account_number""",
+            (amount, to_account_id, user_id)
+        ).fetchone()
         
-        cursor = conn.execute(
-            "SELECT account_number, type FROM accounts WHERE id = ?",
-            (from_account_id,)
-        )
-        from_acc_row = cursor.fetchone()
-        from_account_number = from_acc_row["account_number"]
-        from_account_type = from_acc_row["type"].title()
+        new_from_balance = from_row["balance"]
+        new_to_balance = to_row["balance"]
+        from_account_number = from_row["account_number"]
+        from_account_type = from_row["type"].title()
+        to_account_number = to_row["account_number"]
+        to_account_type = to_row["type"].title()
         
-        # 8. Add debit transaction to source
+        # 5. Add debit transaction to source
+        today = datetime.now().strftime("%Y-%m-%d")
         conn.execute(
             """INSERT INTO transactions 
                (account_id, date, type, description, amount, balance_after)
                VALUES (?, ?, ?, ?, ?, ?)""",
             (
                 from_account_id,
-                datetime.now().strftime("%Y-%m-%d"),
+                today,
                 "debit",
                 f"Transfer to {to_account_type} Account ({to_account_number})",
                 amount,
@@ -335,14 +887,14 @@ def execute_own_account_transfer(from_account_id: str, to_account_id: str, amoun
             )
         )
         
-        # 9. Add credit transaction to destination
+        # 6. Add credit transaction to destination
         conn.execute(
             """INSERT INTO transactions 
                (account_id, date, type, description, amount, balance_after)
                VALUES (?, ?, ?, ?, ?, ?)""",
             (
                 to_account_id,
-                datetime.now().strftime("%Y-%m-%d"),
+                today,
                 "credit",
                 f"Transfer from {from_account_type} Account ({from_account_number})",
                 amount,
@@ -350,15 +902,204 @@ def execute_own_account_transfer(from_account_id: str, to_account_id: str, amoun
             )
         )
         
+        # 7. Fold both legs into the daily rollups
+        _record_daily_rollups(conn, [
+            (from_account_id, today, "debit", amount, new_from_balance),
+            (to_account_id, today, "credit", amount, new_to_balance)
+        ])
+        
         return {
             "success": True,
             "from_balance": new_from_balance,
             "to_balance": new_to_balance,
-            "from_account": from_name,
-            "to_account": to_name,
+            "from_account": from_row["name"],
+            "to_account": to_row["name"],
             "from_account_type": from_account_type,
             "to_account_type": to_account_type,
             "from_account_number": from_account_number,
             "to_account_number": to_account_number,
             "transaction_id": txn_id
         }
+
+
+# ============================================================================
+# BULK TRANSFERS
+# ============================================================================
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+_IN_CLAUSE_CHUNK = 500
+
+
+def _fetch_rows_by_ids(conn, table: str, columns: str, ids: set, user_id: str) -> Dict[str, Dict]:
+    """Fetch rows for a set of IDs with as few IN (...) queries as possible"""
+    rows = {}
+    id_list = list(ids)
+    for i in range(0, len(id_list), _IN_CLAUSE_CHUNK):
+        chunk = id_list[i:i + _IN_CLAUSE_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor = conn.execute(
+            f"SELECT id, {columns} FROM {table} WHERE user_id = ? AND id IN ({placeholders})",
+            [user_id, *chunk]
+        )
+        rows.update((row["id"], dict(row)) for row in cursor.fetchall())
+    return rows
+
+
+def _bulk_instruction_error(instruction) -> Optional[str]:
+    """Reject instructions of the wrong shape before any lookup, returns None if well-formed"""
+    if not isinstance(instruction, dict):
+        return "Invalid instruction"
+    amount = instruction.get("amount")
+    # bool is an int subclass; inf/nan would poison the running balances
+    if (not isinstance(amount, (int, float)) or isinstance(amount, bool)
+            or not math.isfinite(amount) or amount <= 0):
+        return "Invalid amount"
+    if not isinstance(instruction.get("from_account_id"), str):
+        return "Account not found"
+    for field in ("to_account_id", "to_beneficiary_id"):
+        if instruction.get(field) is not None and not isinstance(instruction[field], str):
+            return "Invalid instruction"
+    return None
+
+
+@retry_on_busy
+@invalidates_user_records("accounts")
+def execute_transfers_bulk(instructions: List[Dict], user_id: str = "demo_user") -> List[Dict]:
+    """
+    Execute many transfers in a single write transaction (payroll, vendor payouts)
+    
+    Each instruction is {"from_account_id": str, "amount": int} plus either
+    "to_beneficiary_id" (beneficiary transfer) or "to_account_id" (own-account transfer).
+    Instructions are applied in order against running balances; an invalid or
+    unaffordable instruction fails on its own without aborting the batch, and so
+    does a malformed one (not a dict, non-string IDs, bool / inf / nan amounts).
+    
+    Returns: one result per instruction, in order, shaped like execute_transfer /
+        execute_own_account_transfer results plus "index"
+    """
+    if not instructions:
+        return []
+    
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    txn_prefix = f"TXN{now.strftime('%Y%m%d%H%M%S')}{random.randint(1000, 9999)}"
+    
+    shape_errors = [_bulk_instruction_error(instruction) for instruction in instructions]
+    account_ids = set()
+    beneficiary_ids = set()
+    for instruction, shape_error in zip(instructions, shape_errors):
+        if shape_error:
+            continue
+        account_ids.add(instruction["from_account_id"])
+        if instruction.get("to_account_id"):
+            account_ids.add(instruction["to_account_id"])
+        if instruction.get("to_beneficiary_id"):
+            beneficiary_ids.add(instruction["to_beneficiary_id"])
+    
+    with get_db(write=True) as conn:
+        # 1. Load every referenced account and beneficiary in one set-based pass
+        accounts = _fetch_rows_by_ids(conn, "accounts", "name, type, account_number, balance", account_ids, user_id)
+        beneficiaries = _fetch_rows_by_ids(conn, "beneficiaries", "name", beneficiary_ids, user_id)
+        balances = {acc_id: acc["balance"] for acc_id, acc in accounts.items()}
+        
+        results = []
+        transaction_rows = []
+        beneficiary_rows = []
+        touched_accounts = set()
+        
+        # 2. Validate and apply each instruction against running balances
+        for index, instruction in enumerate(instructions):
+            error = shape_errors[index]
+            if error:
+                results.append({"index": index, "success": False, "error": error})
+                continue
+            
+            from_account_id = instruction["from_account_id"]
+            to_account_id = instruction.get("to_account_id")
+            to_beneficiary_id = instruction.get("to_beneficiary_id")
+            amount = instruction["amount"]
+            
+            if from_account_id not in accounts:
+                error = "Source account not found" if to_account_id else "Account not found"
+            elif bool(to_account_id) == bool(to_beneficiary_id):
+                error = "Specify exactly one of to_account_id or to_beneficiary_id"
+            elif to_account_id and to_account_id not in accounts:
+                error = "Destination account not found"
+            elif to_account_id == from_account_id:
+                error = "Cannot transfer to the same account"
+            elif to_beneficiary_id and to_beneficiary_id not in beneficiaries:
+                error = "Beneficiary not found"
+            elif balances[from_account_id] < amount:
+                error = f"Insufficient balance. Available: ₹{balances[from_account_id]:,}"
+            
+            if error:
+                results.append({"index": index, "success": False, "error": error})
+                continue
+            
+            txn_id = f"{txn_prefix}{index:06d}"
+            from_acc = accounts[from_account_id]
+            balances[from_account_id] -= amount
+            touched_accounts.add(from_account_id)
+            
+            if to_beneficiary_id:
+                ben_name = beneficiaries[to_beneficiary_id]["name"]
+                transaction_rows.append(
+                    (from_account_id, today, "debit", f"Transfer to {ben_name}", amount, balances[from_account_id])
+                )
+                beneficiary_rows.append((user_id, to_beneficiary_id, amount))
+                results.append({
+                    "index": index,
+                    "success": True,
+                    "new_balance": balances[from_account_id],
+                    "beneficiary_name": ben_name,
+                    "account_name": from_acc["name"],
+                    "transaction_id": txn_id
+                })
+            else:
+                to_acc = accounts[to_account_id]
+                balances[to_account_id] += amount
+                touched_accounts.add(to_account_id)
+                from_account_type = from_acc["type"].title()
+                to_account_type = to_acc["type"].title()
+                transaction_rows.append(
+                    (from_account_id, today, "debit",
+                     f"Transfer to {to_account_type} Account ({to_acc['account_number']})",
+                     amount, balances[from_account_id])
+                )
+                transaction_rows.append(
+                    (to_account_id, today, "credit",
+                     f"Transfer from {from_account_type} Account ({from_acc['account_number']})",
+                     amount, balances[to_account_id])
+                )
+                results.append({
+                    "index": index,
+                    "success": True,
+                    "from_balance": balances[from_account_id],
+                    "to_balance": balances[to_account_id],
+                    "from_account": from_acc["name"],
+                    "to_account": to_acc["name"],
+                    "from_account_type": from_account_type,
+                    "to_account_type": to_account_type,
+                    "from_account_number": from_acc["account_number"],
+                    "to_account_number": to_acc["account_number"],
+                    "transaction_id": txn_id
+                })
+        
+        # 3. Write final balances, transaction records, rollups and beneficiary history in batched statements
+        conn.executemany(
+            "UPDATE accounts SET balance = ? WHERE id = ?",
+            [(balances[acc_id], acc_id) for acc_id in touched_accounts]
+        )
+        conn.executemany(
+            """INSERT INTO transactions 
+               (account_id, date, type, description, amount, balance_after)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            transaction_rows
+        )
+        _record_daily_rollups(conn, [
+            (account_id, day, txn_type, amount, balance_after)
+            for account_id, day, txn_type, _, amount, balance_after in transaction_rows
+        ])
+        _record_beneficiary_transfers(conn, beneficiary_rows)
+    
+    return results
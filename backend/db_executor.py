@@ -0,0 +1,40 @@
+"""
+Async access to the FinSpeak data layer
+Runs blocking db.py / audit_logger.py calls on a dedicated, bounded thread pool
+so SQLite work never stalls the FastAPI event loop
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import time_block
+
+# SQLite has a single writer, so a handful of threads is enough to overlap reads
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=DB_EXECUTOR_WORKERS,
+    thread_name_prefix="finspeak-db"
+)
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking data-layer call on the DB executor and await its result"""
+    loop = asyncio.get_running_loop()
+    # Carry contextvars (request-scoped state) into the worker thread
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    with time_block("db", func.__name__):  # Includes time queued for a worker
+        return await loop.run_in_executor(_executor, call)
+
+
+def submit_db(func, *args, **kwargs):
+    """Queue a blocking data-layer call without waiting for it (usable from callbacks and cancelled tasks)"""
+    ctx = contextvars.copy_context()
+    return _executor.submit(functools.partial(ctx.run, func, *args, **kwargs))
+
+
+def shutdown_db_executor():
+    """Wait for queued DB work to finish and stop the executor threads"""
+    _executor.shutdown(wait=True)
@@ -4,6 +4,7 @@ Run this once to set up the database
 """
 import sqlite3
 from db import DB_PATH
+from migrations import apply_migrations
 
 def init_database():
     """Initialize database with schema and mock data"""
@@ -199,9 +200,10 @@ def init_database():
         ]
         
         all_transactions = transactions_primary + transactions_emergency + transactions_current
+        # Anchor created_at to the value date so history sorts by when it happened
         cursor.executemany(
-            "INSERT INTO transactions (account_id, date, type, description, amount, balance_after) VALUES (?, ?, ?, ?, ?, ?)",
-            all_transactions
+            "INSERT INTO transactions (account_id, date, type, description, amount, balance_after, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [txn + (f"{txn[1]} 00:00:00",) for txn in all_transactions]
         )
         print(f"  ✅ Inserted {len(all_transactions)} transactions")
     else:
@@ -210,6 +212,9 @@ def init_database():
     conn.commit()
     conn.close()
     
+    print("📐 Applying schema migrations...")
+    apply_migrations()
+    
     print("\n✅ Database initialized successfully!")
     print(f"📁 Database file: {DB_PATH}")
     print("\n🚀 You can now start the server with: python server.py")
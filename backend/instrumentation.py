@@ -0,0 +1,220 @@
+"""
+Latency instrumentation for FinSpeak
+Per-stage histograms, counters and in-flight gauges rendered in Prometheus text format for /metrics
+"""
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans SQLite lookups (sub-ms) through agent turns (tens of seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}  # label values tuple -> state
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = {labels: self._snapshot(state) for labels, state in self._children.items()}
+        for labels, state in sorted(children.items()):
+            lines.extend(self._render_child(labels, state))
+        return lines
+
+    def _snapshot(self, state):
+        return state
+
+    def _render_child(self, labels, value):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._children[labels] = self._children.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. calls in flight)"""
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._children[labels] = self._children.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket latency distribution per label set"""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._children.get(labels)
+            if state is None:
+                state = self._children[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _snapshot(self, state):
+        return (list(state[0]), state[1], state[2])
+
+    def _render_child(self, labels, state):
+        counts, total, count = state
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', repr(bound))])} {cumulative}")
+        lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {repr(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+# ============================================================================
+# STAGE METRICS
+# ============================================================================
+
+stage_duration = Histogram(
+    "finspeak_stage_duration_seconds",
+    "Latency of each request stage (http, agent, tool, db, aws, tts, session, postprocess)",
+    ("stage", "name")
+)
+stage_calls = Counter(
+    "finspeak_stage_calls_total",
+    "Calls per request stage by outcome",
+    ("stage", "name", "outcome")
+)
+stage_in_flight = Gauge(
+    "finspeak_stage_in_flight",
+    "Calls currently running per request stage",
+    ("stage", "name")
+)
+
+REGISTRY = [stage_duration, stage_calls, stage_in_flight]
+
+
+def _record(stage, name, started, outcome):
+    stage_duration.observe(time.perf_counter() - started, stage, name)
+    stage_calls.inc(stage, name, outcome)
+    stage_in_flight.dec(stage, name)
+
+
+def observe_stage(stage, name, started, outcome="ok"):
+    """Record a stage that ran from started (a time.perf_counter() value) until now"""
+    stage_duration.observe(time.perf_counter() - started, stage, name)
+    stage_calls.inc(stage, name, outcome)
+
+
+@contextmanager
+def time_block(stage, name):
+    """Time a block of code as one call of a stage"""
+    stage_in_flight.inc(stage, name)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        _record(stage, name, started, outcome)
+
+
+def timed(stage, name=None):
+    """Decorator timing every call of a sync or async function as a stage"""
+    def decorator(func):
+        label = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                stage_in_flight.inc(stage, label)
+                started = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = await func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    _record(stage, label, started, outcome)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stage_in_flight.inc(stage, label)
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                _record(stage, label, started, outcome)
+        return wrapper
+    return decorator
+
+
+def instrument_boto3_client(client):
+    """Time every API call made through a boto3 client as stage "aws" (e.g. polly.SynthesizeSpeech)"""
+    service = client.meta.service_model.service_id.hyphenize()
+
+    def before_call(model, context, **kwargs):
+        name = f"{service}.{model.name}"
+        context["finspeak_timer"] = (name, time.perf_counter())
+        stage_in_flight.inc("aws", name)
+
+    def after_call(model, context, http_response=None, **kwargs):
+        timer = context.pop("finspeak_timer", None)
+        if timer:
+            status = getattr(http_response, "status_code", 200)
+            _record("aws", timer[0], timer[1], "ok" if status < 400 else "error")
+
+    def after_call_error(context, **kwargs):
+        timer = context.pop("finspeak_timer", None)
+        if timer:
+            _record("aws", timer[0], timer[1], "error")
+
+    client.meta.events.register(f"before-call.{service}", before_call)
+    client.meta.events.register(f"after-call.{service}", after_call)
+    client.meta.events.register(f"after-call-error.{service}", after_call_error)
+    return client
+
+
+def render_prometheus():
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,180 @@
+"""
+Live dashboard feed for FinSpeak
+One producer tails the shared audit DB, turns new rows (from every worker) into metric updates and fans them out to SSE subscribers
+"""
+import asyncio
+import json
+
+from audit_logger import add_write_listener, remove_write_listener, get_audit_logs, get_audit_logs_after, get_metrics_snapshot
+from db_executor import run_db
+from app_logging import get_logger
+
+logger = get_logger("live_feed")
+
+# Events buffered per subscriber before a slow client is disconnected (EventSource reconnects)
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Rows written by other workers show up within this many seconds (our own immediately)
+LIVE_FEED_POLL_SECONDS = 1.0
+
+# Max audit rows read per poll
+LIVE_FEED_BATCH_SIZE = 500
+
+# Resync counters from the DB so the rolling 24h count ages out even without writes
+METRICS_RESYNC_SECONDS = 60
+
+# Idle keep-alive so proxies don't close the stream
+KEEPALIVE_SECONDS = 15
+
+# Audit rows included in the snapshot sent on connect
+SNAPSHOT_LOG_LIMIT = 20
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class LiveFeed:
+    """Shared producer: one audit tail task, N subscriber queues
+    
+    Every uvicorn worker writes to the same audit DB, so the feed tails it by
+    global row id instead of listening to this worker's writer alone. The local
+    writer's commits just wake the tail early. With no subscribers the tail
+    sleeps; the first subscriber after that resyncs the counters and skips the
+    rows nobody saw.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._subscribers = set()
+        self._metrics = None
+        self._last_id = 0
+        self._counted_id = 0  # Rows up to this id are already in _metrics
+        self._next_resync = 0
+        self._wake = None
+        self._has_subscribers = None
+        self._catch_up_lock = None
+        self._tail_task = None
+
+    async def start(self):
+        """Start tailing the audit DB; call from the server's startup hook"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._has_subscribers = asyncio.Event()
+        self._catch_up_lock = asyncio.Lock()
+        await self._resync(skip_unseen=True)
+        add_write_listener(self._on_audit_batch)
+        self._tail_task = asyncio.create_task(self._tail_loop())
+
+    async def stop(self):
+        remove_write_listener(self._on_audit_batch)
+        if self._tail_task:
+            self._tail_task.cancel()
+        for queue in list(self._subscribers):
+            self._close(queue)
+
+    def _on_audit_batch(self, rows):
+        # Writer thread -> event loop; never block the writer
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _resync(self, skip_unseen=False):
+        """Reload the counters from the DB (metrics and the row id they cover come from one snapshot)
+        
+        Only runs on the tail task or while it is parked, so _last_id can't move
+        underneath; rows up to the snapshot id are not counted a second time.
+        """
+        self._metrics, self._counted_id = await run_db(get_metrics_snapshot)
+        if skip_unseen:
+            self._last_id = self._counted_id
+        self._next_resync = self._loop.time() + METRICS_RESYNC_SECONDS
+
+    async def _catch_up(self):
+        """First subscriber after idling: fresh counters, and the tail starts at the newest row"""
+        async with self._catch_up_lock:
+            if self._has_subscribers.is_set():
+                return
+            await self._resync(skip_unseen=True)
+            self._has_subscribers.set()
+
+    async def _tail_loop(self):
+        while True:
+            if not self._subscribers:
+                self._has_subscribers.clear()
+                await self._has_subscribers.wait()  # No polling while nobody is watching
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=LIVE_FEED_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                # Counters resync so the rolling 24h count ages out even without writes
+                if self._loop.time() >= self._next_resync:
+                    await self._resync()
+                    self._broadcast(_sse("metrics", self._metrics))
+                rows = await run_db(get_audit_logs_after, self._last_id, LIVE_FEED_BATCH_SIZE)
+            except Exception:
+                logger.exception("Live feed audit tail failed")
+                continue
+            if rows:
+                self._last_id = rows[-1]["id"]
+                self._publish(rows)
+                if len(rows) == LIVE_FEED_BATCH_SIZE:
+                    self._wake.set()  # More waiting; read the next batch right away
+
+    def _publish(self, rows):
+        """Apply newly committed rows to the counters and broadcast them (event loop thread)"""
+        metrics = self._metrics
+        for row in rows:
+            if row["id"] <= self._counted_id:
+                continue  # Already in the last resync
+            metrics["recent_activity_24h"] += 1
+            if row["action"] == "transfer_completed":
+                metrics["total_transactions"] += 1
+                if row["status"] == "success":
+                    metrics["successful_transactions"] += 1
+                    metrics["total_amount_transferred"] += row["amount"] or 0
+        total = metrics["total_transactions"]
+        metrics["success_rate"] = round(metrics["successful_transactions"] / total * 100, 2) if total else 0
+
+        self._broadcast(_sse("audit", {"logs": rows, "metrics": metrics}))
+
+    def _broadcast(self, message):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._close(queue)
+
+    def _close(self, queue):
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def stream(self):
+        """SSE messages for one subscriber: a snapshot, then live audit/metrics events"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)  # Subscribe before the snapshot so no write is missed
+        try:
+            if not self._has_subscribers.is_set():
+                await self._catch_up()
+            logs = await run_db(get_audit_logs, None, SNAPSHOT_LOG_LIMIT)
+            yield _sse("snapshot", {"logs": logs, "metrics": self._metrics})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+
+    def stats(self):
+        return {"subscribers": len(self._subscribers)}
+
+
+live_feed = LiveFeed()
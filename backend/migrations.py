@@ -0,0 +1,138 @@
+"""
+Versioned schema migrations for FinSpeak
+Ordered steps applied on top of the base tables created by init_db.py
+"""
+from datetime import datetime
+from db import get_db
+
+# (version, description, statements) - append new steps, never edit applied ones
+MIGRATIONS = [
+    (1, "Index transaction history by account", [
+        # Covering index for history pages ordered by recency (keyset on created_at, id)
+        """CREATE INDEX IF NOT EXISTS idx_transactions_account_created
+           ON transactions (account_id, created_at, id, date, type, description, amount, balance_after)""",
+        # Composite index for date-bounded lookups
+        """CREATE INDEX IF NOT EXISTS idx_transactions_account_date
+           ON transactions (account_id, date, created_at)""",
+    ]),
+    (2, "Index accounts and beneficiaries by user", [
+        "CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_beneficiaries_user ON beneficiaries (user_id)",
+    ]),
+    (3, "Backfill created_at for seeded history rows", [
+        # Mock history was inserted with created_at = seeding time, which would make the
+        # recency index return it oldest-first. Anchor those rows to their value date.
+        """UPDATE transactions SET created_at = date || ' 00:00:00'
+           WHERE julianday(created_at) - julianday(date) > 1""",
+    ]),
+    (4, "Full-text search over transaction descriptions", [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+               description,
+               content='transactions',
+               content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2',
+               prefix='2 3'
+           )""",
+        # Keep the external-content index in sync with transactions
+        """CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+               INSERT INTO transactions_fts (rowid, description) VALUES (new.id, new.description);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+               INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', old.id, old.description);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description ON transactions BEGIN
+               INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', old.id, old.description);
+               INSERT INTO transactions_fts (rowid, description) VALUES (new.id, new.description);
+           END""",
+        "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+    ]),
+    (5, "Daily balance and spend rollups per account", [
+        """CREATE TABLE IF NOT EXISTS daily_account_rollups (
+               account_id TEXT NOT NULL,
+               day TEXT NOT NULL,
+               credits INTEGER NOT NULL DEFAULT 0,
+               debits INTEGER NOT NULL DEFAULT 0,
+               txn_count INTEGER NOT NULL DEFAULT 0,
+               closing_balance INTEGER,
+               PRIMARY KEY (account_id, day)
+           ) WITHOUT ROWID""",
+        # Backfill from existing history; closing balance is the day's latest row
+        """INSERT OR REPLACE INTO daily_account_rollups
+               (account_id, day, credits, debits, txn_count, closing_balance)
+           SELECT t.account_id, t.date,
+                  SUM(CASE WHEN t.type = 'credit' THEN t.amount ELSE 0 END),
+                  SUM(CASE WHEN t.type = 'debit' THEN t.amount ELSE 0 END),
+                  COUNT(*),
+                  (SELECT last.balance_after FROM transactions last
+                   WHERE last.account_id = t.account_id AND last.date = t.date
+                   ORDER BY last.created_at DESC, last.id DESC LIMIT 1)
+           FROM transactions t
+           GROUP BY t.account_id, t.date""",
+    ]),
+    (6, "Per-beneficiary transfer history next to the ledger", [
+        # Written in the same transaction as each transfer (was a post-commit write to the audit DB)
+        """CREATE TABLE IF NOT EXISTS beneficiary_history (
+               user_id TEXT NOT NULL,
+               beneficiary_id TEXT NOT NULL,
+               first_seen TEXT NOT NULL,
+               last_seen TEXT NOT NULL,
+               transfer_count INTEGER NOT NULL DEFAULT 0,
+               total_amount INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (user_id, beneficiary_id)
+           ) WITHOUT ROWID""",
+        # Backfill from the ledger: beneficiary debits are described as "Transfer to <name>"
+        """INSERT OR IGNORE INTO beneficiary_history
+               (user_id, beneficiary_id, first_seen, last_seen, transfer_count, total_amount)
+           SELECT b.user_id, b.id,
+                  REPLACE(MIN(t.created_at), ' ', 'T'), REPLACE(MAX(t.created_at), ' ', 'T'),
+                  COUNT(*), SUM(t.amount)
+           FROM transactions t
+           JOIN accounts a ON a.id = t.account_id
+           JOIN beneficiaries b ON b.user_id = a.user_id AND t.description = 'Transfer to ' || b.name
+           WHERE t.type = 'debit'
+           GROUP BY b.user_id, b.id""",
+    ]),
+]
+
+
+def get_schema_version(conn) -> int:
+    """Get the highest applied migration version"""
+    row = conn.execute("SELECT MAX(version) AS version FROM schema_version").fetchone()
+    return row["version"] or 0
+
+
+def apply_migrations() -> int:
+    """Apply pending migrations in order, returns the resulting schema version"""
+    with get_db(write=True) as conn:
+        # Fresh database - init_db.py creates the base tables and then migrates
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions'"
+        ).fetchone():
+            return 0
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+        """)
+        current = get_schema_version(conn)
+        
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().isoformat())
+            )
+            print(f"  ✅ Applied migration {version}: {description}")
+            current = version
+        
+        return current
+
+
+if __name__ == "__main__":
+    print(f"📐 Schema version: {apply_migrations()}")
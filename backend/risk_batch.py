@@ -0,0 +1,128 @@
+"""
+Vectorized batch risk scoring for FinSpeak
+Scores whole arrays of transfers (bulk payouts, re-scoring a day) with NumPy
+"""
+import numpy as np
+from db import get_known_beneficiary_pairs
+from risk_monitor import HIGH_AMOUNT_THRESHOLD, NEW_BENEFICIARY_AMOUNT_LIMIT, VELOCITY_LIMITS
+
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"])
+_LEVEL_CODES = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+
+# Declarative rule set mirroring risk_monitor.analyze_transaction
+# check: "amount_at_least" | "velocity" | "new_beneficiary"
+DEFAULT_RULES = [
+    {"name": "high_amount", "check": "amount_at_least", "threshold": HIGH_AMOUNT_THRESHOLD, "level": "HIGH"},
+    *[
+        {"name": f"rapid_transfers_{label}", "check": "velocity", "window": window, "max_count": max_count, "level": "MEDIUM"}
+        for label, (window, max_count) in VELOCITY_LIMITS.items()
+    ],
+    {"name": "new_beneficiary", "check": "new_beneficiary", "amount_above": NEW_BENEFICIARY_AMOUNT_LIMIT, "level": "MEDIUM"}
+]
+
+
+class _Batch:
+    """Column arrays plus per-user orderings shared by the rules"""
+
+    def __init__(self, user_ids, amounts, beneficiary_ids, timestamps, known_pairs, max_window):
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        beneficiary_ids = np.array([ben or "" for ben in beneficiary_ids], dtype=str)
+        self.is_beneficiary = beneficiary_ids != ""
+        self.known_pairs = known_pairs
+
+        self.users, self.user_codes = np.unique(np.asarray(user_ids, dtype=str), return_inverse=True)
+        self.beneficiaries, self.beneficiary_codes = np.unique(beneficiary_ids, return_inverse=True)
+
+        # Rows sorted by user then time; each user's times are shifted into a disjoint
+        # range so a single searchsorted never reaches into another user's rows
+        self.order = np.lexsort((self.timestamps, self.user_codes))
+        start = self.timestamps.min()
+        gap = self.timestamps.max() - start + max_window + 1
+        self.shifted = (self.timestamps[self.order] - start) + self.user_codes[self.order] * gap
+
+    def pair_codes(self, user_codes, beneficiary_codes):
+        return user_codes.astype(np.int64) * len(self.beneficiaries) + beneficiary_codes
+
+
+def _amount_at_least(batch, rule):
+    return batch.is_beneficiary & (batch.amounts >= rule["threshold"])
+
+
+def _velocity(batch, rule):
+    """Transfers by the same user in (t - window, t], counting the row itself"""
+    left = np.searchsorted(batch.shifted, batch.shifted - rule["window"], side="right")
+    counts = np.arange(len(batch.shifted)) - left + 1
+    flags = np.empty(len(batch.shifted), dtype=bool)
+    flags[batch.order] = counts >= rule["max_count"]
+    return batch.is_beneficiary & flags
+
+
+def _new_beneficiary(batch, rule):
+    """First transfer in the batch to a beneficiary the user has never paid before"""
+    pairs = batch.pair_codes(batch.user_codes, batch.beneficiary_codes)
+    _, first_index = np.unique(pairs[batch.order], return_index=True)  # Earliest row per pair
+    first = np.zeros(len(pairs), dtype=bool)
+    first[batch.order[first_index]] = True
+
+    # Drop pairs already in beneficiary history (only those that occur in this batch matter)
+    user_lookup = {user_id: code for code, user_id in enumerate(batch.users)}
+    beneficiary_lookup = {beneficiary_id: code for code, beneficiary_id in enumerate(batch.beneficiaries)}
+    known = [
+        (user_lookup[user_id], beneficiary_lookup[beneficiary_id])
+        for user_id, beneficiary_id in batch.known_pairs
+        if user_id in user_lookup and beneficiary_id in beneficiary_lookup
+    ]
+    if known:
+        known_users, known_beneficiaries = np.array(known).T
+        first &= ~np.isin(pairs, batch.pair_codes(known_users, known_beneficiaries))
+    return batch.is_beneficiary & first & (batch.amounts > rule["amount_above"])
+
+
+_RULE_CHECKS = {
+    "amount_at_least": _amount_at_least,
+    "velocity": _velocity,
+    "new_beneficiary": _new_beneficiary
+}
+
+
+def score_batch(user_ids, amounts, beneficiary_ids, timestamps, rules=None, known_pairs=None):
+    """Score a batch of transfers against a declarative rule set
+
+    Velocity and new-beneficiary rules only see the batch itself (plus known_pairs),
+    so pass a whole period of activity when re-scoring.
+
+    Args:
+        user_ids: User per transfer
+        amounts: Amount per transfer (rupees)
+        beneficiary_ids: Beneficiary per transfer; None/'' marks an own-account
+            transfer, which is never flagged (same as analyze_transaction)
+        timestamps: Epoch seconds per transfer
+        rules: Rule dicts (default DEFAULT_RULES)
+        known_pairs: (user_id, beneficiary_id) pairs already paid; defaults to the
+            beneficiary_history table
+
+    Returns: {"risk_level": array of LOW/MEDIUM/HIGH, "level_code": int8 array,
+              "flags": {rule name: bool array}}
+    """
+    rules = DEFAULT_RULES if rules is None else rules
+    if len(amounts) == 0:
+        level_code = np.zeros(0, dtype=np.int8)
+        return {"risk_level": RISK_LEVELS[level_code], "level_code": level_code,
+                "flags": {rule["name"]: np.zeros(0, dtype=bool) for rule in rules}}
+    if known_pairs is None:
+        known_pairs = get_known_beneficiary_pairs()
+    max_window = max([rule["window"] for rule in rules if rule["check"] == "velocity"], default=0)
+    batch = _Batch(user_ids, amounts, beneficiary_ids, timestamps, known_pairs or [], max_window)
+
+    level_code = np.zeros(len(batch.amounts), dtype=np.int8)
+    flags = {}
+
+    for rule in rules:
+        if rule["check"] not in _RULE_CHECKS:
+            raise ValueError(f"Unknown risk rule check: {rule['check']}")
+        hit = _RULE_CHECKS[rule["check"]](batch, rule)
+        flags[rule["name"]] = hit
+        np.maximum(level_code, np.where(hit, _LEVEL_CODES[rule["level"]], 0).astype(np.int8), out=level_code)
+
+    return {"risk_level": RISK_LEVELS[level_code], "level_code": level_code, "flags": flags}
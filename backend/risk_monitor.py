@@ -2,15 +2,184 @@
 Risk monitoring and anomaly detection for FinSpeak
 Flags suspicious transactions for security
 """
+import bisect
+import os
+import threading
+import time
+import uuid
+from collections import deque
 from datetime import datetime, timedelta
-from audit_logger import get_audit_logs
+from audit_logger import iter_audit_logs
+from db import get_beneficiary_history
+from config import VELOCITY_MAX_5M, VELOCITY_MAX_1H, VELOCITY_MAX_24H
+from state_store import state_store
 
 # Risk thresholds
 HIGH_AMOUNT_THRESHOLD = 50000  # ₹50,000
 RAPID_TRANSFER_WINDOW = 300  # 5 minutes
-MAX_TRANSFERS_IN_WINDOW = 3
+MAX_TRANSFERS_IN_WINDOW = VELOCITY_MAX_5M
 NEW_BENEFICIARY_AMOUNT_LIMIT = 25000  # ₹25,000
 
+# Velocity windows checked together: label -> (window seconds, max transfers initiated)
+VELOCITY_LIMITS = {
+    "5m": (RAPID_TRANSFER_WINDOW, MAX_TRANSFERS_IN_WINDOW),
+    "1h": (3600, VELOCITY_MAX_1H),
+    "24h": (86400, VELOCITY_MAX_24H)
+}
+
+# Workers exchange velocity events through the shared state store under this namespace prefix
+VELOCITY_NAMESPACE = "transfer_velocity"
+
+# Events read from the shared store per query while syncing
+VELOCITY_SYNC_BATCH = 1000
+
+# Idle users are dropped from the in-memory windows every this many syncs
+VELOCITY_SWEEP_EVERY = 60
+
+class VelocityTracker:
+    """Per-user sliding-window counts of transfer initiations, in process memory
+    
+    One deque of event times per user per window; old events are popped from the
+    left as they slide out, so recording and counting are amortized O(1). Events
+    from other workers arrive late and are inserted in time order.
+    """
+    
+    def __init__(self, windows):
+        self.windows = dict(windows)  # label -> window seconds
+        self._lock = threading.Lock()
+        self._users = {}  # user_id -> {label: deque of epoch seconds}
+    
+    def _prune(self, events, now):
+        for label, window in self.windows.items():
+            cutoff = now - window
+            queue = events[label]
+            while queue and queue[0] <= cutoff:
+                queue.popleft()
+    
+    def record(self, user_id, at=None):
+        """Count one transfer initiation (at: epoch seconds, default now)"""
+        at = time.time() if at is None else at
+        with self._lock:
+            events = self._users.get(user_id)
+            if events is None:
+                events = self._users[user_id] = {label: deque() for label in self.windows}
+            for queue in events.values():
+                if queue and at < queue[-1]:
+                    bisect.insort(queue, at)  # Late event (another worker's); queues stay short
+                else:
+                    queue.append(at)
+            self._prune(events, at)
+    
+    def counts(self, user_id, now=None):
+        """Events per window label for a user"""
+        now = time.time() if now is None else now
+        with self._lock:
+            events = self._users.get(user_id)
+            if events is None:
+                return {label: 0 for label in self.windows}
+            self._prune(events, now)
+            counts = {label: len(queue) for label, queue in events.items()}
+            if not any(counts.values()):
+                del self._users[user_id]  # Idle user: drop empty deques
+            return counts
+    
+    def sweep(self, now=None):
+        """Drop users whose events have all slid out of every window"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for user_id in list(self._users):
+                events = self._users[user_id]
+                self._prune(events, now)
+                if not any(events.values()):
+                    del self._users[user_id]
+
+
+class SharedVelocity:
+    """This worker's VelocityTracker, kept in step with every other worker's
+    
+    Checks and records only touch process memory. sync() (run off the request
+    path every VELOCITY_SYNC_SECONDS) publishes this worker's initiations to the
+    shared state store and folds in the ones other workers published, so counts
+    from other workers lag by at most one sync interval.
+    """
+    
+    def __init__(self, store, windows, namespace=VELOCITY_NAMESPACE):
+        self.store = store
+        self.tracker = VelocityTracker(windows)
+        self.ttl = max(windows.values())
+        self.prefix = f"{namespace}/"
+        self.worker_namespace = f"{self.prefix}{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()  # Guards _unpublished (taken on the request path)
+        self._sync_lock = threading.Lock()
+        self._unpublished = []  # (user_id, at) recorded here and not yet shared
+        self._last_event_id = 0
+        self._syncs = 0
+    
+    def record(self, user_id, at=None):
+        at = time.time() if at is None else at
+        self.tracker.record(user_id, at)
+        if self.store.shared:
+            with self._lock:
+                self._unpublished.append((user_id, at))
+    
+    def counts(self, user_id):
+        return self.tracker.counts(user_id)
+    
+    def sync(self):
+        """Publish local initiations and apply other workers'; returns how many were applied"""
+        if not self.store.shared:
+            return 0  # Single process: nothing to exchange
+        with self._sync_lock:
+            with self._lock:
+                batch, self._unpublished = self._unpublished, []
+            if batch:
+                try:
+                    self.store.add_events(self.worker_namespace, batch, self.ttl)
+                except Exception:
+                    with self._lock:
+                        self._unpublished[:0] = batch  # Retried on the next sync
+                    raise
+            applied = 0
+            while True:
+                rows = self.store.events_after(self.prefix, self._last_event_id, VELOCITY_SYNC_BATCH)
+                for event_id, namespace, user_id, at in rows:
+                    self._last_event_id = event_id
+                    if namespace != self.worker_namespace:
+                        self.tracker.record(user_id, at)
+                        applied += 1
+                if len(rows) < VELOCITY_SYNC_BATCH:
+                    break
+            self._syncs += 1
+            if self._syncs % VELOCITY_SWEEP_EVERY == 0:
+                self.tracker.sweep()
+            return applied
+
+# Live velocity windows for this worker (see SharedVelocity)
+velocity = SharedVelocity(state_store, {label: window for label, (window, _) in VELOCITY_LIMITS.items()})
+
+def record_transfer_initiated(user_id, at=None):
+    """Feed the velocity windows; call whenever a transfer_initiated event is logged (in memory, no I/O)"""
+    velocity.record(user_id, at)
+
+def get_velocity_counts(user_id):
+    """Transfers initiated per window label (this worker's plus those synced from other workers)"""
+    return velocity.counts(user_id)
+
+def sync_velocity():
+    """Exchange initiations with other workers; call every VELOCITY_SYNC_SECONDS and at shutdown"""
+    return velocity.sync()
+
+def warm_velocity():
+    """Fill the windows at startup: from the shared store, or by replaying the audit log in single-process mode"""
+    if state_store.shared:
+        sync_velocity()  # Our own namespace is new, so every unexpired event counts as another worker's
+        return
+    longest = max(window for window, _ in VELOCITY_LIMITS.values())
+    since = datetime.now() - timedelta(seconds=longest)
+    for log in iter_audit_logs(start=since, include_archive=False):
+        if log['action'] == 'transfer_initiated':
+            record_transfer_initiated(log['user_id'], datetime.fromisoformat(log['timestamp']).timestamp())
+
 def check_high_amount(amount, transfer_type="beneficiary"):
     """Flag high-value transactions (only for beneficiary transfers)"""
     # Skip risk check for own account transfers
@@ -26,34 +195,24 @@ def check_high_amount(amount, transfer_type="beneficiary"):
     return None
 
 def check_rapid_transfers(user_id):
-    """Detect multiple transfers in short time"""
-    logs = get_audit_logs(user_id, limit=10)
-    recent_transfers = [
-        log for log in logs 
-        if log['action'] == 'transfer_initiated' 
-        and datetime.fromisoformat(log['timestamp']) > datetime.now() - timedelta(seconds=RAPID_TRANSFER_WINDOW)
-    ]
-    
-    if len(recent_transfers) >= MAX_TRANSFERS_IN_WINDOW:
-        return {
-            "risk_level": "MEDIUM",
-            "reason": f"{len(recent_transfers)} transfers in {RAPID_TRANSFER_WINDOW//60} minutes",
-            "recommendation": "Verify user identity"
-        }
+    """Detect multiple transfers in short time (5 min, 1 h and 24 h windows)"""
+    counts = get_velocity_counts(user_id)
+    for label, (window, max_transfers) in VELOCITY_LIMITS.items():
+        if counts[label] >= max_transfers:
+            period = f"{window // 60} minutes" if window < 3600 else f"{window // 3600} hour{'s' if window > 3600 else ''}"
+            return {
+                "risk_level": "MEDIUM",
+                "reason": f"{counts[label]} transfers in {period}",
+                "recommendation": "Verify user identity"
+            }
     return None
 
 def check_new_beneficiary(beneficiary_id, amount, user_id):
     """Flag large transfers to new beneficiaries"""
-    logs = get_audit_logs(user_id, limit=100)
-    
-    # Check if beneficiary has been used before
-    previous_transfers = [
-        log for log in logs 
-        if log['action'] == 'transfer_completed' 
-        and beneficiary_id in (log['details'] or '')
-    ]
+    # Check if beneficiary has been paid before (keyed lookup, full history)
+    history = get_beneficiary_history(user_id, beneficiary_id)
     
-    if not previous_transfers and amount > NEW_BENEFICIARY_AMOUNT_LIMIT:
+    if not history and amount > NEW_BENEFICIARY_AMOUNT_LIMIT:
         return {
             "risk_level": "MEDIUM",
             "reason": f"First transfer to new beneficiary: ₹{amount:,}",
@@ -0,0 +1,196 @@
+"""
+Conversation session persistence for FinSpeak
+Append-only per-user message log with periodic compressed snapshots, so agents survive restarts and worker hops
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+
+SESSION_DB = os.getenv("SESSION_DB", "finspeak_sessions.db")
+
+# Fold the log into a fresh snapshot once this many messages were appended since the last one
+SESSION_SNAPSHOT_EVERY = int(os.getenv("SESSION_SNAPSHOT_EVERY", "32"))
+
+# Sessions untouched for this long are deleted by purge_idle_sessions()
+SESSION_RETENTION_DAYS = int(os.getenv("SESSION_RETENTION_DAYS", "30"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id TEXT PRIMARY KEY,
+    head_seq INTEGER NOT NULL,      -- seq of the newest message written
+    snapshot_seq INTEGER NOT NULL,  -- messages up to this seq are in snapshot
+    snapshot BLOB,                  -- zlib JSON array of messages
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_log (
+    user_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message BLOB NOT NULL,          -- zlib JSON of one message
+    PRIMARY KEY (user_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class _Persisted:
+    """What the store holds for one in-memory agent"""
+    __slots__ = ("head_seq", "count", "last_message")
+
+    def __init__(self, head_seq, count, last_message):
+        self.head_seq = head_seq
+        self.count = count                # Leading agent.messages already written
+        self.last_message = last_message  # agent.messages[count - 1], to detect trimming
+
+
+class SessionStore:
+    """Per-user message history in SQLite (WAL, so several workers can share it)"""
+
+    def __init__(self, db_path=SESSION_DB, snapshot_every=SESSION_SNAPSHOT_EVERY):
+        self.db_path = db_path
+        self.snapshot_every = snapshot_every
+        self._local = threading.local()
+        self._persisted = weakref.WeakKeyDictionary()  # agent -> _Persisted
+        self._stats = {"loads": 0, "appends": 0, "snapshots": 0, "conflicts": 0}
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def load(self, user_id):
+        """(messages, head_seq) for a user; ([], 0) if nothing is stored"""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT head_seq, snapshot_seq, snapshot FROM sessions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return [], 0
+        head_seq, snapshot_seq, snapshot = row
+        messages = _unpack(snapshot) if snapshot else []
+        messages.extend(
+            _unpack(blob) for (blob,) in conn.execute(
+                "SELECT message FROM session_log WHERE user_id = ? AND seq > ? AND seq <= ? ORDER BY seq",
+                (user_id, snapshot_seq, head_seq)
+            )
+        )
+        self._stats["loads"] += 1
+        return messages, head_seq
+
+    def head(self, user_id):
+        """Newest stored seq for a user (0 if none); one primary-key lookup"""
+        row = self._conn().execute("SELECT head_seq FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def attach(self, agent, head_seq):
+        """Mark an agent rehydrated from load() as in sync with head_seq"""
+        messages = agent.messages
+        self._persisted[agent] = _Persisted(head_seq, len(messages), messages[-1] if messages else None)
+
+    def is_current(self, user_id, agent):
+        """False when another worker wrote a newer version of this session"""
+        persisted = self._persisted.get(agent)
+        return self.head(user_id) == (persisted.head_seq if persisted else 0)
+
+    def save(self, user_id, agent):
+        """Write messages added since the last save; snapshot when the log grows or history was trimmed"""
+        messages = list(agent.messages)
+        persisted = self._persisted.get(agent) or _Persisted(0, 0, None)
+        in_sync = persisted.count <= len(messages) and (
+            persisted.count == 0 or messages[persisted.count - 1] is persisted.last_message
+        )
+        new_messages = messages[persisted.count:] if in_sync else messages
+        if in_sync and not new_messages:
+            return
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT head_seq, snapshot_seq FROM sessions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            head_seq, snapshot_seq = row if row else (0, 0)
+            if head_seq != persisted.head_seq:
+                # Another worker wrote this session meanwhile; last writer wins with a full snapshot
+                self._stats["conflicts"] += 1
+                in_sync = False
+
+            if not in_sync or head_seq + len(new_messages) - snapshot_seq >= self.snapshot_every:
+                head_seq += len(new_messages) if in_sync else 1
+                self._write_snapshot(conn, user_id, messages, head_seq)
+            else:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO session_log (user_id, seq, message) VALUES (?, ?, ?)",
+                    [(user_id, head_seq + i + 1, _pack(message)) for i, message in enumerate(new_messages)]
+                )
+                head_seq += len(new_messages)
+                conn.execute(
+                    "INSERT INTO sessions (user_id, head_seq, snapshot_seq, snapshot, updated_at) VALUES (?, ?, 0, NULL, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET head_seq = excluded.head_seq, updated_at = excluded.updated_at",
+                    (user_id, head_seq, time.time())
+                )
+                self._stats["appends"] += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._persisted[agent] = _Persisted(head_seq, len(messages), messages[-1] if messages else None)
+
+    def _write_snapshot(self, conn, user_id, messages, head_seq):
+        conn.execute(
+            "INSERT INTO sessions (user_id, head_seq, snapshot_seq, snapshot, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET head_seq = excluded.head_seq, snapshot_seq = excluded.snapshot_seq, "
+            "snapshot = excluded.snapshot, updated_at = excluded.updated_at",
+            (user_id, head_seq, head_seq, _pack(messages), time.time())
+        )
+        conn.execute("DELETE FROM session_log WHERE user_id = ? AND seq <= ?", (user_id, head_seq))
+        self._stats["snapshots"] += 1
+
+    def delete(self, user_id):
+        """Forget a user's conversation (e.g. /api/reset)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_log WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def purge_idle_sessions(self, retention_days=SESSION_RETENTION_DAYS):
+        """Delete sessions not written for retention_days; returns how many were removed"""
+        cutoff = time.time() - retention_days * 86400
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            users = [user_id for (user_id,) in conn.execute("SELECT user_id FROM sessions WHERE updated_at < ?", (cutoff,))]
+            conn.executemany("DELETE FROM session_log WHERE user_id = ?", [(user_id,) for user_id in users])
+            conn.executemany("DELETE FROM sessions WHERE user_id = ?", [(user_id,) for user_id in users])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(users)
+
+    def stats(self):
+        return dict(self._stats)
+
+
+session_store = SessionStore()
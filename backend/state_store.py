@@ -0,0 +1,228 @@
+"""
+Shared request state for FinSpeak
+Key/value store with per-key TTLs and atomic pop, in-process or SQLite-backed so several workers can share it
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# "sqlite": shared by every uvicorn worker on the host; "memory": single process only
+STATE_STORE_BACKEND = os.getenv("STATE_STORE_BACKEND", "sqlite")
+STATE_DB = os.getenv("STATE_DB", "finspeak_state.db")
+
+# Expired rows are deleted every this many writes (reads already ignore them)
+STATE_PURGE_EVERY = 500
+
+# PRAGMA user_version of the current layout; older files are upgraded by _migrate()
+STATE_SCHEMA_VERSION = 3
+
+
+class MemoryStateStore:
+    """In-process backend: dict per namespace"""
+
+    shared = False  # Visible to this process only
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}  # namespace -> {key: (value, expires_at or None)}
+
+    def _live(self, items, key, now):
+        item = items.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del items[key]
+            return None
+        return item
+
+    def get(self, namespace, key):
+        with self._lock:
+            item = self._live(self._data.get(namespace, {}), key, time.time())
+            return item[0] if item else None
+
+    def set(self, namespace, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = (value, expires_at)
+
+    def pop(self, namespace, key):
+        with self._lock:
+            items = self._data.get(namespace, {})
+            item = self._live(items, key, time.time())
+            if item is None:
+                return None
+            del items[key]
+            return item[0]
+
+
+class SQLiteStateStore:
+    """Shared backend: one WAL database on local disk, JSON values"""
+
+    shared = True  # Every worker on the host opens the same file
+
+    def __init__(self, db_path=STATE_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < STATE_SCHEMA_VERSION:
+                self._migrate(conn)
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn):
+        """Create the tables or upgrade an older file in place, keeping unexpired rows
+
+        Version 1 had a rowid state table with an id column; version 2 had
+        state_events without an id, so readers couldn't tail it.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < STATE_SCHEMA_VERSION:  # Another worker may have won
+                now = time.time()
+                old_state = "id" in self._columns(conn, "state")
+                if old_state:
+                    conn.execute("ALTER TABLE state RENAME TO state_v1")
+                event_columns = self._columns(conn, "state_events")
+                old_events = bool(event_columns) and "id" not in event_columns
+                if old_events:
+                    conn.execute("ALTER TABLE state_events RENAME TO state_events_v2")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS state (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        expires_at REAL,
+                        PRIMARY KEY (namespace, key)
+                    ) WITHOUT ROWID
+                """)
+                # AUTOINCREMENT: ids never go backwards, even after purging every row, so tails never miss one
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS state_events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+                # Copying before the indexes are created: dropping the old tables drops their same-named indexes
+                if old_state:
+                    conn.execute(
+                        "INSERT INTO state (namespace, key, value, expires_at) "
+                        "SELECT namespace, key, value, expires_at FROM state_v1 WHERE expires_at IS NULL OR expires_at > ?",
+                        (now,)
+                    )
+                    conn.execute("DROP TABLE state_v1")
+                if old_events:
+                    conn.execute(
+                        "INSERT INTO state_events (namespace, key, at, expires_at) "
+                        "SELECT namespace, key, at, expires_at FROM state_events_v2 WHERE expires_at > ? ORDER BY at",
+                        (now,)
+                    )
+                    conn.execute("DROP TABLE state_events_v2")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_state_expires ON state (expires_at) WHERE expires_at IS NOT NULL")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_state_events_expires ON state_events (expires_at)")
+                conn.execute(f"PRAGMA user_version = {STATE_SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _columns(conn, table):
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    def get(self, namespace, key):
+        row = self._conn().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace, key, value, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (namespace, key, json.dumps(value, default=str), now + ttl if ttl else None)
+        )
+        self._wrote(conn, now)
+
+    def _wrote(self, conn, now):
+        self._writes += 1
+        if self._writes % STATE_PURGE_EVERY == 0:
+            conn.execute("DELETE FROM state WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM state_events WHERE expires_at <= ?", (now,))
+
+    def pop(self, namespace, key):
+        """Atomic get-and-delete: of concurrent callers (any worker) exactly one gets the value"""
+        row = self._conn().execute(
+            "DELETE FROM state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?) RETURNING value",
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add_events(self, namespace, events, ttl):
+        """Append (key, at) events in one statement; each is kept for ttl seconds after its time"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO state_events (namespace, key, at, expires_at) VALUES (?, ?, ?, ?)",
+                [(namespace, key, at, at + ttl) for key, at in events]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._wrote(conn, now)
+
+    def events_after(self, namespace_prefix, after_id, limit=1000):
+        """Unexpired (id, namespace, key, at) events with id > after_id under namespace_prefix, oldest first"""
+        return self._conn().execute(
+            "SELECT id, namespace, key, at FROM state_events "
+            "WHERE id > ? AND namespace GLOB ? AND expires_at > ? ORDER BY id LIMIT ?",
+            (after_id, namespace_prefix + "*", time.time(), limit)
+        ).fetchall()
+
+
+class StateNamespace:
+    """One kind of state (e.g. pending OTPs) with a default TTL"""
+
+    def __init__(self, store, name, ttl=None):
+        self.store = store
+        self.name = name
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.store.get(self.name, key)
+
+    def set(self, key, value, ttl=None):
+        self.store.set(self.name, key, value, ttl or self.ttl)
+
+    def pop(self, key):
+        return self.store.pop(self.name, key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+def create_state_store(backend=STATE_STORE_BACKEND):
+    if backend == "memory":
+        return MemoryStateStore()
+    if backend == "sqlite":
+        return SQLiteStateStore()
+    raise ValueError(f"Unknown STATE_STORE_BACKEND: {backend}")
+
+
+state_store = create_state_store()
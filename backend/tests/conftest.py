@@ -0,0 +1,55 @@
+"""
+Shared pytest fixtures for FinSpeak backend tests
+Each test gets a freshly seeded finspeak.db in its own temporary directory
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+
+@pytest.fixture
+def seeded_db(tmp_path, monkeypatch):
+    """Chdir into tmp_path and build finspeak.db there with init_db.py (all DB paths are relative)"""
+    monkeypatch.chdir(tmp_path)
+    import db
+    import init_db
+    db.close_all_connections()
+    db.record_cache.invalidate(None)
+    init_db.init_database()
+    db.warm_beneficiary_index()
+    yield db
+    db.close_all_connections()
+    db.record_cache.invalidate(None)
+
+
+@pytest.fixture
+def audit_db(tmp_path, monkeypatch):
+    """Point audit_logger at a fresh finspeak_audit.db with its own writer thread"""
+    import audit_logger
+    path = str(tmp_path / "finspeak_audit.db")
+    monkeypatch.setattr(audit_logger, "AUDIT_DB", path)
+    monkeypatch.setattr(audit_logger, "AUDIT_ARCHIVE_DIR", str(tmp_path / "audit_archive"))
+    audit_logger.init_audit_db()
+    writer = audit_logger.AuditWriter(db_path=path)
+    monkeypatch.setattr(audit_logger, "audit_writer", writer)
+    yield audit_logger
+    writer.stop()
+
+
+@pytest.fixture
+def server_client(seeded_db, audit_db, monkeypatch):
+    """TestClient for server.app on the seeded databases, with in-memory request state"""
+    from fastapi.testclient import TestClient
+    import banking_tools
+    import server
+    from state_store import MemoryStateStore
+    store = MemoryStateStore()
+    monkeypatch.setattr(server.pending_otps, "store", store)
+    monkeypatch.setattr(banking_tools.pending_transfers, "store", store)
+    monkeypatch.setattr(server, "text_to_speech", lambda text, language="en": None)  # No Polly in tests
+    return TestClient(server.app)
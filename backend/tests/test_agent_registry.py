@@ -0,0 +1,82 @@
+"""
+Tests for AgentRegistry loading outside its lock
+"""
+import threading
+
+from agent_registry import AgentRegistry, AGENT_BASE_BYTES
+
+
+class _Agent:
+    def __init__(self, messages=()):
+        self.messages = list(messages)
+
+
+def test_slow_load_does_not_block_other_users():
+    loading, release = threading.Event(), threading.Event()
+
+    def factory(user_id):
+        if user_id == "slow":
+            loading.set()
+            release.wait(5)
+        return _Agent()
+
+    registry = AgentRegistry(factory, is_current=lambda user_id, agent: True)
+    fast = registry.get("fast")
+    thread = threading.Thread(target=registry.get, args=("slow",))
+    thread.start()
+    loading.wait(5)
+    assert registry.get("fast") is fast  # Served while "slow" is still being built
+    release.set()
+    thread.join()
+
+
+def test_concurrent_misses_build_one_agent():
+    calls = []
+    gate = threading.Event()
+
+    def factory(user_id):
+        calls.append(user_id)
+        gate.wait(5)
+        return _Agent()
+
+    registry = AgentRegistry(factory)
+    agents = []
+    threads = [threading.Thread(target=lambda: agents.append(registry.get("alice"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert calls == ["alice"]
+    assert len({id(agent) for agent in agents}) == 1
+
+
+def test_stale_reload_re_estimates_size():
+    current = {"alice": True}
+    history = [{"role": "user", "content": "x" * 10000}]
+    registry = AgentRegistry(lambda user_id: _Agent(history), is_current=lambda user_id, agent: current[user_id])
+    registry.get("alice")
+    history.append({"role": "assistant", "content": "y" * 50000})
+    current["alice"] = False
+    registry.get("alice")
+    stats = registry.stats()
+    assert stats["stale_reloads"] == 1
+    assert stats["resident_bytes"] > AGENT_BASE_BYTES + 60000
+
+
+def test_factory_failure_lets_the_next_call_retry():
+    attempts = []
+
+    def factory(user_id):
+        attempts.append(user_id)
+        if len(attempts) == 1:
+            raise RuntimeError("session store unavailable")
+        return _Agent()
+
+    registry = AgentRegistry(factory)
+    try:
+        registry.get("alice")
+    except RuntimeError:
+        pass
+    assert registry.get("alice") is not None
+    assert len(attempts) == 2
@@ -0,0 +1,80 @@
+"""
+Tests for JSON log formatting, request correlation ids and sampling
+"""
+import contextvars
+import json
+import logging
+import queue
+
+import app_logging
+
+
+def capture(monkeypatch, maxsize=0):
+    """A finspeak logger wired to a queue handler we can read back"""
+    handler = app_logging._DroppingQueueHandler(queue.Queue(maxsize=maxsize))
+    logger = app_logging.get_logger("test")
+    monkeypatch.setattr(logger, "handlers", [handler])
+    monkeypatch.setattr(logger, "propagate", False)
+    logger.setLevel(logging.DEBUG)  # Test-only logger
+    return logger, handler
+
+
+def formatted(handler):
+    return json.loads(app_logging.JSONFormatter().format(handler.queue.get_nowait()))
+
+
+def test_record_is_one_json_object_with_request_id(monkeypatch):
+    logger, handler = capture(monkeypatch)
+
+    def handle_request():
+        app_logging.new_request_id("req-123")
+        values = ["a"]
+        logger.info("Loaded %s", values, extra={"rows": 3, "user_id": "demo_user"})
+        values.append("b")  # Mutated after logging: the line must not change
+
+    contextvars.copy_context().run(handle_request)
+    logger.warning("Outside a request")
+
+    entry = formatted(handler)
+    assert entry["msg"] == "Loaded ['a']"
+    assert (entry["level"], entry["logger"], entry["request_id"]) == ("INFO", "finspeak.test", "req-123")
+    assert (entry["rows"], entry["user_id"]) == (3, "demo_user")
+    assert set(entry) == {"ts", "level", "logger", "request_id", "msg", "rows", "user_id"}
+    assert formatted(handler)["request_id"] == "-"
+
+
+def test_exceptions_are_formatted(monkeypatch):
+    logger, handler = capture(monkeypatch)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed")
+    entry = formatted(handler)
+    assert entry["level"] == "ERROR" and "ValueError: boom" in entry["exc"]
+
+
+def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    logger, handler = capture(monkeypatch, maxsize=1)
+    for n in range(3):
+        logger.info("Line %d", n)
+    assert handler.dropped == 2
+    assert formatted(handler)["msg"] == "Line 0"
+
+
+def test_sampling_caps_lines_per_key(monkeypatch):
+    logger, handler = capture(monkeypatch)
+    monkeypatch.setattr(app_logging, "_sampler", app_logging._Sampler(per_second=2))
+    for _ in range(5):
+        app_logging.log_sampled(logger, "transcript", "Transcript", text="hi")
+    app_logging.log_sampled(logger, "other", "Other")
+    assert handler.queue.qsize() == 3
+    assert formatted(handler)["text"] == "hi"
+    assert app_logging.get_logging_stats()["sampled_out"] == 3
+
+
+def test_metrics_endpoint_reports_logging(server_client, monkeypatch):
+    monkeypatch.setattr(app_logging, "_sampler", app_logging._Sampler(per_second=1))
+    app_logging._sampler.allow("key")
+    app_logging._sampler.allow("key")
+    stats = server_client.get("/api/metrics").json()["logging"]
+    assert stats["sampled_out"] == 1 and stats["dropped"] >= 0
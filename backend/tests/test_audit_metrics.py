@@ -0,0 +1,60 @@
+"""
+Tests that get_metrics' write-time summaries agree with a recount of the audit rows
+"""
+import random
+from datetime import datetime, timedelta
+
+ACTIONS = [("transfer_completed", "success"), ("transfer_completed", "failed"),
+           ("transfer_initiated", "success"), ("otp_verified", "failed"), ("login", "success")]
+
+
+def recount(audit_logger):
+    """get_metrics computed the slow way: every row, archives included"""
+    since_hour = (datetime.now() - timedelta(days=1)).isoformat()[:13]
+    completed = [row for row in audit_logger.iter_audit_logs() if row["action"] == "transfer_completed"]
+    success = [row for row in completed if row["status"] == "success"]
+    return {
+        "total_transactions": len(completed),
+        "successful_transactions": len(success),
+        "success_rate": round(len(success) / len(completed) * 100, 2) if completed else 0,
+        "total_amount_transferred": sum(row["amount"] or 0 for row in success),
+        "recent_activity_24h": sum(1 for row in audit_logger.iter_audit_logs(start=since_hour))
+    }
+
+
+def write_mixed_rows(audit_logger, rng, when, count):
+    rows = []
+    for _ in range(count):
+        action, status = rng.choice(ACTIONS)
+        amount = rng.choice([None, 100, 2500, 49999]) if action.startswith("transfer") else None
+        rows.append(((when.isoformat(), f"user_{rng.randint(0, 3)}", action, None, status, amount,
+                      None, None, None, None), None))
+    audit_logger.audit_writer._write_batch(rows)
+
+
+def test_metrics_match_recount_across_partitions_and_archive(audit_db):
+    audit_logger = audit_db
+    rng = random.Random(12)
+    now = datetime.now()
+    assert audit_logger.get_metrics() == recount(audit_logger)
+
+    cold_day = (now - timedelta(days=30)).strftime("%Y-%m-%d")
+    write_mixed_rows(audit_logger, rng, now - timedelta(days=30), 40)
+    assert audit_logger.get_metrics() == recount(audit_logger)
+
+    # Yesterday's partition inside and outside the rolling 24h, then today's; the
+    # day rollover archives the cold day, which must not change the metrics
+    for hours_ago, count in ((26, 35), (23, 30), (2, 25)):
+        write_mixed_rows(audit_logger, rng, now - timedelta(hours=hours_ago), count)
+    for _ in range(10):
+        action, status = rng.choice(ACTIONS)
+        audit_logger.log_action("demo_user", action, status, amount=700)  # Through the writer queue
+    with audit_logger.get_audit_db() as conn:
+        assert cold_day not in audit_logger.list_partitions(conn)
+        assert len(audit_logger.list_partitions(conn)) >= 2
+    assert audit_logger.list_archived_days() == [cold_day]
+
+    metrics = audit_logger.get_metrics()
+    assert metrics == recount(audit_logger)
+    assert metrics["recent_activity_24h"] == 65
+    assert metrics["total_transactions"] > metrics["successful_transactions"] > 0
@@ -0,0 +1,129 @@
+"""
+Tests for audit day partitions, global row ids and archival
+"""
+import gzip
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _row(timestamp, action="test_action"):
+    return (timestamp, "demo_user", action, None, "success", None, None, None, None, None)
+
+
+def _old_day(days_ago=30):
+    return (datetime.now() - timedelta(days=days_ago)).replace(hour=12)
+
+
+def test_ids_are_unique_across_days(audit_db):
+    audit_logger = audit_db
+    writer = audit_logger.audit_writer
+    for days_ago in (1, 0):
+        writer._write_batch([(_row(_old_day(days_ago).isoformat()), None)] * 3)
+    with audit_logger.get_audit_db() as conn:
+        ids = [row["id"] for day in audit_logger.list_partitions(conn)
+               for row in conn.execute(f"SELECT id FROM {audit_logger.partition_table(day)}")]
+    assert len(ids) == len(set(ids)) == 6
+    assert all(row_id > audit_logger.AUDIT_ID_DAY_FACTOR for row_id in ids)
+
+
+class _DropFails:
+    """Connection wrapper that dies on DROP TABLE, like a worker killed mid-archive"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *args):
+        if sql.startswith("DROP TABLE"):
+            raise RuntimeError("killed")
+        return self.conn.execute(sql, *args)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self.conn.__exit__(*exc)
+
+
+def _archive_lines(audit_logger, day):
+    with gzip.open(audit_logger._archive_path(day), "rt") as archive:
+        return [json.loads(line) for line in archive]
+
+
+def test_rearchiving_after_crash_does_not_duplicate(audit_db):
+    audit_logger = audit_db
+    old = _old_day()
+    day = old.strftime("%Y-%m-%d")
+    audit_logger.audit_writer._write_batch([(_row(old.isoformat()), None)] * 5)
+
+    # Crash after the archive was written but before the partition was dropped
+    with audit_logger.get_audit_db() as conn:
+        try:
+            audit_logger.archive_cold_partitions(_DropFails(conn))
+        except RuntimeError:
+            pass
+    assert len(_archive_lines(audit_logger, day)) == 5
+
+    with audit_logger.get_audit_db() as conn:
+        assert audit_logger.archive_cold_partitions(conn) == 1
+        assert day not in audit_logger.list_partitions(conn)
+    assert len(_archive_lines(audit_logger, day)) == 5
+
+
+def test_archival_skips_while_another_process_holds_the_lock(audit_db):
+    import fcntl
+    audit_logger = audit_db
+    old = _old_day()
+    audit_logger.audit_writer._write_batch([(_row(old.isoformat()), None)])
+    with open(audit_logger.AUDIT_DB + ".lock", "a") as other:
+        fcntl.flock(other, fcntl.LOCK_EX)  # A separate open file description acts like another process
+        with audit_logger.get_audit_db() as conn:
+            assert audit_logger.archive_cold_partitions(conn) == 0
+        fcntl.flock(other, fcntl.LOCK_UN)
+    with audit_logger.get_audit_db() as conn:
+        assert audit_logger.archive_cold_partitions(conn) == 1
+
+
+def test_pre_global_partitions_are_renumbered(audit_db):
+    audit_logger = audit_db
+    day = datetime.now().strftime("%Y-%m-%d")
+    table = audit_logger.partition_table(day)
+    with audit_logger.get_audit_db() as conn:
+        conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, user_id TEXT NOT NULL, "
+                     "action TEXT NOT NULL, details TEXT, status TEXT NOT NULL, amount INTEGER, from_account TEXT, "
+                     "to_account TEXT, ip_address TEXT, session_id TEXT)")
+        conn.executemany(f"INSERT INTO {table} (timestamp, user_id, action, status) VALUES (?, 'u', 'a', 'success')",
+                         [(datetime.now().isoformat(),)] * 2)
+    audit_logger.init_audit_db()
+    audit_logger.init_audit_db()  # Idempotent
+    audit_logger.audit_writer._write_batch([(_row(datetime.now().isoformat()), None)])
+    with audit_logger.get_audit_db() as conn:
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+    base = audit_logger._id_base(day)
+    assert ids == [base + 1, base + 2, base + 3]
+
+
+def test_import_leaves_the_database_alone(tmp_path):
+    import os
+    import subprocess
+    import sys
+    import audit_logger
+    backend_dir = os.path.dirname(os.path.abspath(audit_logger.__file__))
+    subprocess.run([sys.executable, "-c", "import sys; sys.path.insert(0, sys.argv[1]); import audit_logger", backend_dir],
+                   cwd=tmp_path, check=True)
+    assert not (tmp_path / "finspeak_audit.db").exists()
+
+
+def test_read_only_backtest_never_archives(audit_db, monkeypatch):
+    import os
+    import backtest_risk
+    audit_logger = audit_db
+    audit_logger.audit_writer._write_batch([(_row(_old_day().isoformat(), "transfer_initiated"), None)])
+    monkeypatch.setattr(audit_logger, "AUDIT_DB_READ_ONLY", True)
+    result = backtest_risk.run_backtest({"current": {}})
+    assert result["transfers"] == 1
+    assert not os.path.exists(audit_logger.AUDIT_ARCHIVE_DIR)
+    with pytest.raises(sqlite3.OperationalError):
+        audit_logger.init_audit_db()  # Would migrate and archive; refused on a mode=ro connection
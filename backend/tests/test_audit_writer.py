@@ -0,0 +1,73 @@
+"""
+Tests for the group-commit audit writer
+"""
+import threading
+import time
+
+
+def _row(audit_logger, n):
+    return (audit_logger.datetime.now().isoformat(), "demo_user", "test_action", str(n),
+            "success", None, None, None, None, None)
+
+
+def _count(audit_logger):
+    with audit_logger.get_audit_db() as conn:
+        return sum(
+            conn.execute(f"SELECT COUNT(*) FROM {audit_logger.partition_table(day)} WHERE action = 'test_action'").fetchone()[0]
+            for day in audit_logger.list_partitions(conn)
+        )
+
+
+def test_no_rows_lost_when_stop_races_submit(audit_db):
+    audit_logger = audit_db
+    writer = audit_logger.audit_writer
+    go = threading.Event()
+
+    def producer(base):
+        go.wait()
+        for i in range(200):
+            writer.submit(_row(audit_logger, base + i))
+
+    producers = [threading.Thread(target=producer, args=(n * 1000,)) for n in range(4)]
+    for thread in producers:
+        thread.start()
+    go.set()
+    time.sleep(0.005)
+    writer.stop()  # Rows submitted after this are written directly
+    for thread in producers:
+        thread.join()
+    assert _count(audit_logger) == 800
+
+
+def test_dead_writer_is_restarted(audit_db, monkeypatch):
+    audit_logger = audit_db
+    writer = audit_logger.AuditWriter(db_path=audit_logger.AUDIT_DB, queue_size=4)
+    original_run = writer._run
+    calls = []
+
+    def dies_once():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("writer crashed")
+        original_run()
+
+    monkeypatch.setattr(writer, "_run", dies_once)
+    finished = threading.Event()
+
+    def produce():
+        for i in range(20):  # More than the queue holds: would block forever on a dead writer
+            writer.submit(_row(audit_logger, i))
+        finished.set()
+
+    threading.Thread(target=produce, daemon=True).start()
+    assert finished.wait(10)
+    writer.stop()
+    assert writer.writer_restarts >= 1
+    assert _count(audit_logger) == 20
+
+
+def test_waiting_submit_after_stop_is_written(audit_db):
+    audit_logger = audit_db
+    audit_logger.audit_writer.stop()
+    audit_logger.log_action("demo_user", "transfer_completed", "success")
+    assert audit_logger.query_audit_logs(action="transfer_completed")
@@ -0,0 +1,60 @@
+"""
+Tests for beneficiary_history written alongside transfers
+"""
+import sqlite3
+
+import pytest
+
+import migrations
+
+
+def test_transfer_records_history(seeded_db):
+    db = seeded_db
+    assert db.get_beneficiary_history("demo_user", "ben_raj_sharma") is None
+    db.execute_transfer("acc_current", "ben_raj_sharma", 1000)
+    db.execute_transfer("acc_current", "ben_raj_sharma", 500)
+    history = db.get_beneficiary_history("demo_user", "ben_raj_sharma")
+    assert (history["transfer_count"], history["total_amount"]) == (2, 1500)
+
+
+def test_failed_transfer_records_nothing(seeded_db):
+    db = seeded_db
+    assert not db.execute_transfer("acc_current", "ben_raj_sharma", 10 ** 12)["success"]
+    assert db.get_beneficiary_history("demo_user", "ben_raj_sharma") is None
+
+
+def test_bulk_transfers_record_history(seeded_db):
+    db = seeded_db
+    db.execute_transfers_bulk([
+        {"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": 100},
+        {"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": 200},
+        {"from_account_id": "acc_current", "to_account_id": "acc_savings_primary", "amount": 300},
+        {"from_account_id": "acc_current", "to_beneficiary_id": "ben_pratap_kumar", "amount": 10 ** 12},
+    ])
+    history = db.get_beneficiary_history("demo_user", "ben_raj_sharma")
+    assert (history["transfer_count"], history["total_amount"]) == (2, 300)
+    assert db.get_known_beneficiary_pairs() == [("demo_user", "ben_raj_sharma")]
+
+
+def test_history_rolls_back_with_the_transfer(seeded_db, monkeypatch):
+    db = seeded_db
+    start = db.get_account_balance("acc_current")
+
+    def fail(conn, rows):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db, "_record_beneficiary_transfers", fail)
+    with pytest.raises(sqlite3.OperationalError):
+        db.execute_transfer("acc_current", "ben_raj_sharma", 1000)
+    assert db.get_account_balance("acc_current") == start
+
+
+def test_migration_backfills_from_ledger(seeded_db):
+    db = seeded_db
+    db.execute_transfer("acc_current", "ben_raj_sharma", 700)
+    with db.get_db(write=True) as conn:
+        conn.execute("DROP TABLE beneficiary_history")
+        conn.execute("DELETE FROM schema_version WHERE version = 6")
+    migrations.apply_migrations()
+    history = db.get_beneficiary_history("demo_user", "ben_raj_sharma")
+    assert (history["transfer_count"], history["total_amount"]) == (1, 700)
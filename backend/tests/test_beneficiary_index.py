@@ -0,0 +1,58 @@
+"""
+Tests for the beneficiary name index and its incremental sync
+"""
+
+
+def _insert(db, beneficiary_id, name, user_id="demo_user"):
+    """Insert the way another worker would: straight into SQLite, no local invalidation"""
+    with db.get_db(write=True) as conn:
+        conn.execute(
+            "INSERT INTO beneficiaries (id, user_id, name, account_number, bank) VALUES (?, ?, ?, 'XXXX0000', 'SBI')",
+            (beneficiary_id, user_id, name)
+        )
+
+
+def test_misspelled_name_matches(seeded_db):
+    db = seeded_db
+    names = [row["name"] for row in db.find_beneficiaries_by_name("Prathap")]
+    assert set(names[:2]) == {"Pratap Kumar", "Pratap Singh"}
+
+
+def test_unchanged_snapshot_skips_sync(seeded_db, monkeypatch):
+    db = seeded_db
+    db.find_beneficiaries_by_name("Raj")
+    calls = []
+    monkeypatch.setattr(db.beneficiary_index, "apply", lambda *args: calls.append(args))
+    db.find_beneficiaries_by_name("Raj")
+    assert calls == []
+
+
+def test_sync_reads_only_new_rows(seeded_db, monkeypatch):
+    db = seeded_db
+    db.find_beneficiaries_by_name("Raj")
+    _insert(db, "ben_deepak", "Deepak Nair")
+    db.record_cache.invalidate("demo_user", "beneficiaries")
+
+    applied = []
+    original_apply = db.beneficiary_index.apply
+    monkeypatch.setattr(db.beneficiary_index, "apply",
+                        lambda user_id, new_rows, rows_by_id: applied.append(new_rows) or original_apply(user_id, new_rows, rows_by_id))
+    matches = db.find_beneficiaries_by_name("Dipak")
+    assert [row["id"] for row in applied[0]] == ["ben_deepak"]
+    assert matches[0]["id"] == "ben_deepak"
+
+
+def test_deleted_rows_leave_the_index(seeded_db):
+    db = seeded_db
+    assert db.find_beneficiaries_by_name("Raj Sharma")
+    with db.get_db(write=True) as conn:
+        conn.execute("DELETE FROM beneficiaries WHERE id = 'ben_raj_sharma'")
+    db.record_cache.invalidate("demo_user", "beneficiaries")
+    assert all(row["id"] != "ben_raj_sharma" for row in db.find_beneficiaries_by_name("Raj Sharma"))
+    assert "ben_raj_sharma" not in db.beneficiary_index._users["demo_user"].names
+
+
+def test_cold_user_is_indexed_on_first_search(seeded_db):
+    db = seeded_db
+    _insert(db, "ben_new_user", "Kavitha Iyer", user_id="new_user")
+    assert db.find_beneficiaries_by_name("Kavita", user_id="new_user")[0]["id"] == "ben_new_user"
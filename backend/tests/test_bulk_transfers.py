@@ -0,0 +1,39 @@
+"""
+Tests for execute_transfers_bulk
+"""
+import pytest
+
+
+def test_mixed_batch_applies_in_order(seeded_db):
+    db = seeded_db
+    start = db.get_account_balance("acc_current")
+    results = db.execute_transfers_bulk([
+        {"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": 1000},
+        {"from_account_id": "acc_current", "to_account_id": "acc_savings_primary", "amount": 500},
+        {"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": 10 ** 9},
+    ])
+    assert [r["success"] for r in results] == [True, True, False]
+    assert results[2]["error"].startswith("Insufficient balance")
+    assert db.get_account_balance("acc_current") == start - 1500
+
+
+@pytest.mark.parametrize("instruction, error", [
+    (None, "Invalid instruction"),
+    ("acc_current", "Invalid instruction"),
+    (["acc_current", "ben_raj_sharma", 100], "Invalid instruction"),
+    ({"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": True}, "Invalid amount"),
+    ({"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": float("inf")}, "Invalid amount"),
+    ({"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": float("nan")}, "Invalid amount"),
+    ({"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": "100"}, "Invalid amount"),
+    ({"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": -5}, "Invalid amount"),
+    ({"from_account_id": ["acc_current"], "to_beneficiary_id": "ben_raj_sharma", "amount": 100}, "Account not found"),
+    ({"from_account_id": "acc_current", "to_beneficiary_id": {"id": "ben_raj_sharma"}, "amount": 100}, "Invalid instruction"),
+])
+def test_malformed_instruction_fails_alone(seeded_db, instruction, error):
+    db = seeded_db
+    start = db.get_account_balance("acc_current")
+    good = {"from_account_id": "acc_current", "to_beneficiary_id": "ben_raj_sharma", "amount": 100}
+    results = db.execute_transfers_bulk([instruction, good])
+    assert results[0] == {"index": 0, "success": False, "error": error}
+    assert results[1]["success"]
+    assert db.get_account_balance("acc_current") == start - 100
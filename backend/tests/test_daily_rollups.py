@@ -0,0 +1,114 @@
+"""
+Tests that daily_account_rollups always equals the same sums taken over raw transactions
+"""
+from datetime import datetime
+
+import banking_tools
+import migrations
+
+RAW_ROLLUPS = """
+    SELECT t.account_id, t.date AS day,
+           SUM(CASE WHEN t.type = 'credit' THEN t.amount ELSE 0 END) AS credits,
+           SUM(CASE WHEN t.type = 'debit' THEN t.amount ELSE 0 END) AS debits,
+           COUNT(*) AS txn_count,
+           (SELECT last.balance_after FROM transactions last
+            WHERE last.account_id = t.account_id AND last.date = t.date
+            ORDER BY last.created_at DESC, last.id DESC LIMIT 1) AS closing_balance
+    FROM transactions t GROUP BY t.account_id, t.date ORDER BY t.account_id, t.date
+"""
+
+ALL_ACCOUNTS = ["acc_current", "acc_savings_emergency", "acc_savings_primary"]
+
+
+def assert_rollups_match_ledger(db):
+    with db.get_db() as conn:
+        raw = [dict(row) for row in conn.execute(RAW_ROLLUPS)]
+        rollups = [dict(row) for row in conn.execute(
+            "SELECT account_id, day, credits, debits, txn_count, closing_balance FROM daily_account_rollups ORDER BY account_id, day"
+        )]
+    assert rollups == raw
+    return raw
+
+
+def today_rollup(db, account_id):
+    today = datetime.now().strftime("%Y-%m-%d")
+    with db.get_db() as conn:
+        return dict(conn.execute(
+            "SELECT credits, debits, txn_count, closing_balance FROM daily_account_rollups WHERE account_id = ? AND day = ?",
+            (account_id, today)
+        ).fetchone())
+
+
+def test_seed_data_matches_ledger(seeded_db):
+    assert len(assert_rollups_match_ledger(seeded_db)) > 10
+
+
+def test_add_transaction_updates_todays_rollup(seeded_db):
+    db = seeded_db
+    db.add_transaction("acc_current", "credit", "Refund", 300, 500300)
+    db.add_transaction("acc_current", "debit", "Coffee", 120, 500180)
+    db.add_transaction("acc_current", "debit", "Lunch", 80, 500100)
+    assert today_rollup(db, "acc_current") == {"credits": 300, "debits": 200, "txn_count": 3, "closing_balance": 500100}
+    assert_rollups_match_ledger(db)
+
+
+def test_transfers_update_both_sides(seeded_db):
+    db = seeded_db
+    assert db.execute_own_account_transfer("acc_current", "acc_savings_primary", 500)["success"]
+    assert db.execute_own_account_transfer("acc_savings_primary", "acc_current", 200)["success"]
+    assert db.execute_transfer("acc_current", "ben_raj_sharma", 1000)["success"]
+    assert not db.execute_transfer("acc_current", "ben_raj_sharma", 10 ** 12)["success"]  # Writes nothing
+
+    current = today_rollup(db, "acc_current")
+    assert (current["credits"], current["debits"], current["txn_count"]) == (200, 1500, 3)
+    assert current["closing_balance"] == db.get_account_balance("acc_current")
+    savings = today_rollup(db, "acc_savings_primary")
+    assert (savings["credits"], savings["debits"], savings["txn_count"]) == (500, 200, 2)
+    assert savings["closing_balance"] == db.get_account_balance("acc_savings_primary")
+    assert_rollups_match_ledger(db)
+
+
+def test_migration_backfills_from_ledger(seeded_db):
+    db = seeded_db
+    db.execute_own_account_transfer("acc_current", "acc_savings_primary", 500)
+    with db.get_db(write=True) as conn:
+        conn.execute("DROP TABLE daily_account_rollups")
+    statements = next(statements for version, _, statements in migrations.MIGRATIONS if version == 5)
+    with db.get_db(write=True) as conn:
+        for statement in statements:
+            conn.execute(statement)
+    assert_rollups_match_ledger(db)
+
+
+def test_activity_summary_buckets_by_month(seeded_db):
+    db = seeded_db
+    db.add_transaction("acc_current", "debit", "Coffee", 120, 500180)
+    start, end = "2025-10-15", "2025-11-10"  # Crosses a month boundary mid-month
+    with db.get_db() as conn:
+        raw_months = [dict(row) for row in conn.execute(
+            """SELECT substr(date, 1, 7) AS month,
+                      SUM(CASE WHEN type = 'credit' THEN amount ELSE 0 END) AS credits,
+                      SUM(CASE WHEN type = 'debit' THEN amount ELSE 0 END) AS debits,
+                      COUNT(*) AS txn_count
+               FROM transactions WHERE date BETWEEN ? AND ? GROUP BY month ORDER BY month""",
+            (start, end)
+        )]
+    assert [month["month"] for month in raw_months] == ["2025-10", "2025-11"]
+
+    summary = db.get_account_activity_summary(ALL_ACCOUNTS, start, end)
+    assert summary["by_month"] == raw_months
+    assert summary["total_debits"] == sum(month["debits"] for month in raw_months)
+    assert summary["txn_count"] == sum(month["txn_count"] for month in raw_months)
+
+    spending = banking_tools.get_spending_summary(start_date=start, end_date=end)
+    assert [(m["month"], m["spent"], m["received"], m["transaction_count"]) for m in spending["by_month"]] == \
+        [(m["month"], m["debits"], m["credits"], m["txn_count"]) for m in raw_months]
+    assert spending["net"] == summary["total_credits"] - summary["total_debits"]
+
+
+def test_activity_summary_closing_balance_is_last_active_day(seeded_db):
+    db = seeded_db
+    raw = assert_rollups_match_ledger(db)
+    summary = db.get_account_activity_summary(["acc_current"], end_date="2025-11-10")
+    last = [row for row in raw if row["account_id"] == "acc_current" and row["day"] <= "2025-11-10"][-1]
+    assert summary["by_account"]["acc_current"]["closing_balance"] == last["closing_balance"]
@@ -0,0 +1,53 @@
+"""
+Tests for the pooled connection layer in db.py
+"""
+import threading
+
+import pytest
+
+
+def test_nested_read_joins_outer_write(seeded_db):
+    db = seeded_db
+    with db.get_db(write=True) as conn:
+        with db.get_db() as inner:
+            assert inner is conn
+            assert inner.in_transaction
+
+
+def test_write_nested_in_read_is_rejected(seeded_db):
+    db = seeded_db
+    with db.get_db():
+        with pytest.raises(RuntimeError):
+            with db.get_db(write=True):
+                pass
+    # The writer lock was never taken, so a later write still goes through
+    db.update_account_balance("acc_current", 1234)
+    assert db.get_account_balance("acc_current") == 1234
+
+
+def test_connections_are_pooled_per_thread(seeded_db):
+    db = seeded_db
+    with db.get_db() as first:
+        pass
+    with db.get_db() as second:
+        pass
+    assert first is second
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db._get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+
+def test_get_db_records_db_stage(seeded_db):
+    from instrumentation import stage_calls
+    db = seeded_db
+
+    def calls(name):
+        return stage_calls._children.get(("db", name, "ok"), 0)
+
+    before = calls("read"), calls("write_transaction"), calls("write_lock_wait")
+    db.get_account_balance("acc_current")  # Called directly, not through run_db
+    db.update_account_balance("acc_current", 1234)
+    assert (calls("read"), calls("write_transaction"), calls("write_lock_wait")) == tuple(n + 1 for n in before)
@@ -0,0 +1,67 @@
+"""
+Tests for transaction history pagination cursors
+"""
+import json
+
+import pytest
+
+import banking_tools
+from banking_tools import _b64decode, _b64encode, _decode_cursor, _encode_cursor, _navigate_history
+
+SESSION_ERROR = "No active transaction history session. Please request transaction history first."
+
+
+def _first_page(db):
+    account = db.get_account_by_id("acc_savings_primary")
+    return banking_tools._transaction_history_page(account)
+
+
+def test_cursor_round_trip_walks_pages(seeded_db):
+    first = _first_page(seeded_db)
+    second = _navigate_history(first["pagination"]["next_cursor"], "next")
+    assert second["pagination"]["current_page"] == 2
+    back = _navigate_history(second["pagination"]["previous_cursor"], "prev")
+    assert back["transactions"] == first["transactions"]
+
+
+@pytest.mark.parametrize("patch", [
+    {"k": "not-a-list"},
+    {"k": ["2025-11-20 00:00:00"]},
+    {"k": ["2025-11-20 00:00:00", "7"]},
+    {"k": [1, 2]},
+    {"p": "2"},
+    {"p": True},
+    {"p": 0},
+    {"a": ["acc_savings_primary"]},
+    {"s": 20251101},
+    {"d": "sideways"},
+])
+def test_badly_typed_cursor_fields_are_rejected(seeded_db, patch):
+    first = _first_page(seeded_db)
+    state = _decode_cursor(first["pagination"]["next_cursor"])
+    assert state is not None
+    cursor = _encode_cursor({**state, **patch})  # Validly signed, so only the shape checks apply
+    assert _navigate_history(cursor, "next") == {"error": SESSION_ERROR}
+
+
+def test_tampered_cursor_is_rejected(seeded_db):
+    cursor = _first_page(seeded_db)["pagination"]["next_cursor"]
+    payload, signature = cursor.split(".")
+    state = json.loads(_b64decode(payload))
+    state["a"] = "acc_current"
+    tampered = f"{_b64encode(json.dumps(state).encode())}.{signature}"
+    assert _navigate_history(tampered, "next") == {"error": SESSION_ERROR}
+    assert _navigate_history("garbage", "next") == {"error": SESSION_ERROR}
+    assert _navigate_history(payload, "next") == {"error": SESSION_ERROR}
+
+
+def test_cursor_for_another_users_account_finds_nothing(seeded_db):
+    db = seeded_db
+    with db.get_db(write=True) as conn:
+        conn.execute(
+            "INSERT INTO accounts (id, user_id, name, type, account_number, balance, bank) "
+            "VALUES ('acc_other', 'other_user', 'Other', 'savings', 'XXXX0000', 100, 'Grace Hopper Bank')"
+        )
+    state = _decode_cursor(_first_page(db)["pagination"]["next_cursor"])
+    cursor = _encode_cursor({**state, "a": "acc_other"})
+    assert "transactions" not in _navigate_history(cursor, "next")
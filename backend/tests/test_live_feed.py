@@ -0,0 +1,79 @@
+"""
+Tests for the live dashboard feed tailing the shared audit DB
+"""
+import asyncio
+from datetime import datetime
+
+import live_feed as live_feed_module
+
+
+def _row(action="login"):
+    return (datetime.now().isoformat(), "demo_user", action, None, "success", None, None, None, None, None)
+
+
+def test_tail_reads_rows_after_an_id(audit_db):
+    audit_logger = audit_db
+    audit_logger.audit_writer._write_batch([(_row(), None)] * 3)
+    rows = audit_logger.get_audit_logs_after(0)
+    assert len(rows) == 3 and rows == sorted(rows, key=lambda row: row["id"])
+    assert audit_logger.get_audit_logs_after(rows[0]["id"]) == rows[1:]
+    assert audit_logger.latest_audit_id() == rows[-1]["id"]
+
+
+def test_feed_sees_rows_written_by_another_worker(audit_db, monkeypatch):
+    audit_logger = audit_db
+    monkeypatch.setattr(live_feed_module, "LIVE_FEED_POLL_SECONDS", 0.05)
+    other_worker = audit_logger.AuditWriter(db_path=audit_logger.AUDIT_DB)
+    monkeypatch.setattr(audit_logger, "_notify_listeners", lambda rows: None)  # Another process: no local wake-up
+
+    async def scenario():
+        feed = live_feed_module.LiveFeed()
+        await feed.start()
+        stream = feed.stream()
+        await stream.__anext__()  # Snapshot
+        other_worker._write_batch([(_row("transfer_initiated"), None)])
+        message = await asyncio.wait_for(stream.__anext__(), timeout=2)
+        await stream.aclose()
+        await feed.stop()
+        return message
+
+    message = asyncio.run(scenario())
+    assert message.startswith("event: audit") and "transfer_initiated" in message
+
+
+def test_metrics_snapshot_covers_the_returned_id(audit_db):
+    audit_logger = audit_db
+    audit_logger.audit_writer._write_batch([(_row("transfer_completed"), None)] * 2)
+    metrics, latest = audit_logger.get_metrics_snapshot()
+    assert (metrics, latest) == (audit_logger.get_metrics(), audit_logger.latest_audit_id())
+    assert metrics["total_transactions"] == 2
+
+
+def test_idle_feed_does_not_poll_and_catches_up_on_subscribe(audit_db, monkeypatch):
+    audit_logger = audit_db
+    monkeypatch.setattr(live_feed_module, "LIVE_FEED_POLL_SECONDS", 0.01)
+    polls = []
+    real_tail = live_feed_module.get_audit_logs_after
+    monkeypatch.setattr(live_feed_module, "get_audit_logs_after", lambda *args: polls.append(args) or real_tail(*args))
+    monkeypatch.setattr(audit_logger, "_notify_listeners", lambda rows: None)
+
+    async def scenario():
+        feed = live_feed_module.LiveFeed()
+        await feed.start()
+        audit_logger.audit_writer._write_batch([(_row("transfer_completed"), None)] * 3)  # Nobody watching
+        await asyncio.sleep(0.1)
+        idle_polls = len(polls)
+
+        stream = feed.stream()
+        snapshot = await stream.__anext__()
+        audit_logger.audit_writer._write_batch([(_row("transfer_completed"), None)])
+        message = await asyncio.wait_for(stream.__anext__(), timeout=2)
+        await stream.aclose()
+        await feed.stop()
+        return idle_polls, snapshot, message, feed._metrics
+
+    idle_polls, snapshot, message, metrics = asyncio.run(scenario())
+    assert idle_polls == 0
+    assert '"total_transactions": 3' in snapshot
+    assert message.startswith("event: audit") and message.count('"action": "transfer_completed"') == 1
+    assert metrics == audit_logger.get_metrics()  # Idle rows counted once, in the snapshot
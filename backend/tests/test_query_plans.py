@@ -0,0 +1,61 @@
+"""
+EXPLAIN QUERY PLAN checks for the history and lookup queries
+Captures the SQL the db functions actually run and asserts it is served by the intended indexes
+"""
+import pytest
+
+
+def _plans(db, call):
+    """Run call() with statement tracing on, return the query plan text of every SELECT it issued"""
+    conn = db._get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    plans = []
+    for sql in statements:
+        if sql.lstrip().upper().startswith("SELECT"):
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            plans.append(" | ".join(row["detail"] for row in rows))
+    assert plans, "no SELECT was traced"
+    return plans
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"after": ("2025-11-20 00:00:00", 10)},
+    {"before": ("2025-11-20 00:00:00", 10)},
+    {"start_date": "2025-11-01", "end_date": "2025-11-30"},
+])
+def test_history_pages_use_covering_index(seeded_db, kwargs):
+    db = seeded_db
+    for plan in _plans(db, lambda: db.get_transactions_page("acc_savings_primary", 5, **kwargs)):
+        assert "USING COVERING INDEX idx_transactions_account_created" in plan
+        assert "TEMP B-TREE" not in plan  # ORDER BY satisfied by the index
+
+
+def test_recent_transactions_use_covering_index(seeded_db):
+    db = seeded_db
+    for plan in _plans(db, lambda: db.get_transactions("acc_savings_primary", 10)):
+        assert "USING COVERING INDEX idx_transactions_account_created" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("kind, index", [
+    ("accounts", "idx_accounts_user"),
+    ("beneficiaries", "idx_beneficiaries_user"),
+])
+def test_user_lookups_use_user_index(seeded_db, kind, index):
+    db = seeded_db
+    for plan in _plans(db, lambda: db._cached_records(kind, "demo_user")):
+        assert f"USING INDEX {index}" in plan
+
+
+def test_activity_summary_reads_rollups_by_primary_key(seeded_db):
+    db = seeded_db
+    call = lambda: db.get_account_activity_summary(["acc_savings_primary", "acc_current"], "2025-11-01", "2025-11-30")
+    for plan in _plans(db, call):
+        assert "daily_account_rollups USING PRIMARY KEY" in plan
+        assert "SCAN" not in plan
@@ -0,0 +1,49 @@
+"""
+Tests for db.RecordCache invalidation bookkeeping
+"""
+from db import RecordCache
+
+
+def test_invalidating_uncached_users_keeps_no_state():
+    cache = RecordCache(ttl=30, max_users=10)
+    for i in range(1000):
+        cache.invalidate(f"user_{i}", "accounts")
+    assert cache._generations == {}
+    assert cache._filling == {}
+
+
+def test_fill_started_before_invalidate_is_discarded():
+    cache = RecordCache(ttl=30, max_users=10)
+    rows, token = cache.get("alice", "accounts")
+    assert rows is None
+    cache.invalidate("alice", "accounts")  # Write commits while the fill is reading
+    cache.put("alice", "accounts", {"a": {"balance": 1}}, token)
+    assert cache.get("alice", "accounts")[0] is None
+    assert cache._generations == {}  # Dropped once the last fill finished
+
+
+def test_global_invalidate_stops_fills_for_uncached_users():
+    cache = RecordCache(ttl=30, max_users=10)
+    _, token = cache.get("bob", "accounts")
+    cache.invalidate(None, "accounts")
+    cache.put("bob", "accounts", {"b": {"balance": 1}}, token)
+    assert cache.get("bob", "accounts")[0] is None
+
+
+def test_global_invalidate_drops_cached_rows():
+    cache = RecordCache(ttl=30, max_users=10)
+    _, token = cache.get("carol", "accounts")
+    cache.put("carol", "accounts", {"c": {}}, token)
+    _, token = cache.get("carol", "beneficiaries")
+    cache.put("carol", "beneficiaries", {"x": {}}, token)
+    cache.invalidate(None, "accounts")
+    assert cache.get("carol", "accounts")[0] is None
+    assert cache.get("carol", "beneficiaries")[0] == {"x": {}}
+
+
+def test_abandoned_fill_releases_bookkeeping():
+    cache = RecordCache(ttl=30, max_users=10)
+    cache.get("dave", "accounts")
+    cache.invalidate("dave")
+    cache.abandon("dave")
+    assert cache._filling == {} and cache._generations == {}
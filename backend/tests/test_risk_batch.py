@@ -0,0 +1,97 @@
+"""
+Tests for vectorized batch risk scoring against the per-transfer risk_monitor path
+"""
+import types
+
+import numpy as np
+import pytest
+
+import risk_batch
+import risk_monitor
+from risk_monitor import SharedVelocity, VELOCITY_LIMITS
+from state_store import MemoryStateStore
+
+START = 1_700_000_000.0
+
+
+def score_one_by_one(user_ids, amounts, beneficiary_ids, timestamps, known_pairs, monkeypatch):
+    """Replay transfers in time order through analyze_transaction, as start_otp_flow would"""
+    clock = [0.0]
+    monkeypatch.setattr(risk_monitor, "time", types.SimpleNamespace(time=lambda: clock[0]))
+    monkeypatch.setattr(risk_monitor, "velocity", SharedVelocity(MemoryStateStore(), {label: window for label, (window, _) in VELOCITY_LIMITS.items()}))
+    paid = set(known_pairs)
+    monkeypatch.setattr(risk_monitor, "get_beneficiary_history", lambda user_id, ben: {"transfer_count": 1} if (user_id, ben) in paid else None)
+
+    levels = [None] * len(amounts)
+    for i in sorted(range(len(amounts)), key=lambda i: timestamps[i]):
+        clock[0] = timestamps[i]
+        risk_monitor.record_transfer_initiated(user_ids[i], timestamps[i])
+        transfer_type = "beneficiary" if beneficiary_ids[i] else "own_account"
+        levels[i] = risk_monitor.analyze_transaction(user_ids[i], amounts[i], beneficiary_ids[i], transfer_type)["overall_risk"]
+        if beneficiary_ids[i]:
+            paid.add((user_ids[i], beneficiary_ids[i]))
+    return levels
+
+
+def random_transfers(rng, count, users=2):
+    """Bursty activity over about two days, with amounts around every threshold"""
+    user_ids = [f"user_{n}" for n in rng.integers(0, users, count)]
+    beneficiary_ids = [None if n == 0 else f"ben_{n}" for n in rng.integers(0, 6, count)]
+    amounts = rng.choice([500, 24999, 25000, 25001, 49999, 50000, 90000], count).tolist()
+    gaps = rng.choice([7.0, 45.0, 120.0, 299.0, 301.0, 900.0, 12000.0], count, p=[.2, .2, .2, .1, .1, .1, .1])
+    timestamps = (START + np.cumsum(gaps) + rng.random(count)).tolist()  # Fractions keep times distinct
+    order = rng.permutation(count)
+    return [[column[i] for i in order] for column in (user_ids, amounts, beneficiary_ids, timestamps)]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_batch_matches_analyze_transaction(seeded_db, monkeypatch, seed):
+    rng = np.random.default_rng(seed)
+    user_ids, amounts, beneficiary_ids, timestamps = random_transfers(rng, 400)
+    known = [("user_0", "ben_1"), ("user_1", "ben_3")]
+
+    batch = risk_batch.score_batch(user_ids, amounts, beneficiary_ids, timestamps, known_pairs=known)
+    expected = score_one_by_one(user_ids, amounts, beneficiary_ids, timestamps, known, monkeypatch)
+
+    assert batch["risk_level"].tolist() == expected
+    assert set(expected) == {"LOW", "MEDIUM", "HIGH"}  # Every level exercised
+    for label in VELOCITY_LIMITS:
+        assert batch["flags"][f"rapid_transfers_{label}"].any()
+
+
+def test_empty_batch():
+    result = risk_batch.score_batch([], [], [], [], known_pairs=[])
+    assert result["risk_level"].tolist() == [] and result["level_code"].dtype == np.int8
+    assert {name: flags.tolist() for name, flags in result["flags"].items()} == {rule["name"]: [] for rule in risk_batch.DEFAULT_RULES}
+
+
+def test_single_user_single_transfer(seeded_db, monkeypatch):
+    args = (["alice"], [30000], ["ben_1"], [START])
+    assert risk_batch.score_batch(*args, known_pairs=[])["risk_level"].tolist() == ["MEDIUM"]
+    assert score_one_by_one(*args, [], monkeypatch) == ["MEDIUM"]
+
+
+def test_unsorted_input_scores_like_sorted():
+    rng = np.random.default_rng(7)
+    user_ids, amounts, beneficiary_ids, timestamps = random_transfers(rng, 200)
+    order = np.argsort(timestamps)
+    shuffled = risk_batch.score_batch(user_ids, amounts, beneficiary_ids, timestamps, known_pairs=[])
+    in_order = risk_batch.score_batch(*[[column[i] for i in order] for column in (user_ids, amounts, beneficiary_ids, timestamps)], known_pairs=[])
+    assert shuffled["risk_level"][order].tolist() == in_order["risk_level"].tolist()
+
+
+@pytest.mark.parametrize("third, flagged", [(299.0, True), (300.0, False)])
+def test_window_boundary(seeded_db, monkeypatch, third, flagged):
+    """A transfer exactly one window earlier has slid out: the window is (t - 300, t]"""
+    window, max_count = VELOCITY_LIMITS["5m"]
+    assert (window, max_count) == (300, 3)
+    args = (["alice"] * 3, [100] * 3, ["ben_1"] * 3, [START, START + 150, START + third])
+    batch = risk_batch.score_batch(*args, known_pairs=[("alice", "ben_1")])
+    assert batch["flags"]["rapid_transfers_5m"].tolist() == [False, False, flagged]
+    assert score_one_by_one(*args, [("alice", "ben_1")], monkeypatch)[2] == ("MEDIUM" if flagged else "LOW")
+
+
+def test_users_do_not_share_windows():
+    args = (["alice", "bob", "alice", "bob", "alice"], [100] * 5, ["ben_1"] * 5, [START + n for n in range(5)])
+    flags = risk_batch.score_batch(*args, known_pairs=[("alice", "ben_1"), ("bob", "ben_1")])["flags"]
+    assert flags["rapid_transfers_5m"].tolist() == [False, False, False, False, True]
@@ -0,0 +1,70 @@
+"""
+Tests for the SQLite state store schema
+"""
+import sqlite3
+import time
+
+from state_store import SQLiteStateStore, STATE_SCHEMA_VERSION
+
+
+def test_version_1_file_is_upgraded_in_place(tmp_path):
+    path = str(tmp_path / "state.db")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE state (
+            id INTEGER PRIMARY KEY,
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL,
+            UNIQUE (namespace, key)
+        );
+        CREATE INDEX idx_state_expires ON state (expires_at) WHERE expires_at IS NOT NULL;
+    """)
+    old.executemany("INSERT INTO state (namespace, key, value, expires_at) VALUES ('otp', ?, ?, ?)", [
+        ("live", '"123"', time.time() + 300),
+        ("gone", '"456"', time.time() - 1)
+    ])
+    old.commit()
+    old.close()
+
+    store = SQLiteStateStore(path)
+    assert store.get("otp", "live") == "123"
+    assert store.get("otp", "gone") is None
+    store.set("otp", "live", "789")
+    assert store.pop("otp", "live") == "789"
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == STATE_SCHEMA_VERSION
+    assert "id" not in {row[1] for row in conn.execute("PRAGMA table_info(state)")}
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'state'")}
+    assert "idx_state_expires" in indexes
+
+
+def test_second_store_on_a_current_file_skips_migration(tmp_path):
+    path = str(tmp_path / "state.db")
+    SQLiteStateStore(path).set("otp", "k", 1, ttl=60)
+    assert SQLiteStateStore(path).get("otp", "k") == 1
+
+
+def test_version_2_events_table_gains_ids(tmp_path):
+    path = str(tmp_path / "state.db")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE state (namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL,
+                            PRIMARY KEY (namespace, key)) WITHOUT ROWID;
+        CREATE TABLE state_events (namespace TEXT NOT NULL, key TEXT NOT NULL, at REAL NOT NULL, expires_at REAL NOT NULL);
+        CREATE INDEX idx_state_events_expires ON state_events (expires_at);
+        PRAGMA user_version = 2;
+    """)
+    now = time.time()
+    old.executemany("INSERT INTO state_events VALUES ('transfer_velocity/old', 'alice', ?, ?)",
+                    [(now - 10, now + 100), (now - 5, now + 100), (now - 99999, now - 1)])
+    old.commit()
+    old.close()
+
+    store = SQLiteStateStore(path)
+    rows = store.events_after("transfer_velocity/", 0)
+    assert [row[0] for row in rows] == [1, 2]  # Expired event dropped, ids in time order
+    store.add_events("transfer_velocity/new", [("bob", now)], ttl=60)
+    assert [row[2] for row in store.events_after("transfer_velocity/", 2)] == ["bob"]
@@ -0,0 +1,177 @@
+"""
+Tests for /api/text turns
+"""
+import asyncio
+import threading
+
+from db_executor import submit_db
+
+
+def test_session_save_failure_after_reply_is_not_an_error(server_client, monkeypatch):
+    import server
+    from agent_registry import AgentRegistry
+
+    class Agent:
+        messages = []
+
+        async def invoke_async(self, text):
+            return "Your balance is ₹1,000."
+
+    def broken_save(user_id, agent):
+        raise OSError("database is locked")
+
+    monkeypatch.setattr(server, "agent_registry", AgentRegistry(lambda user_id: Agent()))
+    monkeypatch.setattr(server.session_store, "save", broken_save)
+    response = server_client.post("/api/text", params={"text": "balance", "userId": "alice"})
+    assert response.status_code == 200
+    assert response.json()["text"] == "Your balance is ₹1,000."
+
+
+class _TransferringAgent:
+    """Stub agent: "pay N" initiates a transfer of N through the real tool (in a worker thread, as strands does)"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def invoke_async(self, text):
+        import banking_tools
+        await asyncio.sleep(0)  # Let other requests interleave
+        if text.startswith("pay "):
+            amount = int(text.split()[1])
+            await asyncio.to_thread(banking_tools.initiate_transfer, from_account_id="acc_current",
+                                    to_beneficiary_id="ben_raj_sharma", amount=amount)
+            return f"Sending ₹{amount}."
+        return "Nothing to do."
+
+
+def test_concurrent_users_get_only_their_own_transfers(server_client, monkeypatch):
+    import httpx
+    import server
+    from agent_registry import AgentRegistry
+
+    monkeypatch.setattr(server, "agent_registry", AgentRegistry(lambda user_id: _TransferringAgent()))
+    users = 300
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/text", params={"text": f"pay {100 + i}" if i % 3 else "hello", "userId": f"user_{i}"})
+                for i in range(users)
+            ))
+
+    responses = asyncio.run(scenario())
+    session_ids = set()
+    for i, response in enumerate(responses):
+        body = response.json()
+        if i % 3:
+            assert body["requiresOTP"] is True
+            pending = server.pending_otps.get(body["sessionId"])
+            assert pending["details"]["amount"] == 100 + i
+            session_ids.add(body["sessionId"])
+        else:
+            assert "requiresOTP" not in body and body["text"] == "Nothing to do."
+    assert len(session_ids) == users - len(range(0, users, 3))
+
+
+def test_stream_disconnect_discards_agent_and_cancels_speech(server_client, monkeypatch):
+    import server
+    from agent_registry import AgentRegistry
+
+    polly_release = threading.Event()
+
+    class StreamingAgent:
+        messages = []
+
+        async def stream_async(self, text):
+            self.messages.append({"role": "user", "content": text})
+            yield {"data": "First sentence of the reply. "}
+            await asyncio.sleep(30)  # Model still generating when the client leaves
+
+    registry = AgentRegistry(lambda user_id: StreamingAgent())
+    monkeypatch.setattr(server, "agent_registry", registry)
+    monkeypatch.setattr(server, "text_to_speech", lambda text, language="en": polly_release.wait(5))
+
+    async def scenario():
+        stream = server.stream_text_events("hi", "alice", "en")
+        assert (await stream.__anext__()).startswith("event: delta")
+        await stream.aclose()  # Client disconnects
+        await asyncio.sleep(0.05)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    try:
+        leftover = asyncio.run(scenario())
+    finally:
+        polly_release.set()
+    assert leftover == []
+    submit_db(lambda: None).result(5)  # Discard is queued on the DB executor
+    assert "alice" not in registry
+    assert registry.stats()["discarded"] == 1
+
+
+def test_stream_cancelled_during_acquire_leaves_no_pin(server_client, monkeypatch):
+    import server
+    from agent_registry import AgentRegistry
+
+    building, finish = threading.Event(), threading.Event()
+
+    class Agent:
+        messages = []
+
+    def slow_factory(user_id):
+        building.set()
+        finish.wait(5)
+        return Agent()
+
+    registry = AgentRegistry(slow_factory)
+    monkeypatch.setattr(server, "agent_registry", registry)
+
+    async def scenario():
+        stream = server.stream_text_events("hi", "alice", "en")
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.to_thread(building.wait, 5)  # acquire is running in the executor
+        first.cancel()  # Client disconnects
+        await asyncio.gather(first, return_exceptions=True)
+        finish.set()
+        for _ in range(100):
+            if "alice" in registry:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        finish.set()
+    assert "alice" in registry
+    assert registry.stats()["in_use"] == 0
+
+
+def test_release_and_eviction_hooks_run_off_the_event_loop(server_client, monkeypatch):
+    import httpx
+    import server
+    from agent_registry import AgentRegistry
+
+    class Agent:
+        messages = []
+
+        async def invoke_async(self, text):
+            await asyncio.sleep(0.05)  # Both turns in flight, so nothing can be evicted on acquire
+            return "Done."
+
+    hook_threads = []
+    registry = AgentRegistry(lambda user_id: Agent(), max_agents=1)
+    registry.add_evict_hook(lambda user_id, agent, reason: hook_threads.append((reason, threading.current_thread().name)))
+    monkeypatch.setattr(server, "agent_registry", registry)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/text", params={"text": "hi", "userId": user_id}) for user_id in ("alice", "bob")
+            ))
+
+    assert all(response.status_code == 200 for response in asyncio.run(scenario()))
+    assert len(hook_threads) == 1 and hook_threads[0][0] == "lru"  # Evicted by the second release
+    assert hook_threads[0][1].startswith("finspeak-db")
+    assert registry.stats()["in_use"] == 0
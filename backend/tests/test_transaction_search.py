@@ -0,0 +1,86 @@
+"""
+Tests for full-text transaction search and the triggers that keep transactions_fts in sync
+"""
+import migrations
+
+
+def descriptions(result):
+    return sorted(match["description"] for match in result["matches"])
+
+
+def test_new_transactions_are_searchable_until_deleted(seeded_db):
+    db = seeded_db
+    assert db.search_transactions("kaveri")["total_matches"] == 0
+    db.add_transaction("acc_current", "debit", "Kaveri Bakery", 640, 500000)
+    db.execute_transfer("acc_current", "ben_raj_sharma", 1500)
+    assert descriptions(db.search_transactions("kaveri")) == ["Kaveri Bakery"]
+    assert descriptions(db.search_transactions("transfer to raj sharma")) == ["Transfer to Raj Sharma"]
+
+    with db.get_db(write=True) as conn:
+        conn.execute("DELETE FROM transactions WHERE description = 'Kaveri Bakery'")
+    assert db.search_transactions("kaveri") == {"matches": [], "total_matches": 0, "total_debits": 0, "total_credits": 0}
+
+
+def test_updated_description_is_reindexed(seeded_db):
+    db = seeded_db
+    db.add_transaction("acc_current", "debit", "Kaveri Bakery", 640, 500000)
+    with db.get_db(write=True) as conn:
+        conn.execute("UPDATE transactions SET description = 'Dominos Pizza' WHERE description = 'Kaveri Bakery'")
+    assert db.search_transactions("kaveri")["total_matches"] == 0
+    assert descriptions(db.search_transactions("dominos")) == ["Dominos Pizza"]
+
+
+def test_migration_indexes_existing_rows(seeded_db):
+    db = seeded_db
+    with db.get_db(write=True) as conn:
+        for trigger in ("transactions_fts_ai", "transactions_fts_ad", "transactions_fts_au"):
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE transactions_fts")
+    db.add_transaction("acc_current", "debit", "Kaveri Bakery", 640, 500000)  # Written before the index exists
+
+    statements = next(statements for version, _, statements in migrations.MIGRATIONS if version == 4)
+    with db.get_db(write=True) as conn:
+        for statement in statements:
+            conn.execute(statement)
+    assert descriptions(db.search_transactions("kaveri")) == ["Kaveri Bakery"]
+    assert db.search_transactions("uber")["total_matches"] > 0
+
+
+def test_totals_cover_every_match(seeded_db):
+    db = seeded_db
+    with db.get_db() as conn:
+        debits, count = conn.execute(
+            """SELECT SUM(t.amount), COUNT(*) FROM transactions t JOIN accounts a ON a.id = t.account_id
+               WHERE a.user_id = 'demo_user' AND t.description LIKE '%uber%' AND t.type = 'debit'"""
+        ).fetchone()
+    result = db.search_transactions("uber", limit=2)
+    assert len(result["matches"]) == 2
+    assert (result["total_matches"], result["total_debits"], result["total_credits"]) == (count, debits, 0)
+    assert db.search_transactions("uber", account_id="acc_current")["total_matches"] < count
+
+
+def test_query_syntax_is_neutralised(seeded_db):
+    db = seeded_db
+    db.add_transaction("acc_current", "debit", "Near Hotel", 100, 500000)
+    uber = db.search_transactions("uber")["total_matches"]
+    for query in ('"uber', 'uber"', "uber*", "*uber", "(uber", "uber:", "^uber"):
+        assert db.search_transactions(query)["total_matches"] == uber, query
+    for query in ("uber OR swiggy", "uber AND NOT ride", "NOT"):
+        assert "error" not in db.search_transactions(query), query  # Operators are plain words
+    assert descriptions(db.search_transactions("NEAR")) == ["Near Hotel"]  # A word, not the NEAR operator
+    assert descriptions(db.search_transactions("NEAR(hotel)")) == ["Near Hotel"]
+    assert db.search_transactions("ub")["total_matches"] == uber  # Prefix match
+
+
+def test_empty_query_matches_nothing(seeded_db):
+    db = seeded_db
+    for query in ("", "   ", '"*"', "-"):
+        assert db.search_transactions(query) == {"matches": [], "total_matches": 0, "total_debits": 0, "total_credits": 0}
+
+
+def test_malformed_match_returns_error(seeded_db, monkeypatch):
+    db = seeded_db
+    monkeypatch.setattr(db, "_fts_match_expression", lambda query: '"uber')
+    result = db.search_transactions("uber")
+    assert result["matches"] == [] and result["total_matches"] == 0
+    assert "uber" in result["error"]
@@ -0,0 +1,114 @@
+"""
+Concurrent transfer stress test: no lost updates and no overdrafts
+Threads share the in-process writer lock; separate processes only have SQLite's own locking
+"""
+import multiprocessing
+import os
+import threading
+
+ACCOUNT = "acc_current"
+BENEFICIARY = "ben_raj_sharma"
+AMOUNT = 700
+
+
+def _transfer_many(count, results):
+    import db
+    for _ in range(count):
+        results.append(db.execute_transfer(ACCOUNT, BENEFICIARY, AMOUNT)["success"])
+
+
+def _process_worker(workdir, count, queue):
+    os.chdir(workdir)
+    results = []
+    _transfer_many(count, results)
+    queue.put(results)
+
+
+def _set_balance(db, balance):
+    with db.get_db(write=True) as conn:
+        conn.execute("UPDATE accounts SET balance = ? WHERE id = ?", (balance, ACCOUNT))
+    db.record_cache.invalidate(None)
+
+
+def _assert_consistent(db, start_balance, successes):
+    balance = db.get_account_balance(ACCOUNT)
+    assert balance >= 0
+    assert balance == start_balance - successes * AMOUNT  # No lost updates
+    with db.get_db() as conn:
+        debits = conn.execute(
+            "SELECT COUNT(*) AS n, MIN(balance_after) AS low FROM transactions "
+            "WHERE account_id = ? AND description = 'Transfer to Raj Sharma'", (ACCOUNT,)
+        ).fetchone()
+        rollup = conn.execute(
+            "SELECT SUM(debits) AS debits FROM daily_account_rollups WHERE account_id = ? AND day = date('now', 'localtime')",
+            (ACCOUNT,)
+        ).fetchone()
+    assert debits["n"] == successes
+    assert debits["low"] == balance
+    assert rollup["debits"] == successes * AMOUNT
+
+
+def test_parallel_threads_never_overdraw(seeded_db):
+    db = seeded_db
+    start_balance = 50 * AMOUNT + 300  # Room for exactly 50 of the 160 attempts
+    _set_balance(db, start_balance)
+
+    results = []
+    threads = [threading.Thread(target=_transfer_many, args=(20, results)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 160
+    assert sum(results) == 50
+    _assert_consistent(db, start_balance, sum(results))
+
+
+def test_mixed_writers_keep_ledger_balanced(seeded_db):
+    db = seeded_db
+    totals_before = sum(acc["balance"] for acc in db.get_all_accounts())
+
+    def own_transfers():
+        for i in range(30):
+            db.execute_own_account_transfer("acc_savings_primary", "acc_current", 100 + i)
+            db.execute_own_account_transfer("acc_current", "acc_savings_primary", 100 + i)
+
+    def bulk_transfers():
+        for _ in range(10):
+            db.execute_transfers_bulk([
+                {"from_account_id": "acc_savings_emergency", "to_account_id": "acc_current", "amount": 50},
+                {"from_account_id": "acc_current", "to_account_id": "acc_savings_emergency", "amount": 50},
+            ])
+
+    threads = [threading.Thread(target=own_transfers) for _ in range(3)] + \
+              [threading.Thread(target=bulk_transfers) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.record_cache.invalidate(None)
+    # Own-account transfers move money without creating or destroying it
+    assert sum(acc["balance"] for acc in db.get_all_accounts()) == totals_before
+
+
+def test_parallel_processes_never_overdraw(seeded_db, tmp_path):
+    db = seeded_db
+    start_balance = 30 * AMOUNT + 100  # Room for 30 of the 80 attempts
+    _set_balance(db, start_balance)
+    db.close_all_connections()
+
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=_process_worker, args=(str(tmp_path), 20, queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    results = [ok for _ in workers for ok in queue.get(timeout=60)]
+    for worker in workers:
+        worker.join()
+
+    assert len(results) == 80
+    assert sum(results) == 30
+    db.record_cache.invalidate(None)
+    _assert_consistent(db, start_balance, sum(results))
@@ -0,0 +1,76 @@
+"""
+Tests for transfer velocity checks across workers
+"""
+import time
+
+import risk_monitor
+from risk_monitor import SharedVelocity, VelocityTracker
+from state_store import MemoryStateStore, SQLiteStateStore
+
+WINDOWS = {label: window for label, (window, _) in risk_monitor.VELOCITY_LIMITS.items()}
+
+
+def test_checks_never_touch_the_store(tmp_path, monkeypatch):
+    store = SQLiteStateStore(str(tmp_path / "state.db"))
+    monkeypatch.setattr(store, "events_after", None)  # Any store read on the check path would fail
+    monkeypatch.setattr(store, "add_events", None)
+    worker = SharedVelocity(store, WINDOWS)
+    monkeypatch.setattr(risk_monitor, "velocity", worker)
+    for _ in range(3):
+        risk_monitor.record_transfer_initiated("alice")
+    assert risk_monitor.check_rapid_transfers("alice")["reason"] == "3 transfers in 5 minutes"
+
+
+def test_workers_see_each_other_after_sync(tmp_path, monkeypatch):
+    path = str(tmp_path / "state.db")
+    worker_a, worker_b = SharedVelocity(SQLiteStateStore(path), WINDOWS), SharedVelocity(SQLiteStateStore(path), WINDOWS)
+    monkeypatch.setattr(risk_monitor, "velocity", worker_a)
+    for _ in range(2):
+        risk_monitor.record_transfer_initiated("alice")
+    worker_b.record("alice")  # Third transfer lands on another worker
+    assert risk_monitor.check_rapid_transfers("alice") is None  # Not synced yet
+
+    worker_b.sync()
+    assert worker_a.sync() == 1
+    assert risk_monitor.check_rapid_transfers("alice")["reason"] == "3 transfers in 5 minutes"
+    assert worker_b.sync() == 2
+    assert worker_b.counts("alice")["5m"] == 3
+    assert worker_a.sync() == 0  # Nothing applied twice
+
+
+def test_new_worker_warms_from_the_store(tmp_path):
+    path = str(tmp_path / "state.db")
+    old = SharedVelocity(SQLiteStateStore(path), WINDOWS)
+    now = time.time()
+    for age in (60, 1800, 7200):
+        old.record("bob", now - age)
+    old.sync()
+    restarted = SharedVelocity(SQLiteStateStore(path), WINDOWS)
+    restarted.sync()
+    assert restarted.counts("bob") == {"5m": 1, "1h": 2, "24h": 3}
+
+
+def test_memory_backend_keeps_nothing_to_publish():
+    worker = SharedVelocity(MemoryStateStore(), WINDOWS)
+    worker.record("carol")
+    assert worker.sync() == 0 and worker._unpublished == []
+
+
+def test_late_events_count_in_time_order():
+    tracker = VelocityTracker(WINDOWS)
+    now = time.time()
+    tracker.record("dave", now - 10)
+    tracker.record("dave", now - 4000)  # Arrives late from another worker
+    tracker.record("dave", now - 100)
+    assert tracker.counts("dave", now) == {"5m": 2, "1h": 2, "24h": 3}
+    tracker.sweep(now + 90000)
+    assert tracker._users == {}
+
+
+def test_limits_come_from_config(monkeypatch):
+    monkeypatch.setattr(risk_monitor, "velocity", SharedVelocity(MemoryStateStore(), WINDOWS))
+    monkeypatch.setitem(risk_monitor.VELOCITY_LIMITS, "1h", (3600, 2))
+    now = time.time()
+    risk_monitor.record_transfer_initiated("erin", now - 1200)
+    risk_monitor.record_transfer_initiated("erin", now - 600)
+    assert risk_monitor.check_rapid_transfers("erin")["reason"] == "2 transfers in 1 hour"
@@ -0,0 +1,54 @@
+"""
+Tests for /api/verify-otp around the committed transfer
+"""
+OTP = "482913"
+
+
+def _pending(server_client, session_id="txn_test", amount=1500):
+    import server
+    details = {
+        "transfer_type": "beneficiary",
+        "from_account_id": "acc_current",
+        "to_beneficiary_id": "ben_raj_sharma",
+        "to_beneficiary": "Raj Sharma",
+        "amount": amount
+    }
+    server.pending_otps.set(session_id, {"otp": OTP, "details": details, "language": "en"})
+    return session_id
+
+
+def test_audit_failure_after_commit_still_reports_success(seeded_db, server_client, monkeypatch):
+    import server
+    db = seeded_db
+    start = db.get_account_balance("acc_current")
+    original_log_action = server.log_action
+
+    def log_action(user_id, action, status, **kwargs):
+        if action == "transfer_completed":
+            raise TimeoutError("Audit log commit not confirmed within 5.0s")
+        return original_log_action(user_id, action, status, **kwargs)
+
+    monkeypatch.setattr(server, "log_action", log_action)
+    session_id = _pending(server_client)
+    response = server_client.post("/api/verify-otp", params={"otp": OTP, "sessionId": session_id})
+    assert response.status_code == 200
+    assert response.json()["workflowStatus"] == "COMPLETED"
+    assert db.get_account_balance("acc_current") == start - 1500
+
+    # The OTP was consumed, so a retry can't pay again
+    retry = server_client.post("/api/verify-otp", params={"otp": OTP, "sessionId": session_id})
+    assert retry.status_code == 400
+    assert db.get_account_balance("acc_current") == start - 1500
+
+
+def test_transfer_error_restores_otp(seeded_db, server_client, monkeypatch):
+    import server
+
+    def broken_transfer(**kwargs):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(server, "execute_transfer", broken_transfer)
+    session_id = _pending(server_client)
+    response = server_client.post("/api/verify-otp", params={"otp": OTP, "sessionId": session_id})
+    assert response.status_code == 500
+    assert server.pending_otps.get(session_id) is not None